@@ -0,0 +1,360 @@
+// ============================================================================
+// Report: eGov component check (Projekt → KS / ISVS / AS), all joins on the server
+// Data source: MetaIS / Neo4j
+//
+// Same rows as py/project_eGov_components.py (same rules, messages and layout), but
+// instead of downloading the node dumps and eleven relation tables, every rule is one
+// match starting at the projects in scope, so only the final table leaves the server.
+//
+// PARAMETERS (all optional)
+//   parameters.projects   project UUIDs ($cmdb_id), list or comma-separated; empty = every project
+//   parameters.rules      rule names of py/egov_rules.py, list or comma-separated; empty = all
+//   parameters.skipRules  rule names to leave out
+//   parameters.dupNames   truthy → repeat the project / type / component cell on every row
+//
+// OUTPUT COLUMNS
+//   Projekt | typ eGov komponentu | eGov komponent | Chyby v eGov komponentoch | Projekt UUID
+//   (the last one groups the rows per project, py/project_eGov_components.py --server)
+//
+// Relation direction: X_verb_Y is stored as (X)-[X_verb_Y]->(Y), as in extract_relation_template.
+// ============================================================================
+
+
+// ---------- Token dictionaries / truthiness ----------------------------------
+def EMPTY_TOKENS = [:];  for (tok in ["", "null", "none"])                   EMPTY_TOKENS[(String)tok] = true
+def YES_TOKENS =   [:];  for (tok in ["áno","ano","yes","true","t","y","1"]) YES_TOKENS[(String)tok] =   true
+def NO_TOKENS =    [:];  for (tok in ["nie","no","false","f","n","0"])       NO_TOKENS[(String)tok] =    true
+def DUP_SET =      [:];  for (tok in ["true","1","yes","y","áno","ano"])     DUP_SET[(String)tok] =      true
+def MODULE_SET =   [:];  for (tok in ["1","true","yes"])                     MODULE_SET[(String)tok] =   true
+
+// "EA_Profil_ISVS_modul_isvs"; missing counts as false (egov_rules.parse_module_flag)
+def parseModuleFlag = { raw -> raw != null && MODULE_SET[(String)("" + raw).trim().toLowerCase()] == true }
+
+// "EA_Profil_AS_dostupnost_pre_externu_integraciu" (egov_rules.parse_ext_integration_flag)
+def parseExtIntegrationFlag = { raw ->
+  def one = { v ->
+    if (v == null) return null
+    if (v instanceof Boolean) return v
+    if (v instanceof Number) return ((Number) v).intValue() != 0
+    def s = ("" + v).trim().toLowerCase()
+    if (EMPTY_TOKENS[(String)s] == true) return null
+    if (s == "c_stav_dost_ext_int.1") return true
+    if (s == "c_stav_dost_ext_int.2") return false
+    if (YES_TOKENS[(String)s] == true) return true
+    if (NO_TOKENS[(String)s]  == true) return false
+    return null
+  }
+  if (raw instanceof List) {
+    for (v in (List)raw) if (one(v) == Boolean.TRUE) return true
+    return false
+  }
+  def v = one(raw)
+  (v != null) ? v : false
+}
+
+// list parameter: JSON list or "a,b,c"
+def paramList = { raw ->
+  def out = []
+  if (raw == null) return out
+  def items = (raw instanceof List) ? raw : ("" + raw).split(",")
+  for (x in items) {
+    def s = ("" + (x ?: "")).trim()
+    if (s) out.add(s)
+  }
+  out
+}
+
+def getSet = { Map m, String k ->
+  def s = (LinkedHashSet) m[k]
+  if (s == null) { s = new LinkedHashSet(); m[k] = s }
+  (LinkedHashSet<String>) s
+}
+
+def nameCode = { name, code -> (name ?: "") + " (" + (code ?: "") + ")" }
+
+
+// ---------- Parameters --------------------------------------------------------
+def headers = [
+  new Header("Projekt",                   Header.Type.STRING),
+  new Header("typ eGov komponentu",       Header.Type.STRING),
+  new Header("eGov komponent",            Header.Type.STRING),
+  new Header("Chyby v eGov komponentoch", Header.Type.STRING),
+  new Header("Projekt UUID",              Header.Type.STRING)
+]
+
+def wantedProjects = paramList(report.parameters?.projects)
+def duplicit_name_output = DUP_SET[(String)("" + (report.parameters?.dupNames ?: "")).trim().toLowerCase()] == true
+
+// registry order = message order in the report (py/egov_rules.py); the flag-only rules
+// ISVS_module / AS_external have no message and are always computed
+def ALL_RULES = [
+  "KS_no_AS", "KS_no_project_AS", "KS_no_Kanal", "KS_no_ZS", "KS_no_Agenda",
+  "ISVS_module_without_parent", "ISVS_module_with_children", "ISVS_not_module_with_parent", "ISVS_no_InfraSluzba",
+  "AS_no_ISVS", "AS_source_not_external", "AS_uses_not_external"
+]
+def ruleNames = paramList(report.parameters?.rules)
+def skipNames = paramList(report.parameters?.skipRules)
+def ON = [:]
+for (r in (ruleNames ? ruleNames : ALL_RULES)) ON[(String)r] = true
+for (r in skipNames) ON[(String)r] = false
+if (ON["KS_no_project_AS"] == true) ON["KS_no_AS"] = true  // its message is only checked for KS with some AS
+
+
+// ---------- Query helpers -----------------------------------------------------
+int _q = 0  // unique query identifiers
+
+// optional "project in scope" filter on a Projekt identifier
+def projFilter = { qiP, pid -> pid ? qiP.prop("\$cmdb_id").filter(eq(pid)) : new EmptyExpression() }
+
+// Every row of (Projekt)-[Projekt_realizuje_<compType>]->(comp), plus comp attribute `attr`
+def components = { String compType, String attr, pid ->
+  _q++
+  def qiP = qi("p_" + _q); def qiR = qi("r_" + _q); def qiC = qi("c_" + _q)
+  def q = match(path().node(qiP, type("Projekt"))
+                      .rel(qiR, RelationshipDirection.OUT, type("Projekt_realizuje_" + compType))
+                      .node(qiC, type(compType)))
+    .where(and(
+      not(qiP.filter(state(StateEnum.INVALIDATED))),
+      not(qiR.filter(state(StateEnum.INVALIDATED))),
+      not(qiC.filter(state(StateEnum.INVALIDATED))),
+      projFilter(qiP, pid)
+    ))
+    .returns(
+      prop("project_uuid", qiP.prop("\$cmdb_id")),
+      prop("comp_uuid",    qiC.prop("\$cmdb_id")),
+      prop("comp_name",    qiC.prop("Gen_Profil_nazov")),
+      prop("comp_meta",    qiC.prop("Gen_Profil_kod_metais")),
+      prop("comp_attr",    qiC.prop(attr ?: "Gen_Profil_nazov"))
+    )
+  Neo4j.execute(q).data
+}
+
+// Neighbours over `relType` of the components the projects in scope realize:
+// dir OUT = (comp)-[relType]->(other), IN = (other)-[relType]->(comp)
+def neighbours = { String compType, String relType, dir, String otherType, pid ->
+  _q++
+  def qiP = qi("p_" + _q); def qiR = qi("r_" + _q); def qiC = qi("c_" + _q)
+  def qiN = qi("n_" + _q); def qiO = qi("o_" + _q)
+  def q = match(path().node(qiP, type("Projekt"))
+                      .rel(qiR, RelationshipDirection.OUT, type("Projekt_realizuje_" + compType))
+                      .node(qiC, type(compType)))
+    .where(and(
+      not(qiP.filter(state(StateEnum.INVALIDATED))),
+      not(qiR.filter(state(StateEnum.INVALIDATED))),
+      not(qiC.filter(state(StateEnum.INVALIDATED))),
+      projFilter(qiP, pid)
+    ))
+    .match(path().node(qiC).rel(qiN, dir, type(relType)).node(qiO, type(otherType)))
+    .where(and(
+      not(qiN.filter(state(StateEnum.INVALIDATED))),
+      not(qiO.filter(state(StateEnum.INVALIDATED)))
+    ))
+    .returns(
+      prop("comp_uuid",  qiC.prop("\$cmdb_id")),
+      prop("other_uuid", qiO.prop("\$cmdb_id")),
+      prop("other_name", qiO.prop("Gen_Profil_nazov")),
+      prop("other_meta", qiO.prop("Gen_Profil_kod_metais")),
+      prop("other_ext",  qiO.prop("EA_Profil_AS_dostupnost_pre_externu_integraciu"))
+    )
+    .orderBy(qiO.prop("\$cmdb_id"), OrderDirection.ASC)
+  Neo4j.execute(q).data
+}
+
+// (project, KS) pairs where an AS serving the KS is realized by the same project
+def projectServedKS = { pid ->
+  _q++
+  def qiP = qi("p_" + _q); def qiR = qi("r_" + _q); def qiK = qi("k_" + _q)
+  def qiS = qi("s_" + _q); def qiA = qi("a_" + _q); def qiRA = qi("ra_" + _q)
+  def q = match(path().node(qiP, type("Projekt"))
+                      .rel(qiR, RelationshipDirection.OUT, type("Projekt_realizuje_KS"))
+                      .node(qiK, type("KS")))
+    .where(and(
+      not(qiP.filter(state(StateEnum.INVALIDATED))),
+      not(qiR.filter(state(StateEnum.INVALIDATED))),
+      not(qiK.filter(state(StateEnum.INVALIDATED))),
+      projFilter(qiP, pid)
+    ))
+    .match(path().node(qiK).rel(qiS, RelationshipDirection.IN, type("AS_sluzi_KS")).node(qiA, type("AS")))
+    .where(and(
+      not(qiS.filter(state(StateEnum.INVALIDATED))),
+      not(qiA.filter(state(StateEnum.INVALIDATED)))
+    ))
+    .match(path().node(qiA).rel(qiRA, RelationshipDirection.IN, type("Projekt_realizuje_AS")).node(qiP))
+    .where(not(qiRA.filter(state(StateEnum.INVALIDATED))))
+    .returns(
+      prop("project_uuid", qiP.prop("\$cmdb_id")),
+      prop("comp_uuid",    qiK.prop("\$cmdb_id"))
+    )
+  Neo4j.execute(q).data
+}
+
+
+// ---------- Run the queries (once, or once per wanted project) ---------------
+def PROJECTS  = new LinkedHashMap()  // uuid → [name, meta]
+def COMPS     = [KS: new LinkedHashMap(), ISVS: new LinkedHashMap(), AS: new LinkedHashMap()]  // type → project uuid → (comp uuid → row)
+def ATTR      = new LinkedHashMap()  // comp uuid → parsed flag (ISVS module / AS external)
+def HAS       = new LinkedHashMap()  // check name → Set of comp uuids that have the relation
+def LIST      = new LinkedHashMap()  // check name → (comp uuid → (other uuid → row)) neighbours to list
+def PROJ_KS   = new LinkedHashMap()  // "project|ks" → true
+
+def has = { String key, rows ->
+  def s = (LinkedHashSet) HAS[key]
+  if (s == null) { s = new LinkedHashSet(); HAS[key] = s }
+  for (r in rows) s.add((String) r.comp_uuid)
+}
+// neighbours() repeats a (comp, other) edge for every project realizing comp, and again
+// in every scope: keep one row per edge, like the deduplicated edges of py/egov_graph.py
+def listing = { String key, rows ->
+  def m = (Map) LIST[key]
+  if (m == null) { m = new LinkedHashMap(); LIST[key] = m }
+  for (r in rows) {
+    def l = (Map) m[(String) r.comp_uuid]
+    if (l == null) { l = new LinkedHashMap(); m[(String) r.comp_uuid] = l }
+    if (!l.containsKey((String) r.other_uuid)) l[(String) r.other_uuid] = r
+  }
+}
+
+def scopes = wantedProjects ? wantedProjects : [null]
+for (pid in scopes) {
+  _q++
+  def qiP = qi("p_" + _q)
+  def qProj = match(path().node(qiP, type("Projekt")))
+    .where(and(not(qiP.filter(state(StateEnum.INVALIDATED))), projFilter(qiP, pid)))
+    .returns(
+      prop("project_uuid", qiP.prop("\$cmdb_id")),
+      prop("project_name", qiP.prop("Gen_Profil_nazov")),
+      prop("project_meta", qiP.prop("Gen_Profil_kod_metais"))
+    )
+    .orderBy(qiP.prop("\$cmdb_id"), OrderDirection.ASC)
+  for (r in Neo4j.execute(qProj).data) PROJECTS[(String) r.project_uuid] = [r.project_name, r.project_meta]
+
+  for (spec in [["KS", null], ["ISVS", "EA_Profil_ISVS_modul_isvs"], ["AS", "EA_Profil_AS_dostupnost_pre_externu_integraciu"]]) {
+    def byProj = (Map) COMPS[spec[0]]
+    for (r in components(spec[0], spec[1], pid)) {
+      def m = (Map) byProj[(String) r.project_uuid]
+      if (m == null) { m = new TreeMap(); byProj[(String) r.project_uuid] = m }  // components sorted by uuid
+      m[(String) r.comp_uuid] = r
+      if (spec[0] == "ISVS") ATTR[(String) r.comp_uuid] = parseModuleFlag(r.comp_attr)
+      if (spec[0] == "AS")   ATTR[(String) r.comp_uuid] = parseExtIntegrationFlag(r.comp_attr)
+    }
+  }
+
+  if (ON["KS_no_AS"])     has("KS_AS",     neighbours("KS", "AS_sluzi_KS",           RelationshipDirection.IN,  "AS",     pid))
+  if (ON["KS_no_Kanal"])  has("KS_Kanal",  neighbours("KS", "Kanal_spristupnuje_KS", RelationshipDirection.IN,  "Kanal",  pid))
+  if (ON["KS_no_ZS"])     has("KS_ZS",     neighbours("KS", "ZS_zoskupuje_KS",       RelationshipDirection.IN,  "ZS",     pid))
+  if (ON["KS_no_Agenda"]) has("KS_Agenda", neighbours("KS", "KS_asociuje_Agenda",    RelationshipDirection.OUT, "Agenda", pid))
+  if (ON["KS_no_project_AS"]) {
+    for (r in projectServedKS(pid)) PROJ_KS[(String) r.project_uuid + "|" + (String) r.comp_uuid] = true
+  }
+  if (ON["ISVS_module_without_parent"] || ON["ISVS_not_module_with_parent"]) {
+    listing("ISVS_parents", neighbours("ISVS", "ISVS_patri_pod_ISVS", RelationshipDirection.IN, "ISVS", pid))
+  }
+  if (ON["ISVS_module_with_children"]) {
+    listing("ISVS_children", neighbours("ISVS", "ISVS_patri_pod_ISVS", RelationshipDirection.OUT, "ISVS", pid))
+  }
+  if (ON["ISVS_no_InfraSluzba"]) has("ISVS_Infra", neighbours("ISVS", "InfraSluzba_prevadzkuje_ISVS", RelationshipDirection.IN, "InfraSluzba", pid))
+  if (ON["AS_no_ISVS"])          has("AS_ISVS",    neighbours("AS", "ISVS_realizuje_AS", RelationshipDirection.IN, "ISVS", pid))
+  if (ON["AS_source_not_external"]) listing("AS_targets", neighbours("AS", "AS_sluzi_AS", RelationshipDirection.OUT, "AS", pid))
+  if (ON["AS_uses_not_external"])   listing("AS_sources", neighbours("AS", "AS_sluzi_AS", RelationshipDirection.IN,  "AS", pid))
+}
+
+def hasRel  = { String key, String u -> ((LinkedHashSet) HAS[key])?.contains(u) == true }
+def listed  = { String key, String u -> new ArrayList(((Map) ((Map) LIST[key])?.getAt(u))?.values() ?: []) }
+
+
+// ---------- Checks (messages as in py/egov_rules.py) -------------------------
+def checkKS = { String u, String pid ->
+  def errs = []
+  def noAS = ON["KS_no_AS"] && !hasRel("KS_AS", u)
+  if (noAS) errs << "KS nie je služené žiadnou AS"
+  if (ON["KS_no_project_AS"] && !noAS && PROJ_KS[pid + "|" + u] != true) errs << "KS nie je slúžené žiadnou AS realizovanou týmto projektom"
+  if (ON["KS_no_Kanal"]  && !hasRel("KS_Kanal", u))  errs << "KS nie je sprístupnená žiadnym kanálom"
+  if (ON["KS_no_ZS"]     && !hasRel("KS_ZS", u))     errs << "KS nie je zoskupena žiadnou životnou situáciou"
+  if (ON["KS_no_Agenda"] && !hasRel("KS_Agenda", u)) errs << "KS neasociuje žiadnu agendu"
+  errs
+}
+
+def checkISVS = { String u ->
+  def errs = []
+  def isModule = ATTR[u] == true
+  def parents  = listed("ISVS_parents", u)
+  def children = listed("ISVS_children", u)
+  if (ON["ISVS_module_without_parent"] && isModule && parents.size() == 0) errs << "ISVS je modul, ale nemá materský ISVS"
+  if (ON["ISVS_module_with_children"] && isModule) {
+    for (c in children) errs << ("ISVS je modul, ale má dcérske ISVS: " + nameCode(c.other_name, c.other_meta))
+  }
+  if (ON["ISVS_not_module_with_parent"] && !isModule) {
+    for (p in parents) errs << ("ISVS nie je modul, ale patri pod iné ISVS: " + nameCode(p.other_name, p.other_meta))
+  }
+  if (ON["ISVS_no_InfraSluzba"] && !hasRel("ISVS_Infra", u)) errs << "ISVS nie je prevádzkovaná žiadnou infraštruktúrnou službou"
+  errs
+}
+
+def checkAS = { String u ->
+  def errs = []
+  def external = ATTR[u] == true
+  if (ON["AS_no_ISVS"] && !hasRel("AS_ISVS", u)) errs << "AS nie je realizovaná žiadnym ISVS"
+  if (ON["AS_source_not_external"] && !external) {
+    for (t in listed("AS_targets", u)) {
+      errs << ('AS nema príznak "určená na externú integráciu", ale má vzťah na inú AS: ' + nameCode(t.other_name, t.other_meta))
+    }
+  }
+  if (ON["AS_uses_not_external"]) {
+    for (s in listed("AS_sources", u)) {
+      if (!parseExtIntegrationFlag(s.other_ext)) {
+        errs << ('AS ma vzťah na inú AS ktorá nemá príznak "určená na externú integráciu": ' + (s.other_name ?: "<bez názvu>") + " (" + (s.other_meta ?: "?") + ")")
+      }
+    }
+  }
+  errs
+}
+
+
+// ---------- Report rows (layout of project_eGov_components.build_rows) --------
+def BLOCKS = [
+  ["KS",   "(Projekt nerealizuje žiadnu koncovú službu)"],
+  ["ISVS", "(Projekt nerealizuje žiaden informačný systém verejnej správy)"],
+  ["AS",   "(Projekt nerealizuje žiadnu aplikačnú službu)"]
+]
+
+def table = new Report(headers)
+int nRows = 0
+
+for (entry in PROJECTS.entrySet()) {
+  def pid   = (String) entry.key
+  def pcell = nameCode(entry.value[0] ?: pid, entry.value[1] ?: pid)
+  boolean col1 = true
+
+  for (blk in BLOCKS) {
+    def label = blk[0]
+    boolean col2 = true
+    def comps = (Map) ((Map) COMPS[label])[pid]
+
+    if (comps == null || comps.size() == 0) {
+      table.add([(duplicit_name_output || col1) ? pcell : "", (duplicit_name_output || col2) ? label : "", blk[1], "", pid])
+      nRows++
+      col1 = false; col2 = false
+      continue
+    }
+
+    for (c in comps.values()) {
+      def u = (String) c.comp_uuid
+      def ccell = nameCode(c.comp_name, c.comp_meta)
+      def errs = (label == "KS") ? checkKS(u, pid) : (label == "ISVS") ? checkISVS(u) : checkAS(u)
+      boolean col3 = true
+      for (e in (errs.size() == 0 ? [""] : errs)) {
+        table.add([
+          (duplicit_name_output || col1) ? pcell : "",
+          (duplicit_name_output || col2) ? label : "",
+          (duplicit_name_output || col3) ? ccell : "",
+          e,
+          pid
+        ])
+        nRows++
+        col1 = false; col2 = false; col3 = false
+      }
+    }
+  }
+}
+
+return new ReportResult("TABLE", table, nRows)
\ No newline at end of file
@@ -0,0 +1,29 @@
+// Delta export of __TYPE__: only nodes modified after parameters.since
+//   changed     – full nodes (same shape as extract_raw_template) modified after `since`
+//   invalidated – nodes invalidated after `since`, to be dropped from the local dump
+def since = report.parameters?.since
+
+def qi_node   = qi("node")
+def qi_gone   = qi("gone")
+def type_node = type("__TYPE__")
+
+def qChanged = match(path().node(qi_node, type_node))
+  .where(and(
+    not(qi_node.filter(state(StateEnum.INVALIDATED))),
+    qi_node.prop("\$cmdb_lastModifiedAt").filter(gt(since))
+  ))
+
+def qGone = match(path().node(qi_gone, type_node))
+  .where(and(
+    qi_gone.filter(state(StateEnum.INVALIDATED)),
+    qi_gone.prop("\$cmdb_lastModifiedAt").filter(gt(since))
+  ))
+  .returns(
+    prop("uuid",     qi_gone.prop("\$cmdb_id")),
+    prop("modified", qi_gone.prop("\$cmdb_lastModifiedAt"))
+  )
+
+def changed = Neo4j.execute(qChanged.returns(node(qi_node))).data.collect { it.node }
+def gone    = Neo4j.execute(qGone).data.collect { [uuid: it.uuid, modified: it.modified] }
+
+return [changed: changed, invalidated: gone]
\ No newline at end of file
@@ -0,0 +1,31 @@
+def qi_node  = qi("node")
+def type_node = type("__TYPE__")
+
+def q = match(path().node(qi_node, type_node))
+  .where(not(qi_node.filter(state(StateEnum.INVALIDATED))))
+
+// pagination. Undefined (null) page and perPage returns everything (like extract_raw_template)
+def page    = report.page
+def perPage = report.perPage
+
+// totalCount is the size of the whole type, not of this page
+def resCount = Neo4j.execute(q.returns(count("totalCount", qi_node)))
+def total = (resCount.data && resCount.data[0]?.totalCount) ? (resCount.data[0].totalCount as int) : 0
+
+// stable order so that pages don't overlap
+def query = q.returns(node(qi_node))
+  .orderBy(qi_node.prop("\$cmdb_id"), OrderDirection.ASC)
+
+if (page && perPage && perPage > 0) {
+  query = query.limit(perPage)
+}
+if (page && perPage && page > 0) {
+  query = query.offset((page - 1) * perPage)
+}
+
+def res = Neo4j.execute(query)
+
+def result = new ReportResult("RAW", res.data.collect { it.node }, total)
+result.page = page
+result.perPage = perPage
+return result
\ No newline at end of file
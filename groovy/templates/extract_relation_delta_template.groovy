@@ -0,0 +1,65 @@
+// Delta export of relation __RELATION__ (CENTRAL <--(REL)-- OUTER) modified after parameters.since
+// Same first two columns as extract_relation_template, plus:
+//   change   – "upsert" (valid relation) or "delete" (relation invalidated since last sync)
+//   modified – $cmdb_lastModifiedAt of the relation (used as the next high-water mark)
+def headers = [
+  new Header("central_uuid", Header.Type.STRING),
+  new Header("outer_uuid",   Header.Type.STRING),
+  new Header("change",       Header.Type.STRING),
+  new Header("modified",     Header.Type.STRING)
+]
+
+def since = report.parameters?.since
+
+// === QI & types ===
+def qi_central = qi("central")
+def qi_rel     = qi("rel")
+def qi_outer   = qi("outer")
+
+def type_CENTRAL = type("__CENTRAL__")
+def type_OUTER   = type("__OUTER__")
+def type_REL     = type("__RELATION__")
+
+def rel_path = path()
+  .node(qi_central, type_CENTRAL)
+  .rel(qi_rel, RelationshipDirection.IN, type_REL)
+  .node(qi_outer, type_OUTER)
+
+// valid relations (between valid nodes) changed since last sync
+def qUpsert = match(rel_path)
+  .where(and(
+    not(qi_central.filter(state(StateEnum.INVALIDATED))),
+    not(qi_rel.filter(state(StateEnum.INVALIDATED))),
+    not(qi_outer.filter(state(StateEnum.INVALIDATED))),
+    qi_rel.prop("\$cmdb_lastModifiedAt").filter(gt(since))
+  ))
+  .returns(
+    prop("central_uuid", qi_central.prop("\$cmdb_id")),
+    prop("outer_uuid",   qi_outer.prop("\$cmdb_id")),
+    prop("modified",     qi_rel.prop("\$cmdb_lastModifiedAt"))
+  )
+
+// relations invalidated since last sync
+def qDelete = match(rel_path)
+  .where(and(
+    qi_rel.filter(state(StateEnum.INVALIDATED)),
+    qi_rel.prop("\$cmdb_lastModifiedAt").filter(gt(since))
+  ))
+  .returns(
+    prop("central_uuid", qi_central.prop("\$cmdb_id")),
+    prop("outer_uuid",   qi_outer.prop("\$cmdb_id")),
+    prop("modified",     qi_rel.prop("\$cmdb_lastModifiedAt"))
+  )
+
+def table = new Report(headers)
+int total = 0
+for (row in Neo4j.execute(qUpsert).data) {
+  table.add([ row.central_uuid, row.outer_uuid, "upsert", "" + row.modified ])
+  total++
+}
+for (row in Neo4j.execute(qDelete).data) {
+  table.add([ row.central_uuid, row.outer_uuid, "delete", "" + row.modified ])
+  total++
+}
+
+return new ReportResult("TABLE", table, total)
\ No newline at end of file
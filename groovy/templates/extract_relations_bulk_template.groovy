@@ -0,0 +1,68 @@
+// Bulk export of several relation types in one request (driver: metais_client.extract_relations_bulk)
+// Same rows as extract_relation_template, with the relation type name in front:
+//   relation | central_uuid | outer_uuid
+// parameters.relations = [[central: "KS", outer: "PO", relation: "PO_je_gestor_KS"], ...]
+// parameters.count     = true to run the count() query per relation as well (default off);
+//                        totalCount is then the server-side count, otherwise the number of rows
+def headers = [
+  new Header("relation",     Header.Type.STRING),
+  new Header("central_uuid", Header.Type.STRING),
+  new Header("outer_uuid",   Header.Type.STRING)
+]
+
+def specs     = report.parameters?.relations ?: []
+def withCount = report.parameters?.count ? true : false
+
+// === QI ===
+def qi_central = qi("central")
+def qi_rel     = qi("rel")
+def qi_outer   = qi("outer")
+
+def table = new Report(headers)
+int total = 0
+
+// Specs sharing a central type reuse one base match
+def bases = [:]
+
+for (spec in specs) {
+  def base = bases[spec.central]
+  if (base == null) {
+    base = match(path().node(qi_central, type(spec.central)))
+             .where(not(qi_central.filter(state(StateEnum.INVALIDATED))))
+    bases[spec.central] = base
+  }
+
+  // === Relation: CENTRAL <--(REL)-- OUTER  (incoming to CENTRAL)
+  def q = base.match(
+            path()
+              .node(qi_central)
+              .rel(qi_rel, RelationshipDirection.IN, type(spec.relation))
+              .node(qi_outer, type(spec.outer))
+          )
+          .where(and(
+            not(qi_rel.filter(state(StateEnum.INVALIDATED))),
+            not(qi_outer.filter(state(StateEnum.INVALIDATED)))
+          ))
+
+  if (withCount) {
+    def resCount = Neo4j.execute(q.returns(count("totalCount", qi_central)))
+    total += (resCount.data && resCount.data[0]?.totalCount) ? (resCount.data[0].totalCount as int) : 0
+  }
+
+  def query = q.returns(
+    prop("central_uuid", qi_central.prop("\$cmdb_id")),
+    prop("outer_uuid",   qi_outer.prop("\$cmdb_id"))
+  )
+  .orderBy(qi_central.prop("\$cmdb_id"), OrderDirection.ASC)
+
+  def res = Neo4j.execute(query)
+  for (row in res.data) {
+    table.add([ spec.relation, row.central_uuid, row.outer_uuid ])
+  }
+  if (!withCount) {
+    total += res.data.size()
+  }
+}
+
+def result = new ReportResult("TABLE", table, total)
+return result
\ No newline at end of file
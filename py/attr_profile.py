@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# attr_profile.py — attribute profile of every node dump in output/nodes
+#
+# unique_attributes.py counts how often each attribute is present in one dump. This goes
+# further and profiles all dumps at once (one process per dump, each dump streamed once):
+# per attribute (metaAttributes as meta_<name>, like store.py)
+#   present    nodes that have the attribute
+#   null       share of those where it is null / ""
+#   distinct   number of distinct values; exact up to EXACT_DISTINCT values, then a
+#              HyperLogLog estimate (~1.6% error), marked with ~
+#   top        the most frequent values with counts (counts marked ~ are lower bounds: the
+#              counter is pruned to TOP_CAP values when an attribute has more)
+#   types      mix of value types (str, int, float, bool, list = multi-valued, dict, null)
+# Profiles are cached in output/profiles/<TYPE>.json together with the dump's mtime, size
+# and sha256: an unchanged dump is not read again, a touched but identical one is only hashed.
+#
+# Usage:
+#   python3 py/attr_profile.py                     (all of output/nodes)
+#   python3 py/attr_profile.py KS AS --top 10
+#   python3 py/attr_profile.py --json output/attr_profile.json --force
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+import convert
+import metrics
+from jsonstream import iter_result_items
+from manifest import sha256_file
+from unique_attributes import node_row, node_types
+
+DIR_NODES = "output/nodes"
+DIR_PROFILES = os.getenv("METAIS_PROFILE_DIR", "output/profiles")
+JOBS = int(os.getenv("METAIS_PROFILE_JOBS", str(os.cpu_count() or 1)))
+EXACT_DISTINCT = 20000  # distinct values kept exactly before switching to HyperLogLog
+HLL_P = 12              # 4096 registers
+TOP_CAP = 2000          # values counted per attribute before the counter is pruned
+TOP_K = 5
+PROFILE_VERSION = 1     # bump when the profile format changes (invalidates the cache)
+
+
+# ------------------------------ Distinct counting ------------------------------
+def _hash64(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "big")
+
+class HyperLogLog:
+    def __init__(self, p: int = HLL_P):
+        self.p = p
+        self.m = 1 << p
+        self.reg = bytearray(self.m)
+
+    def add(self, key: str) -> None:
+        h = _hash64(key)
+        idx = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.reg[idx]:
+            self.reg[idx] = rank
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / sum(2.0 ** -r for r in self.reg)
+        zeros = self.reg.count(0)
+        if est <= 2.5 * m and zeros:
+            est = m * math.log(m / zeros)  # small-range correction (linear counting)
+        return int(round(est))
+
+class Distinct:
+    # exact set, replaced by a HyperLogLog once it grows past EXACT_DISTINCT
+    def __init__(self):
+        self.exact: Optional[set] = set()
+        self.hll: Optional[HyperLogLog] = None
+
+    def add(self, key: str) -> None:
+        if self.exact is not None:
+            self.exact.add(key)
+            if len(self.exact) > EXACT_DISTINCT:
+                self.hll = HyperLogLog()
+                for k in self.exact:
+                    self.hll.add(k)
+                self.exact = None
+        else:
+            self.hll.add(key)
+
+    def result(self) -> Tuple[int, bool]:
+        # -> (count, exact?)
+        if self.exact is not None:
+            return len(self.exact), True
+        return self.hll.count(), False
+
+
+# ------------------------------ Profiling ------------------------------
+def _type_name(v: Any) -> str:
+    if v is None:
+        return "null"
+    return {bool: "bool", int: "int", float: "float", str: "str", list: "list", dict: "dict"}.get(type(v), type(v).__name__)
+
+def _key(v: Any) -> str:
+    return v if isinstance(v, str) else json.dumps(v, ensure_ascii=False, sort_keys=True)
+
+class AttrStats:
+    __slots__ = ("present", "nulls", "types", "distinct", "top", "pruned")
+
+    def __init__(self):
+        self.present = 0
+        self.nulls = 0
+        self.types: Counter = Counter()
+        self.distinct = Distinct()
+        self.top: Counter = Counter()
+        self.pruned = False
+
+    def add(self, v: Any) -> None:
+        self.present += 1
+        self.types[_type_name(v)] += 1
+        if v is None or v == "":
+            self.nulls += 1
+            return
+        for x in (v if isinstance(v, list) else (v,)):  # multi-valued: every value counts
+            if x is None:
+                continue
+            k = _key(x)
+            self.distinct.add(k)
+            self.top[k] += 1
+        if len(self.top) > TOP_CAP:
+            self.top = Counter(dict(self.top.most_common(TOP_CAP // 2)))
+            self.pruned = True
+
+    def to_dict(self, k: int) -> Dict[str, Any]:
+        n, exact = self.distinct.result()
+        return {"present": self.present, "nulls": self.nulls, "distinct": n, "distinct_exact": exact,
+                "top": self.top.most_common(k), "top_exact": not self.pruned, "types": dict(self.types)}
+
+def profile_dump(path: str, top: int = TOP_K) -> Dict[str, Any]:
+    stats: Dict[str, AttrStats] = {}
+    nodes = 0
+    for obj in iter_result_items(path):
+        if not isinstance(obj, dict):
+            continue
+        nodes += 1
+        for name, v in node_row(obj).items():
+            s = stats.get(name)
+            if s is None:
+                s = stats[name] = AttrStats()
+            s.add(v)
+    return {"nodes": nodes, "attributes": {name: s.to_dict(top) for name, s in stats.items()}}
+
+
+# ------------------------------ Cache ------------------------------
+def _cache_path(type_name: str) -> str:
+    return os.path.join(DIR_PROFILES, f"{type_name}.json")
+
+def _load_cached(type_name: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_cache_path(type_name), "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return doc if isinstance(doc, dict) and doc.get("version") == PROFILE_VERSION else None
+
+def _save(type_name: str, doc: Dict[str, Any]) -> None:
+    os.makedirs(DIR_PROFILES, exist_ok=True)
+    path = _cache_path(type_name)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def profile_type(type_name: str, path: str, top: int = TOP_K, force: bool = False) -> Tuple[Dict[str, Any], str]:
+    # -> (profile document, "cached" / "rehashed" / "profiled")
+    st = os.stat(path)
+    cached = None if force else _load_cached(type_name)
+    if cached and cached.get("top_k", 0) >= top:
+        if cached.get("mtime") == st.st_mtime and cached.get("size") == st.st_size:
+            return cached, "cached"
+        if cached.get("size") == st.st_size and cached.get("sha256") == sha256_file(path):
+            cached["mtime"] = st.st_mtime  # touched, content unchanged
+            _save(type_name, cached)
+            return cached, "rehashed"
+    with metrics.span("profile", item=type_name, bytes=st.st_size) as m:
+        t0 = time.perf_counter()
+        doc = {"version": PROFILE_VERSION, "type": type_name, "source": path, "mtime": st.st_mtime,
+               "size": st.st_size, "sha256": sha256_file(path), "top_k": top}
+        doc.update(profile_dump(path, top))
+        doc["seconds"] = round(time.perf_counter() - t0, 3)
+        m["rows"] = doc["nodes"]
+    _save(type_name, doc)
+    return doc, "profiled"
+
+def _job(args) -> Tuple[str, Optional[Dict[str, Any]], str, str]:
+    type_name, path, top, force = args
+    try:
+        doc, how = profile_type(type_name, path, top, force)
+        return type_name, doc, how, ""
+    except (OSError, ValueError) as e:
+        return type_name, None, "", str(e) or type(e).__name__
+
+
+# ------------------------------ Output ------------------------------
+def _short(s: str, n: int = 24) -> str:
+    s = s.replace("\n", " ")
+    return s if len(s) <= n else s[:n - 1] + "…"
+
+def print_profile(doc: Dict[str, Any], how: str, top: int = TOP_K) -> None:
+    nodes = doc["nodes"]
+    print(f"======== {doc['type']} ({nodes} nodes, {how}) ========")
+    print(f"{'Attribute Name':60} {'Present':>8} {'%':>7} {'Null %':>7} {'Distinct':>9}  {'Types':18} Top values")
+    print("-" * 150)
+    attrs = sorted(doc["attributes"].items(), key=lambda kv: (-kv[1]["present"], kv[0]))
+    for name, a in attrs:
+        pct = a["present"] / nodes * 100.0 if nodes else 0.0
+        null_pct = a["nulls"] / a["present"] * 100.0 if a["present"] else 0.0
+        distinct = f"{'' if a['distinct_exact'] else '~'}{a['distinct']}"
+        types = ",".join(f"{t}:{c}" for t, c in sorted(a["types"].items(), key=lambda kv: -kv[1]))
+        mark = "" if a["top_exact"] else "~"
+        tops = ", ".join(f"{_short(v)} ({mark}{c})" for v, c in a["top"][:top])
+        print(f"{name:60} {a['present']:8d} {pct:6.1f}% {null_pct:6.1f}% {distinct:>9}  {_short(types, 18):18} {tops}")
+    print()
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Profile the attributes of all node dumps (presence, nulls, distinct values, top values, types).")
+    ap.add_argument("types", nargs="*", help=f"Node types (default: every {DIR_NODES}/*_raw.json)")
+    ap.add_argument("--top", type=int, default=TOP_K, help=f"Top values per attribute (default: {TOP_K})")
+    ap.add_argument("-j", "--jobs", type=int, default=JOBS,
+                    help=f"Dumps profiled in parallel (default: {JOBS}, env METAIS_PROFILE_JOBS)")
+    ap.add_argument("--force", action="store_true", help=f"Ignore the cached profiles in {DIR_PROFILES}")
+    ap.add_argument("--json", metavar="FILE", help="Also write all profiles into one JSON file")
+    ap.add_argument("-q", "--quiet", action="store_true", help="No per-attribute tables, only the summary line per type")
+    metrics.add_metrics_arg(ap)
+    args = ap.parse_args(argv)
+    metrics.apply_args(args)
+
+    types = args.types or node_types(DIR_NODES)
+    if not types:
+        print(f"[ERROR] Nothing to profile: no types given and {DIR_NODES} is empty.", file=sys.stderr)
+        return 1
+    tasks, failed = [], 0
+    for t in types:
+        path = os.path.join(DIR_NODES, f"{t}_raw.json")
+        if not os.path.exists(path):
+            print(f"[ERROR] Node dump not found: {path}", file=sys.stderr)
+            failed += 1
+            continue
+        tasks.append((t, path, args.top, args.force))
+
+    docs: Dict[str, Tuple[Dict[str, Any], str]] = {}
+    results = list(convert.run_pool(_job, tasks, args.jobs))
+    for type_name, doc, how, err in results:
+        if err:
+            failed += 1
+            print(f"[ERROR] {type_name}: {err}", file=sys.stderr)
+        else:
+            docs[type_name] = (doc, how)
+
+    for type_name in sorted(docs):
+        doc, how = docs[type_name]
+        if args.quiet:
+            print(f"[INFO] {type_name}: {doc['nodes']} nodes, {len(doc['attributes'])} attributes ({how})")
+        else:
+            print_profile(doc, how, args.top)
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or ".", exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({t: d for t, (d, _) in sorted(docs.items())}, f, ensure_ascii=False, indent=1)
+        print(f"Wrote: {args.json}")
+    how_counts = Counter(how for _, how in docs.values())
+    print(f"[INFO] {len(docs)} types: {how_counts.get('profiled', 0)} profiled, "
+          f"{how_counts.get('cached', 0) + how_counts.get('rehashed', 0)} from cache, {failed} failed.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# batch.py — bounded-concurrency runner shared by raw_reports.py and raw_relations.py
+#
+# Each extraction is mostly waiting on the MetaIS report endpoint, so we run
+# several of them at once on a thread pool. Two knobs:
+#   METAIS_JOBS      / --jobs N  – worker threads (how many extractions in flight)
+#   METAIS_PER_HOST             – max concurrent requests against one API host
+# The per-host cap wins if it is lower than --jobs, so raising --jobs alone
+# never floods the report endpoint.
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+JOBS = int(os.getenv("METAIS_JOBS", "4"))
+PER_HOST = int(os.getenv("METAIS_PER_HOST", "4"))
+API_URL = os.getenv("METAIS_API_URL", "https://metais-test.slovensko.sk/api/report/reports/run?lang=sk")
+
+# ------------------------------ Per-host limiting ------------------------------
+_host_lock = threading.Lock()
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+def _slots_for(url: str) -> threading.BoundedSemaphore:
+    host = urlparse(url).netloc or url
+    with _host_lock:
+        sem = _host_slots.get(host)
+        if sem is None:
+            sem = threading.BoundedSemaphore(max(1, PER_HOST))
+            _host_slots[host] = sem
+        return sem
+
+# Wrap only the network part of a job (not the retry sleep) so waiting jobs don't hold a slot.
+@contextmanager
+def host_slot(url: str = API_URL):
+    sem = _slots_for(url)
+    sem.acquire()
+    try:
+        yield
+    finally:
+        sem.release()
+
+# ------------------------------ Batch execution ------------------------------
+# worker(item, idx, total) -> (ok, lines)
+# Workers don't print; they return their output lines and we print them here as one
+# block when the job finishes, so parallel jobs never interleave on the console.
+# Any "Wrote: ..." line gets the "(done n/total)" suffix, n counting finished jobs.
+#
+# With size, an item stands for size(item) results (a bulk request for several relations):
+# the worker returns how many of them succeeded instead of a bool, ok / failed / total count
+# results, and each "Wrote:" line of an item gets a number of its own.
+Worker = Callable[[Any, int, int], Tuple[bool, List[str]]]
+
+def _emit(lines: List[str], done: int, total: int, per_line: bool = False) -> None:
+    out = []
+    for line in lines:
+        if line.startswith("Wrote:"):
+            done += per_line
+            out.append(f"{line} (done {done}/{total})")
+        else:
+            out.append(line)
+    print("\n".join(out), flush=True)
+
+def run_batch(items: Iterable[Any], worker: Worker, jobs: int = JOBS,
+              size: Optional[Callable[[Any], int]] = None) -> Tuple[int, int]:
+    # Returns (ok, failed).
+    items = list(items)
+    total = sum(map(size, items)) if size else len(items)
+    jobs = max(1, min(jobs, len(items) or 1))
+    ok = failed = done = 0
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(worker, item, i, len(items)): item for i, item in enumerate(items, start=1)}
+        for fut in as_completed(futures):
+            n = size(futures[fut]) if size else 1
+            try:
+                success, lines = fut.result()
+            except Exception as e:  # a worker bug shouldn't take the whole batch down
+                success, lines = False, [f"[ERROR] {futures[fut]}: unexpected error: {e}"]
+            if size:
+                _emit(lines, done, total, per_line=True)
+            else:
+                _emit(lines, done + 1, total)
+            good = min(int(success), n)
+            done += n
+            ok += good
+            failed += n - good
+
+    return ok, failed
+
+def add_jobs_arg(ap) -> None:
+    ap.add_argument("-j", "--jobs", type=int, default=JOBS,
+                    help=f"Number of extractions to run in parallel (default: {JOBS}, env METAIS_JOBS). "
+                         f"Requests per API host are additionally capped by METAIS_PER_HOST ({PER_HOST}).")
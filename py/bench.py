@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# bench.py — end-to-end benchmark of the extraction + analysis scripts against mock_metais.py
+#
+# Starts the mock API on a free port, then runs each stage as its own process in a scratch
+# directory (output/bench/work, so the real output/ is never touched):
+#   raw_reports         python3 py/raw_reports.py            all node types
+#   raw_relations       python3 py/raw_relations.py all      all relation types (--bulk N optional)
+#   unique_attributes   python3 py/unique_attributes.py KS AS_sluzi_KS,AS
+#   egov                python3 py/project_eGov_components.py
+# and records wall / user / sys time and peak RSS per stage (egov also its load / per-rule /
+# report timings) as one line in output/bench/results.jsonl. Each run is compared with the
+# last recorded run of the same configuration; stages that got slower than --threshold are
+# flagged (and --check turns that into exit code 1). Stage logs: output/bench/logs/<stage>.log
+#
+# Usage:
+#   python3 py/bench.py                                   (defaults: 2000 nodes/type)
+#   python3 py/bench.py --nodes 50000 --latency 20 -j 8 --bulk 10
+#   python3 py/bench.py --stages egov --repeat 3 --check
+import argparse
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PY = os.path.join(ROOT, "py")
+BENCH_DIR = os.path.join(ROOT, "output", "bench")
+RESULTS = os.path.join(BENCH_DIR, "results.jsonl")
+STAGES = ["raw_reports", "raw_relations", "unique_attributes", "egov"]
+
+_RULE_RE = re.compile(r"^(\S+)\s+(\d+\.\d+)(\s+\d+)?$")
+_LOADED_RE = re.compile(r"^Loaded .* in (\d+\.\d+)s$")
+_REPORT_RE = re.compile(r"^Report for .* written in (\d+\.\d+)s$")
+
+
+# ------------------------------ Setup ------------------------------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_mock(args, port: int) -> subprocess.Popen:
+    cmd = [sys.executable, os.path.join(PY, "mock_metais.py"), "--port", str(port),
+           "--nodes", str(args.nodes), "--density", str(args.density), "--attrs", str(args.attrs),
+           "--latency", str(args.latency), "--ms-per-1k", str(args.ms_per_1k), "--fail-rate", str(args.fail_rate)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("mock_metais.py did not start")
+
+def make_workdir(path: str, data: Dict[str, Any]) -> None:
+    # Scratch repo root (the scripts use relative groovy/, params/ and output/ paths). Kept
+    # between runs while the mock data settings stay the same, so "--stages egov" can reuse
+    # the dumps of an earlier run; wiped when they change.
+    stamp = os.path.join(path, "data.json")
+    if os.path.exists(stamp):
+        with open(stamp, "r", encoding="utf-8") as f:
+            if json.load(f) == data:
+                return
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(os.path.join(path, "output", "nodes"))
+    os.makedirs(os.path.join(path, "output", "relations"))
+    for name in ("groovy", "params"):
+        os.symlink(os.path.join(ROOT, name), os.path.join(path, name))
+    with open(stamp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+def has_dumps(workdir: str, kind: str) -> bool:
+    d = os.path.join(workdir, "output", kind)
+    return os.path.isdir(d) and any(f.endswith(".json") for f in os.listdir(d))
+
+def bench_env(port: int) -> Dict[str, str]:
+    base = f"http://127.0.0.1:{port}/api"
+    env = dict(os.environ)
+    env.update({
+        "TOKEN": "bench",
+        "METAIS_API_URL": f"{base}/report/reports/run?lang=sk",
+        "METAIS_TYPES_URL": f"{base}/types-repo/citypes/list",
+        "METAIS_REL_URL": f"{base}/types-repo/relationshiptypes/list",
+        "METAIS_CACHE_MODE": "off",       # measure the API path, not the response cache
+        "METAIS_RAW_CMD": "", "METAIS_REL_CMD": "",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    return env
+
+def stage_cmds(args) -> Dict[str, List[str]]:
+    py = sys.executable
+    rel = [py, os.path.join(PY, "raw_relations.py"), "all", "-j", str(args.jobs)]
+    if args.bulk:
+        rel += ["--bulk", str(args.bulk)]
+    return {
+        "raw_reports": [py, os.path.join(PY, "raw_reports.py"), "-j", str(args.jobs)],
+        "raw_relations": rel,
+        "unique_attributes": [py, os.path.join(PY, "unique_attributes.py"), "KS", "AS_sluzi_KS,AS"],
+        "egov": [py, os.path.join(PY, "project_eGov_components.py"), "--format", args.format],
+    }
+
+
+# ------------------------------ Measuring ------------------------------
+def run_stage(name: str, cmd: List[str], cwd: str, env: Dict[str, str]) -> Dict[str, Any]:
+    log_path = os.path.join(BENCH_DIR, "logs", f"{name}.log")
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    with open(log_path, "w", encoding="utf-8") as log:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        _, status, ru = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - t0
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    res: Dict[str, Any] = {
+        "wall": round(wall, 3),
+        "user": round(ru.ru_utime, 3),
+        "sys": round(ru.ru_stime, 3),
+        "maxrss_mb": round(ru.ru_maxrss / 1024, 1),  # Linux: KiB
+        "rc": proc.returncode,
+    }
+    if name == "egov":
+        res["detail"] = egov_detail(log_path)
+    return res
+
+def egov_detail(log_path: str) -> Dict[str, float]:
+    # the timings project_eGov_components.py prints itself
+    detail: Dict[str, float] = {}
+    in_rules = False
+    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip()
+            m = _LOADED_RE.match(line)
+            if m:
+                detail["load"] = float(m.group(1))
+            m = _REPORT_RE.match(line)
+            if m:
+                detail["report"] = float(m.group(1))
+            if line.startswith("Rule "):
+                in_rules = True
+                continue
+            if in_rules:
+                m = _RULE_RE.match(line)
+                if m:
+                    detail[f"rule:{m.group(1)}"] = float(m.group(2))
+                else:
+                    in_rules = False
+    return detail
+
+def best_of(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # fastest repetition (least disturbed by noise); rc is the worst one
+    best = dict(min(runs, key=lambda r: r["wall"]))
+    best["rc"] = max((r["rc"] for r in runs), key=abs)
+    if len(runs) > 1:
+        best["runs"] = [r["wall"] for r in runs]
+    return best
+
+
+# ------------------------------ Results ------------------------------
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True,
+                              capture_output=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def previous_run(config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    prev = None
+    if os.path.exists(RESULTS):
+        with open(RESULTS, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if rec.get("config") == config:
+                    prev = rec
+    return prev
+
+def report(stages: Dict[str, Any], prev: Optional[Dict[str, Any]], threshold: float) -> List[str]:
+    # prints the table, returns the regressed stage names
+    regressed = []
+    prev_stages = (prev or {}).get("stages", {})
+    print(f"\n{'Stage':20} {'Wall [s]':>9} {'User [s]':>9} {'RSS [MB]':>9} {'rc':>3}  {'vs last':>8}")
+    for name, r in stages.items():
+        cmp = ""
+        p = prev_stages.get(name)
+        if p and p.get("wall"):
+            delta = r["wall"] / p["wall"] - 1
+            cmp = f"{delta:+.0%}"
+            if delta > threshold and r["wall"] - p["wall"] > 0.05:
+                cmp += "  REGRESSION"
+                regressed.append(name)
+        print(f"{name:20} {r['wall']:9.2f} {r['user']:9.2f} {r['maxrss_mb']:9.1f} {r['rc']:3}  {cmp:>8}")
+    if prev:
+        print(f"(compared with {prev.get('at')} @ {prev.get('commit') or '?'})")
+    return regressed
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the scripts end to end against a local mock MetaIS API.")
+    ap.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated stages (default: {','.join(STAGES)}).")
+    ap.add_argument("--nodes", type=int, default=2000, help="Nodes per type in the mock (default 2000).")
+    ap.add_argument("--density", type=float, default=1.5, help="Outers per central node in each relation (default 1.5).")
+    ap.add_argument("--attrs", type=int, default=10, help="Filler attributes per node (default 10).")
+    ap.add_argument("--latency", type=float, default=0.0, help="Mock latency per request in ms.")
+    ap.add_argument("--ms-per-1k", type=float, default=0.0, help="Mock server time per 1000 rows in ms.")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of mock requests that fail with 503.")
+    ap.add_argument("-j", "--jobs", type=int, default=4, help="--jobs for the extraction stages (default 4).")
+    ap.add_argument("--bulk", type=int, default=0, help="raw_relations.py --bulk N (default 0 = off).")
+    ap.add_argument("--format", default="xlsx", help="project_eGov_components.py --format (default xlsx).")
+    ap.add_argument("--repeat", type=int, default=1, help="Run each stage N times and keep the fastest.")
+    ap.add_argument("--label", default="", help="Free-form note stored with the results.")
+    ap.add_argument("--threshold", type=float, default=0.2, help="Slowdown vs the last run that counts as regression (default 0.2).")
+    ap.add_argument("--check", action="store_true", help="Exit 1 if a stage regressed or failed.")
+    ap.add_argument("--no-record", action="store_true", help="Don't append to output/bench/results.jsonl.")
+    args = ap.parse_args(argv)
+
+    picked = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in picked if s not in STAGES]
+    if unknown:
+        ap.error(f"unknown stage(s): {', '.join(unknown)} (expected {', '.join(STAGES)})")
+    stages = [s for s in STAGES if s in picked]  # extraction first, analysis on its output
+
+    config = {k: getattr(args, k) for k in ("nodes", "density", "attrs", "latency", "ms_per_1k",
+                                            "fail_rate", "jobs", "bulk", "format")}
+    workdir = os.path.join(BENCH_DIR, "work")
+    make_workdir(workdir, {k: config[k] for k in ("nodes", "density", "attrs")})
+    port = free_port()
+    mock = start_mock(args, port)
+    env = bench_env(port)
+    cmds = stage_cmds(args)
+    results: Dict[str, Any] = {}
+    try:
+        # analysis stages need dumps; fetch them first (not measured) if no run left any
+        for name, kind in (("raw_reports", "nodes"), ("raw_relations", "relations")):
+            if name not in stages and not has_dumps(workdir, kind):
+                print(f"[INFO] Preparing {kind} with {name} (not measured) ...", flush=True)
+                run_stage(name, cmds[name], workdir, env)
+        for name in stages:
+            runs = []
+            for i in range(args.repeat):
+                print(f"[INFO] {name} ({i + 1}/{args.repeat}) ...", flush=True)
+                runs.append(run_stage(name, cmds[name], workdir, env))
+            results[name] = best_of(runs)
+            if results[name]["rc"]:
+                print(f"[ERROR] {name} exited with {results[name]['rc']}, see {BENCH_DIR}/logs/{name}.log",
+                      file=sys.stderr)
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    prev = previous_run(config)
+    regressed = report(results, prev, args.threshold)
+    if not args.no_record:
+        rec = {"at": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": git_commit(),
+               "label": args.label, "config": config, "stages": results}
+        with open(RESULTS, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        print(f"Wrote: {RESULTS}")
+
+    failed = [n for n, r in results.items() if r["rc"]]
+    return 1 if args.check and (regressed or failed) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# convert.py — TABLE report JSON (output/KS.json) -> CSV or Parquet
+#
+# Replaces the jq program of run/convert.sh: result.headers / result.rows are streamed
+# (jsonstream.py), so a big TABLE never sits in memory as a whole. The CSV is byte-for-byte
+# what convert.sh wrote:
+#   - ';' delimiter (--delim), "\n" line ends, UTF-8 BOM (for Excel)
+#   - a cell is quoted only if it contains the delimiter, a quote, \n or \r; quotes doubled
+#   - non-string cells as jq tostring prints them: null, true, 12, 1.5, {"a":1} (compact JSON)
+#     (except integers beyond 2^53, which jq rounded through a double; they are kept exact)
+# Parquet (.parquet output or --format parquet) needs pyarrow; every column is a string
+# column with the same cell text, nulls stay null.
+# RAW dumps (no result.headers) are skipped with a NOTE; flatten_nodes.py turns node dumps
+# into wide tables.
+#
+# Usage:
+#   python3 py/convert.py output/KS.json output/KS.csv
+#   python3 py/convert.py output/KS.json output/KS.parquet
+#   python3 py/convert.py output/ -j 8 [--format parquet] [--force] [-r]   (every TABLE .json in the dir)
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+import metrics
+from jsonstream import iter_relation_rows, read_headers
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+FORMATS = ("csv", "parquet")
+DELIM = ";"
+JOBS = int(os.getenv("METAIS_CONVERT_JOBS", str(os.cpu_count() or 1)))
+BOM = "\ufeff"
+PARQUET_BATCH = 50000  # rows per Parquet row group
+SKIP_DIRS = {"cache", "manifests", "bench"}  # never converted by a directory walk
+
+
+class NotTable(ValueError):
+    pass
+
+
+# ------------------------------ Cells ------------------------------
+def tostring(v: Any) -> Optional[str]:
+    # jq tostring, None for null (Parquet keeps it as null, CSV writes "null")
+    if isinstance(v, str):
+        return v
+    if v is None:
+        return None
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    if isinstance(v, int):
+        return str(v)
+    if isinstance(v, float):
+        return str(int(v)) if v.is_integer() and abs(v) < 1e17 else repr(v)
+    return json.dumps(v, ensure_ascii=False, separators=(",", ":"))
+
+def make_quoter(delim: str = DELIM):
+    needs_quotes = re.compile("[" + re.escape(delim) + '\n\r"]')
+
+    def q(v: Any) -> str:
+        s = tostring(v)
+        if s is None:
+            return "null"
+        if needs_quotes.search(s):
+            return '"' + s.replace('"', '""') + '"'
+        return s
+    return q
+
+
+# ------------------------------ Reading ------------------------------
+def table_headers(path: str) -> List[str]:
+    try:
+        headers = read_headers(path)
+    except (KeyError, ValueError):
+        raise NotTable(path)
+    if not isinstance(headers, list):
+        raise NotTable(path)
+    return [h.get("name") if isinstance(h, dict) else h for h in headers]
+
+def iter_cells(path: str) -> Iterator[List[Any]]:
+    for row in iter_relation_rows(path):
+        yield (row.get("values") or []) if isinstance(row, dict) else []
+
+
+# ------------------------------ Writers ------------------------------
+def write_csv(path: str, out_path: str, delim: str = DELIM) -> int:
+    # -> rows written
+    headers = table_headers(path)
+    q = make_quoter(delim)
+    out_dir = os.path.dirname(out_path) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=".tmp_", suffix=".csv")
+    n = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+            f.write(BOM + delim.join(map(q, headers)) + "\n")
+            for vals in iter_cells(path):
+                f.write(delim.join(map(q, vals)) + "\n")
+                n += 1
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return n
+
+def unique_names(names: List[Any]) -> List[str]:
+    # Parquet column names must be unique strings
+    seen: dict = {}
+    out = []
+    for name in names:
+        name = "" if name is None else str(name)
+        k = seen.get(name, 0)
+        seen[name] = k + 1
+        out.append(name if not k else f"{name}_{k + 1}")
+    return out
+
+def write_parquet(path: str, out_path: str) -> int:
+    if pa is None:
+        raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+    headers = unique_names(table_headers(path))
+    schema = pa.schema([pa.field(h, pa.string()) for h in headers])
+    width = len(headers)
+    out_dir = os.path.dirname(out_path) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=".tmp_", suffix=".parquet")
+    os.close(fd)
+    n = 0
+    try:
+        with pq.ParquetWriter(tmp, schema, compression="zstd") as w:
+            cols: List[List[Optional[str]]] = [[] for _ in range(width)]
+            for vals in iter_cells(path):
+                for i in range(width):
+                    cols[i].append(tostring(vals[i]) if i < len(vals) else None)
+                n += 1
+                if n % PARQUET_BATCH == 0:
+                    w.write_table(pa.Table.from_arrays([pa.array(c, pa.string()) for c in cols], schema=schema))
+                    cols = [[] for _ in range(width)]
+            if n % PARQUET_BATCH or n == 0:
+                w.write_table(pa.Table.from_arrays([pa.array(c, pa.string()) for c in cols], schema=schema))
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return n
+
+def convert(path: str, out_path: str, fmt: str = "csv", delim: str = DELIM) -> int:
+    table_headers(path)  # NotTable before any span is recorded
+    with metrics.span("convert", item=os.path.splitext(os.path.basename(path))[0], format=fmt) as m:
+        m["rows"] = write_parquet(path, out_path) if fmt == "parquet" else write_csv(path, out_path, delim)
+        m["bytes"] = os.path.getsize(out_path)
+    return m["rows"]
+
+
+# ------------------------------ Directories ------------------------------
+def find_inputs(root: str, recursive: bool = False) -> List[str]:
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if recursive and not d.startswith(".") and d not in SKIP_DIRS)
+        found += [os.path.join(dirpath, f) for f in sorted(filenames) if f.endswith(".json") and not f.startswith(".")]
+    return found
+
+def _job(args: Tuple[str, str, str, str]) -> Tuple[str, str, Optional[int], str]:
+    # -> (input, output, rows or None if skipped, error text)
+    path, out_path, fmt, delim = args
+    try:
+        return path, out_path, convert(path, out_path, fmt, delim), ""
+    except NotTable:
+        return path, out_path, None, ""
+    except (OSError, ValueError, RuntimeError) as e:
+        return path, out_path, None, str(e) or type(e).__name__
+
+def run_pool(fn: Callable[[Any], Any], tasks: List[Any], jobs: int = JOBS) -> Iterator[Any]:
+    # Yields fn(task) for every task as they finish; in this process when there is nothing to parallelise.
+    if jobs <= 1 or len(tasks) <= 1:
+        yield from map(fn, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+        for fut in as_completed([pool.submit(fn, t) for t in tasks]):
+            yield fut.result()
+
+def convert_many(paths: List[str], fmt: str = "csv", delim: str = DELIM, jobs: int = JOBS,
+                 outdir: str = "", force: bool = False) -> Tuple[int, int, int]:
+    # -> (converted, skipped, failed); outputs next to the inputs unless outdir is given
+    tasks = []
+    skipped = 0
+    for p in paths:
+        out = os.path.join(outdir or os.path.dirname(p), os.path.splitext(os.path.basename(p))[0] + "." + fmt)
+        if not force and os.path.exists(out) and os.path.getmtime(out) >= os.path.getmtime(p):
+            skipped += 1  # up to date
+            continue
+        tasks.append((p, out, fmt, delim))
+
+    done = failed = 0
+    for path, out, rows, err in run_pool(_job, tasks, jobs):
+        if err:
+            failed += 1
+            print(f"[ERROR] {path}: {err}", file=sys.stderr)
+        elif rows is None:
+            skipped += 1  # not a TABLE
+        else:
+            done += 1
+            print(f"Wrote: {out} ({rows} rows)", flush=True)
+    return done, skipped, failed
+
+
+# ------------------------------ CLI ------------------------------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Convert MetaIS TABLE report JSON to CSV (';', UTF-8 BOM) or Parquet.")
+    ap.add_argument("input", help="TABLE JSON file, or a directory of them")
+    ap.add_argument("output", nargs="?", help="Output file (default: input with .csv / .parquet)")
+    ap.add_argument("--format", choices=FORMATS, help="Output format (default: from the output extension, else csv)")
+    ap.add_argument("--delim", default=DELIM, help=f"CSV delimiter (default: '{DELIM}')")
+    ap.add_argument("-j", "--jobs", type=int, default=JOBS,
+                    help=f"Files converted in parallel in directory mode (default: {JOBS}, env METAIS_CONVERT_JOBS)")
+    ap.add_argument("-d", "--outdir", default="", help="Directory mode: write outputs here instead of next to the inputs")
+    ap.add_argument("-r", "--recursive", action="store_true",
+                    help=f"Directory mode: also convert subdirectories (except {', '.join(sorted(SKIP_DIRS))})")
+    ap.add_argument("--force", action="store_true", help="Directory mode: also convert files whose output is up to date")
+    metrics.add_metrics_arg(ap)
+    args = ap.parse_args(argv)
+    metrics.apply_args(args)
+
+    fmt = args.format or ("parquet" if (args.output or "").endswith(".parquet") else "csv")
+    if fmt == "parquet" and pa is None:
+        print("[ERROR] Parquet output needs pyarrow (pip install pyarrow)", file=sys.stderr)
+        return 1
+
+    if os.path.isdir(args.input):
+        if args.output:
+            ap.error("directory mode writes next to the inputs; use --outdir DIR instead of OUTPUT")
+        paths = find_inputs(args.input, args.recursive)
+        done, skipped, failed = convert_many(paths, fmt, args.delim, args.jobs, args.outdir, args.force)
+        print(f"[INFO] Converted {done}, skipped {skipped} (not TABLE or up to date), failed {failed}.")
+        return 1 if failed else 0
+
+    out = args.output or os.path.splitext(args.input)[0] + "." + fmt
+    try:
+        convert(args.input, out, fmt, args.delim)
+    except NotTable:
+        print(f"NOTE: Output is not TABLE; skipping {fmt.upper()} for {args.input}. "
+              "(Node dumps: python3 py/flatten_nodes.py)", file=sys.stderr)
+        return 0
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"[ERROR] {args.input}: {e}", file=sys.stderr)
+        return 1
+    print(f"Wrote: {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# duplicates.py — duplicate MetaIS codes / names over the node dumps in output/nodes
+#
+# Local counterpart of groovy/advanced/metais_uniqueness.groovy (codes) and
+# name_uniqueness.groovy (names): those fetch every node of each selected type and bucket
+# them in one Groovy loop on the server, which times out on large selections. Here each
+# dump is streamed by its own process, which emits (bucket key, uuid, name, code); the
+# buckets are merged in type order, so the output is the same as the reports':
+#   codes  key = trimmed, lower-cased Gen_Profil_kod_metais
+#          MetaIS kód | Názov | Typ | Asociovaná povinná osoba | Kód MetaIS (PO) | Duplicitné záznamy
+#   names  key = trimmed, lower-cased Gen_Profil_nazov
+#          Názov | Typ | Kod MetaIS | Asociovaná povinná osoba
+# --group-by-type    duplicates only within the same type (groupByType)
+# --ignore-trivial   codes: rows of a group with the same PO set are collapsed into the first,
+#                    the number of collapsed rows goes to "Duplicitné záznamy" (ignoreTrivialMatches)
+# --near             names: also near-duplicates. Names are folded like foldSk in
+#                    project_eGov_components3.groovy (lower case, Slovak/Czech diacritics ->
+#                    ASCII), cut into character 3-grams and MinHashed in the scanning processes;
+#                    LSH bands give the candidate pairs, which are kept when the 3-gram Jaccard
+#                    similarity is >= --similarity. Rows whose name differs from the group's
+#                    first name show their own name.
+# The PO columns come from output/relations/PO_je_gestor_KS.json (KS), PO_je_spravca_ISVS,
+# PO_je_spravca_AS and PO_asociuje_Projekt, with the PO names / codes read through the uuid
+# index of output/nodes/PO_raw.json (uuid_index.py); if those are missing the cells stay empty.
+#
+# Usage:
+#   python3 py/duplicates.py codes                    (KS AS ZS ISVS Projekt -> output/duplicates/codes.csv)
+#   python3 py/duplicates.py codes KS AS ZS --ignore-trivial
+#   python3 py/duplicates.py names --group-by-type -j 4
+#   python3 py/duplicates.py names --near --similarity 0.7
+import argparse
+import hashlib
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+import convert
+import metrics
+import uuid_index
+from jsonstream import iter_relation_rows, iter_result_items
+from unique_attributes import flatten_attrs
+
+DIR_NODES = "output/nodes"
+DIR_RELATIONS = "output/relations"
+DIR_OUT = "output/duplicates"
+JOBS = int(os.getenv("METAIS_DUP_JOBS", str(os.cpu_count() or 1)))
+TYPES = ["KS", "AS", "ZS", "ISVS", "Projekt", "PO"]   # order of the rows in the Groovy reports
+DEFAULT_TYPES = ["KS", "AS", "ZS", "ISVS", "Projekt"]
+PO_RELATIONS = {                                      # type -> relation with PO as the outer node
+    "KS": "PO_je_gestor_KS",
+    "ISVS": "PO_je_spravca_ISVS",
+    "Projekt": "PO_asociuje_Projekt",
+    "AS": "PO_je_spravca_AS",
+}
+NUM_PERM = 64        # MinHash permutations
+BANDS = 16           # LSH bands of NUM_PERM // BANDS rows (candidates from ~50% similarity)
+SIMILARITY = 0.8     # --near: 3-gram Jaccard similarity a candidate pair must reach
+
+COLUMNS = {
+    "codes": ["MetaIS kód", "Názov", "Typ", "Asociovaná povinná osoba", "Kód MetaIS (PO)", "Duplicitné záznamy"],
+    "names": ["Názov", "Typ", "Kod MetaIS", "Asociovaná povinná osoba"],
+}
+EMPTY_TEXT = {
+    "codes": "(Žiadne problematické duplicitné kódy po odfiltrovaní triviálnych zhod)",
+    "names": "(Žiadne duplicitné názvy v zvolenom rozsahu)",
+}
+
+Rec = Tuple[str, str, str, str]  # (type, uuid, name, code)
+
+
+# ------------------------------ Normalization ------------------------------
+def normalize(v: Any) -> str:
+    return "" if v is None else str(v).strip().lower()
+
+# foldSk() of project_eGov_components3.groovy
+_FOLD = str.maketrans({c: a for chars, a in [
+    ("áäâàãåā", "a"), ("čćĉċ", "c"), ("ďđ", "d"), ("éěêèëē", "e"), ("íîìïī", "i"), ("ĺľ", "l"),
+    ("ňñń", "n"), ("óôòõöō", "o"), ("ŕř", "r"), ("šśŝș", "s"), ("ťț", "t"), ("úůûùüū", "u"),
+    ("ýŷÿ", "y"), ("žźż", "z")] for c in chars})
+_SPACES = re.compile(r"\s+")
+
+def fold_sk(s: Any) -> str:
+    return _SPACES.sub(" ", normalize(s).translate(_FOLD))
+
+def shingles(folded: str, k: int = 3) -> Set[str]:
+    s = f" {folded} "
+    return {s[i:i + k] for i in range(len(s) - k + 1)} or {s}
+
+
+# ------------------------------ MinHash / LSH ------------------------------
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240101)  # fixed: every process must use the same permutations
+_PERM_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.int64)
+_PERM_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.int64)
+
+def _hash31(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") % _PRIME
+
+def band_keys(folded: str, bands: int = BANDS) -> List[int]:
+    # MinHash signature of the name's 3-grams, one hash per LSH band
+    x = np.fromiter((_hash31(g) for g in shingles(folded)), dtype=np.int64)
+    sig = ((np.outer(x, _PERM_A) + _PERM_B) % _PRIME).min(axis=0)
+    rows = NUM_PERM // bands
+    return [int.from_bytes(hashlib.blake2b(sig[b * rows:(b + 1) * rows].tobytes(), digest_size=8).digest(), "big")
+            for b in range(bands)]
+
+
+# ------------------------------ Pass 1: scan (one process per type) ------------------------------
+def scan(type_name: str, path: str, mode: str, near: bool) -> Tuple[List[Rec], Dict[str, List[int]]]:
+    # -> (records with a non-empty key in dump order, folded name -> LSH band keys if near)
+    recs: List[Rec] = []
+    bands: Dict[str, List[int]] = {}
+    with metrics.span("parse", item=type_name, bytes=os.path.getsize(path)) as m:
+        for node in iter_result_items(path):
+            u = node.get("uuid") if isinstance(node, dict) else None
+            if not u:
+                continue
+            attrs = flatten_attrs(node.get("attributes", []))
+            name, code = attrs.get("Gen_Profil_nazov"), attrs.get("Gen_Profil_kod_metais")
+            name = "" if name is None else str(name)
+            code = "" if code is None else str(code)
+            if not normalize(code if mode == "codes" else name):
+                continue
+            recs.append((type_name, u, name, code))
+            if near:
+                f = fold_sk(name)
+                if f not in bands:
+                    bands[f] = band_keys(f)
+        m["rows"] = len(recs)
+    return recs, bands
+
+def _job(args) -> Tuple[str, Optional[Tuple[List[Rec], Dict[str, List[int]]]], str]:
+    type_name, path, mode, near = args
+    try:
+        return type_name, scan(type_name, path, mode, near), ""
+    except (OSError, ValueError) as e:
+        return type_name, None, str(e) or type(e).__name__
+
+
+# ------------------------------ Pass 2: buckets ------------------------------
+class _Union:
+    def __init__(self):
+        self.parent: Dict[Any, Any] = {}
+
+    def find(self, x: Any) -> Any:
+        root = x
+        while self.parent.setdefault(root, root) != root:
+            root = self.parent[root]
+        while x != root:  # path compression
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, a: Any, b: Any) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[rb] = ra
+
+def exact_key(rec: Rec, mode: str, by_type: bool, near: bool = False) -> Any:
+    t, _, name, code = rec
+    k = normalize(code) if mode == "codes" else (fold_sk(name) if near else normalize(name))
+    return (t, k) if by_type else k
+
+def near_pairs(bands: Dict[Any, List[int]], similarity: float) -> Iterable[Tuple[Any, Any]]:
+    # bands: cluster key ((type,) folded name) -> band keys; yields the similar pairs
+    buckets: Dict[Tuple[Any, int, int], List[Any]] = {}
+    for key, keys in bands.items():
+        scope = key[0] if isinstance(key, tuple) else None  # --group-by-type: LSH within a type
+        for b, h in enumerate(keys):
+            buckets.setdefault((scope, b, h), []).append(key)
+    grams: Dict[str, Set[str]] = {}
+    seen: Set[Tuple[Any, Any]] = set()
+    for members in buckets.values():
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                a, b = members[i], members[j]
+                if (a, b) in seen:
+                    continue
+                seen.add((a, b))
+                fa, fb = (a[1], b[1]) if isinstance(a, tuple) else (a, b)
+                ga = grams.get(fa) or grams.setdefault(fa, shingles(fa))
+                gb = grams.get(fb) or grams.setdefault(fb, shingles(fb))
+                if len(ga & gb) >= similarity * len(ga | gb):
+                    yield a, b
+
+def find_groups(recs: List[Rec], mode: str, by_type: bool, near: bool = False,
+                bands: Optional[Dict[str, List[int]]] = None, similarity: float = SIMILARITY) -> List[List[Rec]]:
+    # Buckets with more than one record, each in record order; buckets in order of first record
+    buckets: Dict[Any, List[int]] = {}
+    for i, rec in enumerate(recs):
+        buckets.setdefault(exact_key(rec, mode, by_type, near), []).append(i)
+    if near:
+        uf = _Union()
+        keyed = {k: (bands or {})[k[1] if by_type else k] for k in buckets}
+        for a, b in near_pairs(keyed, similarity):
+            uf.union(a, b)
+        merged: Dict[Any, List[int]] = {}
+        for k, idx in buckets.items():
+            merged.setdefault(uf.find(k), []).extend(idx)
+        buckets = {k: sorted(idx) for k, idx in sorted(merged.items(), key=lambda kv: min(kv[1]))}
+    return [[recs[i] for i in idx] for idx in buckets.values() if len(idx) > 1]
+
+
+# ------------------------------ PO association ------------------------------
+class POLookup:
+    # type + uuid -> POs (uuid, name, code) from the PO relation tables, in table order
+    def __init__(self, types: Iterable[str], dir_nodes: str = DIR_NODES, dir_relations: str = DIR_RELATIONS):
+        self.po_of: Dict[str, Dict[str, List[str]]] = {}
+        for t in types:
+            rel = PO_RELATIONS.get(t)
+            if rel is None:
+                continue
+            path = os.path.join(dir_relations, f"{rel}.json")
+            if not os.path.exists(path):
+                print(f"[WARN] {path} not found: PO columns of {t} stay empty", file=sys.stderr)
+                continue
+            m: Dict[str, List[str]] = {}
+            for row in iter_relation_rows(path):
+                vals = row.get("values", []) if isinstance(row, dict) else []
+                if len(vals) >= 2 and vals[0] and vals[1] and vals[1] not in m.setdefault(vals[0], []):
+                    m[vals[0]].append(vals[1])
+            self.po_of[t] = m
+        self.dump = os.path.join(dir_nodes, "PO_raw.json")
+        self.nodes: Dict[str, Tuple[str, str]] = {}
+
+    def load(self, recs: Iterable[Rec]) -> None:
+        # names / codes of the POs of these records (only the rows that are printed)
+        wanted = {p for t, u, _, _ in recs for p in self.po_of.get(t, {}).get(u, [])}
+        if not wanted:
+            return
+        if not os.path.exists(self.dump):
+            print(f"[WARN] {self.dump} not found: PO names / codes stay empty", file=sys.stderr)
+            return
+        for node in uuid_index.open_index(self.dump).get_many(wanted):
+            attrs = flatten_attrs(node.get("attributes", []))
+            self.nodes[node["uuid"]] = (attrs.get("Gen_Profil_nazov") or "", attrs.get("Gen_Profil_kod_metais") or "")
+
+    def uuids(self, t: str, u: str) -> List[str]:
+        return self.po_of.get(t, {}).get(u, [])
+
+    def names(self, t: str, u: str) -> str:
+        return "; ".join(n for n in (self.nodes.get(p, ("", ""))[0] for p in self.uuids(t, u)) if n)
+
+    def codes(self, t: str, u: str) -> str:
+        return "; ".join(c for c in (self.nodes.get(p, ("", ""))[1] for p in self.uuids(t, u)) if c)
+
+
+# ------------------------------ Rows ------------------------------
+def build_rows(groups: List[List[Rec]], mode: str, po: POLookup, ignore_trivial: bool = False,
+               near: bool = False) -> List[List[str]]:
+    if not groups:
+        return [[EMPTY_TEXT[mode]] + [""] * (len(COLUMNS[mode]) - 1)]
+    field = 3 if mode == "codes" else 2  # the bucketed column
+    display = [next((r[field] for r in g if r[field].strip()), "<bez kódu>" if mode == "codes" else "<bez názvu>")
+               for g in groups]
+    counts = [len(g) for g in groups]
+    items: List[List[Tuple[Rec, int]]] = []
+    for g in groups:
+        if mode == "codes" and ignore_trivial:
+            parts: Dict[str, List[Rec]] = {}
+            for rec in g:
+                parts.setdefault(";".join(sorted(po.uuids(rec[0], rec[1]))), []).append(rec)
+            items.append([(lst[0], len(lst) - 1) for lst in parts.values()])
+        else:
+            items.append([(rec, 0) for rec in g])
+    po.load(rec for its in items for rec, _ in its)
+
+    order = sorted(range(len(groups)), key=lambda i: (-counts[i], display[i].lower(), items[i][0][0][0]))
+    rows: List[List[str]] = []
+    for i in order:
+        other = 2 if mode == "codes" else 3  # secondary sort: name (codes) / code (names)
+        first = True
+        for (t, u, name, code), collapsed in sorted(items[i], key=lambda x: (x[0][0], x[0][other])):
+            if mode == "codes":
+                rows.append([display[i] if first else "", name, t, po.names(t, u), po.codes(t, u),
+                             str(collapsed) if collapsed > 0 else ""])
+            else:
+                if first:
+                    cell = display[i]
+                else:
+                    cell = name if near and fold_sk(name) != fold_sk(display[i]) else ""
+                rows.append([cell, t, code, po.names(t, u)])
+            first = False
+    return rows
+
+def write_csv(out_path: str, columns: List[str], rows: List[List[str]]) -> None:
+    # ';' + UTF-8 BOM like convert.py, written to a temp file and renamed into place
+    out_dir = os.path.dirname(out_path) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    q = convert.make_quoter(convert.DELIM)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=".tmp_", suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(convert.BOM + convert.DELIM.join(q(c) for c in columns) + "\n")
+            for row in rows:
+                f.write(convert.DELIM.join(q(c) for c in row) + "\n")
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# ------------------------------ CLI ------------------------------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Find duplicate MetaIS codes / names across the node dumps "
+                                             "(local version of metais_uniqueness.groovy / name_uniqueness.groovy).")
+    ap.add_argument("mode", choices=sorted(COLUMNS), help="codes: Gen_Profil_kod_metais, names: Gen_Profil_nazov")
+    ap.add_argument("types", nargs="*", help=f"Node types (default: {' '.join(DEFAULT_TYPES)})")
+    ap.add_argument("--group-by-type", action="store_true", help="Duplicates only within the same type")
+    ap.add_argument("--ignore-trivial", action="store_true",
+                    help="codes: collapse the rows of a group that have the same PO")
+    ap.add_argument("--near", action="store_true", help="names: also near-duplicates (MinHash / LSH over folded names)")
+    ap.add_argument("--similarity", type=float, default=SIMILARITY,
+                    help=f"--near: 3-gram Jaccard similarity of a near-duplicate (default: {SIMILARITY})")
+    ap.add_argument("-o", "--output", default="", help=f"CSV file (default: {DIR_OUT}/<mode>.csv)")
+    ap.add_argument("-j", "--jobs", type=int, default=JOBS,
+                    help=f"Dumps scanned in parallel (default: {JOBS}, env METAIS_DUP_JOBS)")
+    metrics.add_metrics_arg(ap)
+    args = ap.parse_args(argv)
+    metrics.apply_args(args)
+    if args.ignore_trivial and args.mode != "codes":
+        ap.error("--ignore-trivial applies to codes")
+    if args.near and args.mode != "names":
+        ap.error("--near applies to names")
+
+    types = args.types or DEFAULT_TYPES
+    types = sorted(dict.fromkeys(types), key=lambda t: TYPES.index(t) if t in TYPES else len(TYPES))
+    tasks, failed = [], 0
+    for t in types:
+        path = os.path.join(DIR_NODES, f"{t}_raw.json")
+        if not os.path.exists(path):
+            print(f"[ERROR] Node dump not found: {path}", file=sys.stderr)
+            failed += 1
+            continue
+        tasks.append((t, path, args.mode, args.near))
+    if not tasks:
+        return 1
+
+    if args.jobs <= 1 or len(tasks) <= 1:
+        results = [_job(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(tasks))) as pool:
+            results = list(pool.map(_job, tasks))  # in type order: the merge must be deterministic
+    recs: List[Rec] = []
+    bands: Dict[str, List[int]] = {}
+    for type_name, res, err in results:
+        if err:
+            failed += 1
+            print(f"[ERROR] {type_name}: {err}", file=sys.stderr)
+            continue
+        recs += res[0]
+        bands.update(res[1])
+        print(f"[INFO] {type_name}: {len(res[0])} nodes with a {'code' if args.mode == 'codes' else 'name'}")
+
+    groups = find_groups(recs, args.mode, args.group_by_type, args.near, bands, args.similarity)
+    rows = build_rows(groups, args.mode, POLookup(types), args.ignore_trivial, args.near)
+    out = args.output or os.path.join(DIR_OUT, f"{args.mode}{'_near' if args.near else ''}.csv")
+    write_csv(out, COLUMNS[args.mode], rows)
+    print(f"Wrote: {out} ({len(groups)} duplicate groups, {sum(len(g) for g in groups)} nodes)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# egov_graph.py — compact in-memory graph of MetaIS nodes and relations
+#
+# Every uuid is interned once to a dense integer id (0, 1, 2, ...). After that:
+#   - each relation is two CSR adjacency arrays (central -> outer and outer -> central),
+#     so "all outers of X" is a numpy slice instead of a dict-of-sets lookup
+#   - node attributes live in per-type columns: graph.nodes["KS"].cols["Gen_Profil_nazov"][row]
+#   - type_of / row_of map an id to its node type and its row in that type's columns
+# Only the uuid -> id dict holds strings; everything else is ints.
+#
+# load_graph reads a node type / relation from the SQLite store (store.py ingest) when the
+# store holds that dump as it is now, and streams the JSON dump otherwise.
+#
+# Usage:
+#   g = load_graph(["KS", "AS"], ["AS_sluzi_KS"], attrs=["Gen_Profil_nazov"])
+#   ks = g.id_of(uuid)
+#   for as_id in g.rel("AS_sluzi_KS").outer(ks): print(g.attr("AS", as_id, "Gen_Profil_nazov"))
+import os
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import metrics
+import store
+from jsonstream import iter_relation_rows, iter_result_items
+from unique_attributes import flatten_attrs
+
+DIR_NODES = "output/nodes"
+DIR_RELATIONS = "output/relations"
+
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+# ------------------------------ Relations (CSR) ------------------------------
+class Relation:
+    # One relation table as CSR in both directions.
+    #   fwd_ptr/fwd_idx: outers of central c = fwd_idx[fwd_ptr[c]:fwd_ptr[c+1]]
+    #   rev_ptr/rev_idx: centrals of outer o = rev_idx[rev_ptr[o]:rev_ptr[o+1]]
+    # Duplicate rows are dropped, neighbours are sorted by id.
+    def __init__(self, name: str, central: np.ndarray, outer: np.ndarray, n_ids: int):
+        self.name = name
+        if len(central):
+            pairs = np.unique(np.stack([central, outer], axis=1), axis=0)
+            central, outer = pairs[:, 0], pairs[:, 1]
+        self.central_ids = central.astype(np.int32)
+        self.outer_ids = outer.astype(np.int32)
+        self.fwd_ptr, self.fwd_idx = _csr(self.central_ids, self.outer_ids, n_ids)
+        self.rev_ptr, self.rev_idx = _csr(self.outer_ids, self.central_ids, n_ids)
+
+    def __len__(self) -> int:
+        return len(self.central_ids)
+
+    def outer(self, central_id: int) -> np.ndarray:
+        return _row(self.fwd_ptr, self.fwd_idx, central_id)
+
+    def central(self, outer_id: int) -> np.ndarray:
+        return _row(self.rev_ptr, self.rev_idx, outer_id)
+
+    def out_degree(self, n: int) -> np.ndarray:
+        # number of outers for every id < n (ids interned after this relation was built get 0)
+        return _degrees(self.fwd_ptr, n)
+
+    def in_degree(self, n: int) -> np.ndarray:
+        return _degrees(self.rev_ptr, n)
+
+    def expand_outer(self, central_ids: np.ndarray):
+        # Vectorized "outer(c) for c in central_ids": returns (pos, outers) where pos[k] is the
+        # index into central_ids that outers[k] belongs to. Used for joins over whole arrays.
+        return _expand(self.fwd_ptr, self.fwd_idx, central_ids)
+
+    def expand_central(self, outer_ids: np.ndarray):
+        return _expand(self.rev_ptr, self.rev_idx, outer_ids)
+
+def _csr(src: np.ndarray, dst: np.ndarray, n: int):
+    order = np.argsort(src, kind="stable")
+    counts = np.bincount(src, minlength=n)
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=ptr[1:])
+    return ptr, dst[order].astype(np.int32)
+
+def _row(ptr: np.ndarray, idx: np.ndarray, i: int) -> np.ndarray:
+    if i < 0 or i + 1 >= len(ptr):
+        return _EMPTY
+    return idx[ptr[i]:ptr[i + 1]]
+
+def _expand(ptr: np.ndarray, idx: np.ndarray, ids: np.ndarray):
+    ids = np.asarray(ids, dtype=np.int64)
+    n = len(ptr) - 1
+    if n == 0 or not len(ids):
+        return np.empty(0, dtype=np.int64), _EMPTY
+    safe = np.where(ids < n, ids, 0)  # ids interned after the relation was built have no neighbours
+    starts = ptr[safe]
+    lens = np.where(ids < n, ptr[safe + 1] - starts, 0)
+    pos = np.repeat(np.arange(len(ids)), lens)
+    offs = np.arange(int(lens.sum())) - np.repeat(np.cumsum(lens) - lens, lens)
+    return pos, idx[np.repeat(starts, lens) + offs]
+
+def _degrees(ptr: np.ndarray, n: int) -> np.ndarray:
+    deg = np.zeros(n, dtype=np.int64)
+    m = min(n, len(ptr) - 1)
+    deg[:m] = np.diff(ptr[:m + 1])
+    return deg
+
+
+# ------------------------------ Node columns ------------------------------
+class NodeTable:
+    # Attributes of one node type, column-wise: ids[row] is the node id, cols[name][row] its value.
+    def __init__(self, type_name: str):
+        self.type_name = type_name
+        self.ids = array("i")
+        self.cols: Dict[str, List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def column(self, name: str) -> List[Any]:
+        return self.cols.get(name) or [None] * len(self.ids)
+
+
+# ------------------------------ Graph ------------------------------
+class Graph:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.uuids: List[str] = []
+        self.type_of = array("b")   # index into type_names, -1 = not in any loaded node dump
+        self.row_of = array("i")    # row in nodes[type], -1 = none
+        self.type_names: List[str] = []
+        self.nodes: Dict[str, NodeTable] = {}
+        self.rels: Dict[str, Relation] = {}
+
+    def __len__(self) -> int:
+        return len(self.uuids)
+
+    # ---- ids ----
+    def intern(self, uuid: str) -> int:
+        i = self.ids.get(uuid)
+        if i is None:
+            i = len(self.uuids)
+            self.ids[uuid] = i
+            self.uuids.append(uuid)
+            self.type_of.append(-1)
+            self.row_of.append(-1)
+        return i
+
+    def id_of(self, uuid: str) -> int:
+        return self.ids.get(uuid, -1)
+
+    def type_name(self, i: int) -> Optional[str]:
+        t = self.type_of[i]
+        return self.type_names[t] if t >= 0 else None
+
+    # ---- loading ----
+    def load_nodes(self, type_name: str, path: str, attrs: Optional[Iterable[str]] = None) -> int:
+        # attrs: only keep these attribute columns (None = all of them)
+        rows = ((o.get("uuid"), flatten_attrs(o.get("attributes", []))) for o in iter_result_items(path))
+        return self.add_nodes(type_name, rows, attrs)
+
+    def add_nodes(self, type_name: str, rows: Iterable[Tuple[str, Dict[str, Any]]],
+                  attrs: Optional[Iterable[str]] = None) -> int:
+        # rows: (uuid, {attribute: value}), from a dump (load_nodes) or from the store
+        keep = set(attrs) if attrs is not None else None
+        if type_name not in self.nodes:
+            self.type_names.append(type_name)
+            self.nodes[type_name] = NodeTable(type_name)
+        t = self.type_names.index(type_name)
+        table = self.nodes[type_name]
+        cols = table.cols
+
+        for u, values in rows:
+            if not u:
+                continue
+            i = self.intern(u)
+            if self.type_of[i] == t:
+                continue  # duplicate in the dump
+            row = len(table.ids)
+            table.ids.append(i)
+            self.type_of[i] = t
+            self.row_of[i] = row
+            for k, v in values.items():
+                if keep is not None and k not in keep:
+                    continue
+                col = cols.get(k)
+                if col is None:
+                    col = cols[k] = [None] * row
+                col.append(v)
+            for col in cols.values():  # pad attributes this node doesn't have
+                if len(col) <= row:
+                    col.append(None)
+        return len(table)
+
+    def load_relation(self, rel_name: str, path: str) -> int:
+        return self.add_relation(rel_name, (row.get("values", []) for row in iter_relation_rows(path)))
+
+    def add_relation(self, rel_name: str, pairs: Iterable[Sequence[Any]]) -> int:
+        # pairs: (central_uuid, outer_uuid, ...), from a relation TABLE (load_relation) or from the store
+        central, outer = array("i"), array("i")
+        for vals in pairs:
+            if len(vals) < 2 or not vals[0] or not vals[1]:
+                continue
+            central.append(self.intern(vals[0]))
+            outer.append(self.intern(vals[1]))
+        rel = Relation(rel_name, np.frombuffer(central, dtype=np.int32), np.frombuffer(outer, dtype=np.int32), len(self))
+        self.rels[rel_name] = rel
+        return len(rel)
+
+    # ---- lookups ----
+    def rel(self, rel_name: str) -> Relation:
+        return self.rels[rel_name]
+
+    def attr(self, type_name: str, i: int, name: str, default: Any = None) -> Any:
+        # attribute of node i, if i is a node of type_name and has it
+        if i < 0 or i >= len(self.uuids) or self.type_name(i) != type_name:
+            return default
+        col = self.nodes[type_name].cols.get(name)
+        if col is None:
+            return default
+        v = col[self.row_of[i]]
+        return default if v is None else v
+
+    def type_mask(self, type_name: str) -> np.ndarray:
+        # boolean array over all ids: True where the id is a node of type_name
+        if type_name not in self.nodes:
+            return np.zeros(len(self), dtype=bool)
+        return np.frombuffer(self.type_of, dtype=np.int8) == self.type_names.index(type_name)
+
+
+def load_graph(node_types: Iterable[str], rel_names: Iterable[str], attrs: Optional[Iterable[str]] = None,
+               dir_nodes: str = DIR_NODES, dir_relations: str = DIR_RELATIONS) -> Graph:
+    g = Graph()
+    attrs = list(attrs) if attrs is not None else None
+    conn = store.open_store()  # own connection: egov_service.py reloads in another thread
+    try:
+        for name in node_types:
+            path = os.path.join(dir_nodes, f"{name}_raw.json")
+            with metrics.span("parse", item=name, bytes=os.path.getsize(path)) as m:
+                if conn is not None and store.is_fresh(store.node_table(name), path, conn):
+                    cols = attrs if attrs is not None else [
+                        n for n in store.node_columns(name, conn) if not n.startswith(store.META_PREFIX)]
+                    m["store"] = True
+                    m["rows"] = g.add_nodes(name, store.load_nodes(name, cols, conn).items(), attrs)
+                else:
+                    m["rows"] = g.load_nodes(name, path, attrs)
+        for rel_name in rel_names:
+            path = os.path.join(dir_relations, f"{rel_name}.json")
+            with metrics.span("parse", item=rel_name, bytes=os.path.getsize(path)) as m:
+                if conn is not None and store.is_fresh(store.rel_table(rel_name), path, conn):
+                    m["store"] = True
+                    m["rows"] = g.add_relation(rel_name, store.load_relation(rel_name, conn))
+                else:
+                    m["rows"] = g.load_relation(rel_name, path)
+    finally:
+        if conn is not None:
+            conn.close()
+    return g
\ No newline at end of file
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# egov_report.py — output stage of project_eGov_components.py
+#
+# pandas.DataFrame(...).to_excel() per project means a full openpyxl workbook in memory
+# for each of thousands of projects, written one after another. Here rows go straight
+# to a streaming writer and the per-project files are spread over a process pool:
+#   xlsxwriter (constant_memory) if installed, else openpyxl (write_only)
+#
+# Formats (--format):
+#   xlsx    all.xlsx + by_project/<proj_uuid>.xlsx                (default, same as before)
+#   sheets  all.xlsx + by_project.xlsx with one sheet per project
+#   csv     all.csv  + by_project.zip with <proj_uuid>.csv inside  (';' separated, UTF-8 BOM for Excel)
+import csv
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+FORMATS = ("xlsx", "sheets", "csv")
+JOBS = int(os.getenv("METAIS_REPORT_JOBS", str(os.cpu_count() or 1)))
+CSV_DELIM = ";"
+PROJECTS_PER_TASK = 50  # max projects handed to one worker at a time (keeps pickling overhead low)
+
+Rows = List[List[str]]
+
+
+# ------------------------------ Writers ------------------------------
+def _safe_sheet_name(name: str, used: set) -> str:
+    # Excel: max 31 chars, no []:*?/\ and unique (case-insensitive)
+    base = "".join("_" if c in '[]:*?/\\' else c for c in name)[:31] or "Sheet"
+    cand, i = base, 1
+    while cand.lower() in used:
+        suffix = f"~{i}"
+        cand = base[:31 - len(suffix)] + suffix
+        i += 1
+    used.add(cand.lower())
+    return cand
+
+def write_xlsx_sheets(path: str, sheets: Sequence[Tuple[str, Rows]], cols: Sequence[str]) -> None:
+    # One workbook, one sheet per (name, rows); rows are streamed, never held as a DataFrame.
+    tmp = path + ".tmp"
+    used: set = set()
+    if xlsxwriter is not None:
+        wb = xlsxwriter.Workbook(tmp, {"constant_memory": True, "strings_to_numbers": False,
+                                       "strings_to_formulas": False, "strings_to_urls": False})
+        bold = wb.add_format({"bold": True})
+        for name, rows in sheets:
+            ws = wb.add_worksheet(_safe_sheet_name(name, used))
+            ws.write_row(0, 0, cols, bold)
+            for r, row in enumerate(rows, start=1):
+                ws.write_row(r, 0, row)
+        wb.close()
+    else:
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        for name, rows in sheets:
+            ws = wb.create_sheet(_safe_sheet_name(name, used))
+            ws.append(list(cols))
+            for row in rows:
+                ws.append(row)
+        wb.save(tmp)
+    os.replace(tmp, path)
+
+def write_xlsx(path: str, rows: Rows, cols: Sequence[str]) -> None:
+    write_xlsx_sheets(path, [("Sheet1", rows)], cols)
+
+def _csv_bytes(rows: Rows, cols: Sequence[str]) -> bytes:
+    buf = io.StringIO()
+    w = csv.writer(buf, delimiter=CSV_DELIM, lineterminator="\n")
+    w.writerow(cols)
+    w.writerows(rows)
+    return buf.getvalue().encode("utf-8-sig")
+
+def write_csv(path: str, rows: Rows, cols: Sequence[str]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_csv_bytes(rows, cols))
+    os.replace(tmp, path)
+
+
+# ------------------------------ Per-project ------------------------------
+def _write_xlsx_batch(args) -> int:
+    outdir, batch, cols = args
+    for proj_uuid, rows in batch:
+        write_xlsx(os.path.join(outdir, f"{proj_uuid}.xlsx"), rows, cols)
+    return len(batch)
+
+def _csv_batch(args) -> List[Tuple[str, bytes]]:
+    batch, cols = args
+    return [(f"{proj_uuid}.csv", _csv_bytes(rows, cols)) for proj_uuid, rows in batch]
+
+def _batches(items: List, size: int) -> List[List]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _pool_map(fn, tasks: List, jobs: int):
+    if jobs <= 1 or len(tasks) <= 1:
+        return [fn(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+        return list(pool.map(fn, tasks))
+
+def write_report(outdir: str, rows_all: Rows, rows_by_proj: Dict[str, Rows], cols: Sequence[str],
+                 fmt: str = "xlsx", jobs: int = JOBS) -> List[str]:
+    # Returns the written paths (the combined file first).
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown report format: {fmt} (expected one of {', '.join(FORMATS)})")
+    jobs = max(1, jobs)
+    os.makedirs(outdir, exist_ok=True)
+    projects = list(rows_by_proj.items())
+    written = []
+
+    if fmt == "csv":
+        path = os.path.join(outdir, "all.csv")
+        write_csv(path, rows_all, cols)
+        written.append(path)
+        bundle = os.path.join(outdir, "by_project.zip")
+        tmp = bundle + ".tmp"
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for part in _pool_map(_csv_batch, [(b, cols) for b in _batches(projects, PROJECTS_PER_TASK)], jobs):
+                for name, data in part:
+                    zf.writestr(name, data)
+        os.replace(tmp, bundle)
+        written.append(bundle)
+        return written
+
+    path = os.path.join(outdir, "all.xlsx")
+    write_xlsx(path, rows_all, cols)
+    written.append(path)
+
+    if fmt == "sheets":
+        path = os.path.join(outdir, "by_project.xlsx")
+        write_xlsx_sheets(path, projects, cols)
+        written.append(path)
+        return written
+
+    per_proj_dir = os.path.join(outdir, "by_project")
+    os.makedirs(per_proj_dir, exist_ok=True)
+    tasks = [(per_proj_dir, b, cols) for b in _batches(projects, PROJECTS_PER_TASK)]
+    _pool_map(_write_xlsx_batch, tasks, jobs)
+    written.append(per_proj_dir)
+    return written
\ No newline at end of file
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# egov_rules.py — rule registry + batch evaluation of the eGov component checks
+#
+# Every check is a Rule registered with @rule(...). A rule declares what it needs
+# (node types, relations, attributes, other rules) and computes its result once for
+# all components, as numpy arrays over the graph ids (egov_graph.py):
+#   results.values["KS_no_AS"][ks_id]  -> True if the KS has no "AS slúži KS" relation
+# The one project-dependent check ("KS is not served by an AS realized by *this*
+# project") is a join: Projekt_realizuje_KS x AS_sluzi_KS x Projekt_realizuje_AS,
+# giving the set of (project, KS) pairs that are fine.
+#
+# Adding a check = one @rule function below (+ its message). Nothing else to edit:
+#   select(names)       -> enabled rules + their dependencies, in dependency order
+#   requirements(rules) -> (node types, relations, attributes) the loader has to read
+#   evaluate(g, rules)  -> RuleResults (values + per-rule timings)
+#   results.errors(comp_type, comp_id, proj_id) -> messages, in registry order
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from egov_graph import Graph
+
+# helper for external integration flag
+def parse_ext_integration_flag(raw):
+    """
+    Returns True/False for 'dostupnost pre externu integraciu'.
+    Accepts:
+      - enum codes: 'c_stav_dost_ext_int.1' (Yes), '... .2' (No)
+      - localized labels: 'Áno'/'Ano'/'Nie'
+      - booleans: True/False
+      - strings: 'true'/'false', 'yes'/'no', '1'/'0', 't'/'f', 'y'/'n'
+      - integers: 1/0
+      - lists: evaluates True if ANY element parses True
+    Unknown/None -> False (conservative)
+    """
+    C_YES = "c_stav_dost_ext_int.1"
+    C_NO  = "c_stav_dost_ext_int.2"
+
+    def _one(x):
+        if x is None:
+            return None
+        if isinstance(x, bool):
+            return x
+        if isinstance(x, (int, float)):
+            return bool(int(x))
+        s = str(x).strip().lower()
+        if s in ("", "null", "none"):
+            return None
+        if s == C_YES.lower():
+            return True
+        if s == C_NO.lower():
+            return False
+        if s in ("áno", "ano", "yes", "true", "t", "y", "1"):
+            return True
+        if s in ("nie", "no", "false", "f", "n", "0"):
+            return False
+        return None  # unknown form
+
+    if isinstance(raw, list):
+        # If any element clearly says Yes, treat as True; if any says No and none say Yes, False; else fallback
+        flags = [_one(x) for x in raw]
+        if any(v is True for v in flags):
+            return True
+        if all(v is False for v in flags if v is not None):
+            return False
+        return False  # ambiguous -> conservative
+    else:
+        v = _one(raw)
+        return bool(v) if v is not None else False
+
+def parse_module_flag(raw) -> bool:
+    # "EA_Profil_ISVS_modul_isvs"; missing counts as false
+    return str("false" if raw is None else raw).strip().lower() in ("1", "true", "yes")
+
+# ------------------------------ Helpers ------------------------------
+def attr_flags(g: Graph, type_name: str, attr_name: str, parse) -> np.ndarray:
+    # parse(value) for every node of type_name, as a bool array over all ids (False elsewhere)
+    out = np.zeros(len(g), dtype=bool)
+    table = g.nodes.get(type_name)
+    if table is None or not len(table):
+        return out
+    out[np.asarray(table.ids, dtype=np.int64)] = [bool(parse(v)) for v in table.column(attr_name)]
+    return out
+
+def pair_keys(a: np.ndarray, b: np.ndarray, n: int) -> np.ndarray:
+    # (a, b) id pairs as single int64 keys, for isin / set lookups
+    return np.asarray(a, dtype=np.int64) * n + np.asarray(b, dtype=np.int64)
+
+
+# ------------------------------ Registry ------------------------------
+class Rule:
+    def __init__(self, name: str, comp_type: str, compute: Callable, nodes: Iterable[str] = (),
+                 relations: Iterable[str] = (), attributes: Iterable[str] = (), depends: Iterable[str] = (),
+                 message: Union[None, str, Callable] = None, per_project: bool = False):
+        self.name = name
+        self.comp_type = comp_type        # KS / ISVS / AS - which report rows it adds errors to
+        self.compute = compute            # compute(g, values) -> result (usually a bool array over ids)
+        self.nodes = list(nodes) or [comp_type]
+        self.relations = list(relations)
+        self.attributes = list(attributes)
+        self.depends = list(depends)      # rules whose values compute/message read
+        self.message = message            # str (when flag is set), callable(results, comp_id, proj_id) -> [str], or None for helper rules
+        self.per_project = per_project    # message depends on the project (not cached per component)
+
+    def messages(self, results: "RuleResults", comp_id: int, proj_id: Optional[int]) -> List[str]:
+        if self.message is None:
+            return []
+        if callable(self.message):
+            return self.message(results, comp_id, proj_id)
+        return [self.message] if results.values[self.name][comp_id] else []
+
+RULES: Dict[str, Rule] = {}  # registration order = order of the messages in the report
+
+def rule(name: str, comp_type: str, **kw):
+    def deco(fn):
+        if name in RULES:
+            raise ValueError(f"Duplicate rule name: {name}")
+        RULES[name] = Rule(name, comp_type, fn, **kw)
+        return fn
+    return deco
+
+def select(names: Optional[Iterable[str]] = None) -> List[Rule]:
+    # Enabled rules plus everything they depend on, dependencies first.
+    wanted = list(RULES) if names is None else list(names)
+    order: List[Rule] = []
+    state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+    def visit(n: str, chain: Tuple[str, ...]):
+        if n not in RULES:
+            raise ValueError(f"Unknown rule: {n}" + (f" (needed by {chain[-1]})" if chain else ""))
+        if state.get(n) == 2:
+            return
+        if state.get(n) == 1:
+            raise ValueError("Rule dependency cycle: " + " -> ".join(chain + (n,)))
+        state[n] = 1
+        for d in RULES[n].depends:
+            visit(d, chain + (n,))
+        state[n] = 2
+        order.append(RULES[n])
+
+    for n in wanted:
+        visit(n, ())
+    return order
+
+def requirements(rules: Iterable[Rule]) -> Tuple[List[str], List[str], List[str]]:
+    # (node types, relations, attributes) the enabled rules read - the loader fetches only these
+    nodes: List[str] = []
+    rels: List[str] = []
+    attrs: List[str] = []
+    for r in rules:
+        nodes += [x for x in r.nodes if x not in nodes]
+        rels += [x for x in r.relations if x not in rels]
+        attrs += [x for x in r.attributes if x not in attrs]
+    return nodes, rels, attrs
+
+
+# ------------------------------ Message helpers ------------------------------
+def _name_code(g: Graph, node_type: str, i: int) -> str:
+    return g.attr(node_type, i, "Gen_Profil_nazov") + " (" + g.attr(node_type, i, "Gen_Profil_kod_metais") + ")"
+
+def _listing(flag: str, rel_name: str, direction: str, node_type: str, text: str):
+    # message = one line per neighbour (rel.outer / rel.central) of a flagged component
+    def message(res: "RuleResults", i: int, proj_id: Optional[int]) -> List[str]:
+        if not res.values[flag][i]:
+            return []
+        rel = res.g.rel(rel_name)
+        ids = rel.outer(i) if direction == "outer" else rel.central(i)
+        return [text + _name_code(res.g, node_type, j) for j in ids]
+    return message
+
+NAME_ATTRS = ["Gen_Profil_nazov", "Gen_Profil_kod_metais"]
+
+
+# ------------------------------ KS rules ------------------------------
+# possible error1: Ak KS nemá vzťah "AS slúži KS" so žiadnou AS
+@rule("KS_no_AS", "KS", relations=["AS_sluzi_KS"], message="KS nie je služené žiadnou AS")
+def _ks_no_as(g: Graph, values):
+    return g.rel("AS_sluzi_KS").out_degree(len(g)) == 0
+
+# possible error2: Ak KS nemá vzťah "AS slúži KS" so žiadnou AS, realizovanou týmto projektom
+# result = keys proj_id * n + ks_id of the (project, KS) pairs where some AS serving the KS is realized by the project
+def _ks_no_project_as_msg(res: "RuleResults", i: int, proj_id: Optional[int]) -> List[str]:
+    if res.values["KS_no_AS"][i] or proj_id is None or proj_id * res.n + i in res.values["KS_no_project_AS"]:
+        return []
+    return ["KS nie je slúžené žiadnou AS realizovanou týmto projektom"]
+
+@rule("KS_no_project_AS", "KS", nodes=["KS", "Projekt", "AS"],
+      relations=["AS_sluzi_KS", "Projekt_realizuje_KS", "Projekt_realizuje_AS"],
+      depends=["KS_no_AS"], message=_ks_no_project_as_msg, per_project=True)
+def _ks_no_project_as(g: Graph, values):
+    n = len(g)
+    proj_ks = g.rel("Projekt_realizuje_KS")          # central = KS, outer = Projekt
+    proj_as = g.rel("Projekt_realizuje_AS")          # central = AS, outer = Projekt
+    # (proj, KS) x AS_sluzi_KS -> (proj, KS, AS), keep rows where (AS, proj) is in Projekt_realizuje_AS
+    pos, as_ids = g.rel("AS_sluzi_KS").expand_outer(proj_ks.central_ids)
+    hit = np.isin(pair_keys(as_ids, proj_ks.outer_ids[pos], n), pair_keys(proj_as.central_ids, proj_as.outer_ids, n))
+    ok = pair_keys(proj_ks.outer_ids[pos[hit]], proj_ks.central_ids[pos[hit]], n)
+    return set(np.unique(ok).tolist())
+
+# possible error3: Ak KS nemá vzťah "Kanal spristupnuje KS"
+@rule("KS_no_Kanal", "KS", relations=["Kanal_spristupnuje_KS"], message="KS nie je sprístupnená žiadnym kanálom")
+def _ks_no_kanal(g: Graph, values):
+    return g.rel("Kanal_spristupnuje_KS").out_degree(len(g)) == 0
+
+# possible error4: Ak KS nemá vzťah "ZS zoskupuje KS"
+@rule("KS_no_ZS", "KS", relations=["ZS_zoskupuje_KS"], message="KS nie je zoskupena žiadnou životnou situáciou")
+def _ks_no_zs(g: Graph, values):
+    return g.rel("ZS_zoskupuje_KS").out_degree(len(g)) == 0
+
+# possible error5: Ak KS nemá vzťah "KS asociuje Agenda"
+@rule("KS_no_Agenda", "KS", relations=["KS_asociuje_Agenda"], message="KS neasociuje žiadnu agendu")
+def _ks_no_agenda(g: Graph, values):
+    return g.rel("KS_asociuje_Agenda").in_degree(len(g)) == 0
+
+
+# ------------------------------ ISVS rules ------------------------------
+# helper: "EA_Profil_ISVS_modul_isvs" parsed for every ISVS
+@rule("ISVS_module", "ISVS", attributes=["EA_Profil_ISVS_modul_isvs"])
+def _isvs_module(g: Graph, values):
+    return attr_flags(g, "ISVS", "EA_Profil_ISVS_modul_isvs", parse_module_flag)
+
+# possible error1: Ak ISVS má príznak Modul a nemá vzťah na materský ISVS ("EA_Profil_ISVS_modul_isvs" is true, no "ISVS_patri_pod_ISVS")
+@rule("ISVS_module_without_parent", "ISVS", relations=["ISVS_patri_pod_ISVS"], depends=["ISVS_module"],
+      message="ISVS je modul, ale nemá materský ISVS")
+def _isvs_module_without_parent(g: Graph, values):
+    return values["ISVS_module"] & (g.rel("ISVS_patri_pod_ISVS").out_degree(len(g)) == 0)
+
+# possible error2: Ak ISVS má príznak Modul a má opačný vzťah na materský ISVS (here the ISVS is the central one - parent!)
+@rule("ISVS_module_with_children", "ISVS", relations=["ISVS_patri_pod_ISVS"], attributes=NAME_ATTRS, depends=["ISVS_module"],
+      message=_listing("ISVS_module_with_children", "ISVS_patri_pod_ISVS", "central", "ISVS", "ISVS je modul, ale má dcérske ISVS: "))
+def _isvs_module_with_children(g: Graph, values):
+    return values["ISVS_module"] & (g.rel("ISVS_patri_pod_ISVS").in_degree(len(g)) > 0)
+
+# possible error3: Ak ISVS nie je Modul a má vzťah na iný ISVS, ktorý nie je Modul (here this ISVS is the outer one - child)
+@rule("ISVS_not_module_with_parent", "ISVS", relations=["ISVS_patri_pod_ISVS"], attributes=NAME_ATTRS, depends=["ISVS_module"],
+      message=_listing("ISVS_not_module_with_parent", "ISVS_patri_pod_ISVS", "outer", "ISVS", "ISVS nie je modul, ale patri pod iné ISVS: "))
+def _isvs_not_module_with_parent(g: Graph, values):
+    return ~values["ISVS_module"] & (g.rel("ISVS_patri_pod_ISVS").out_degree(len(g)) > 0)
+
+# possible error4: Ak ISVS nemá vzťah na žiadnu infraštruktúrnu službu
+@rule("ISVS_no_InfraSluzba", "ISVS", relations=["InfraSluzba_prevadzkuje_ISVS"],
+      message="ISVS nie je prevádzkovaná žiadnou infraštruktúrnou službou")
+def _isvs_no_infra(g: Graph, values):
+    return g.rel("InfraSluzba_prevadzkuje_ISVS").out_degree(len(g)) == 0
+
+
+# ------------------------------ AS rules ------------------------------
+# "DOSTUPNOST_PRE_EXTERNU_INTEGRACIU": {
+#   "c_stav_dost_ext_int.1": "Áno",
+#   "c_stav_dost_ext_int.2": "Nie"
+# }
+# helper: parsed for every AS (this attribute is MISSED IN 30% of AS -> counts as not external)
+@rule("AS_external", "AS", attributes=["EA_Profil_AS_dostupnost_pre_externu_integraciu"])
+def _as_external(g: Graph, values):
+    return attr_flags(g, "AS", "EA_Profil_AS_dostupnost_pre_externu_integraciu", parse_ext_integration_flag)
+
+# possible error1: Ak AS nemá vzťah "ISVS realizuje AS" so žiadnym ISVS
+@rule("AS_no_ISVS", "AS", relations=["ISVS_realizuje_AS"], message="AS nie je realizovaná žiadnym ISVS")
+def _as_no_isvs(g: Graph, values):
+    return g.rel("ISVS_realizuje_AS").out_degree(len(g)) == 0
+
+# possible error2: Ak AS (dodávaná v projekte) má vzťah "AS slúži AS" so službou AS2 a služba AS je zdroj a nemá príznak "určená na externú integráciu"
+# "AS je zdroj", outer = AS, central = AS2 - every AS2 is listed
+@rule("AS_source_not_external", "AS", relations=["AS_sluzi_AS"], attributes=NAME_ATTRS, depends=["AS_external"],
+      message=_listing("AS_source_not_external", "AS_sluzi_AS", "central", "AS",
+                       "AS nema príznak \"určená na externú integráciu\", ale má vzťah na inú AS: "))
+def _as_source_not_external(g: Graph, values):
+    return ~values["AS_external"] & (g.rel("AS_sluzi_AS").in_degree(len(g)) > 0)
+
+# possible error3: Ak AS (dodávaná v projekte) má vzťah "AS slúži AS" so službou AS2 a služba AS2 je zdroj a AS2 nemá príznak "určená na externú integráciu"
+# "AS2 je zdroj", central = AS, outer = AS2
+def _as_uses_not_external_msg(res: "RuleResults", i: int, proj_id: Optional[int]) -> List[str]:
+    if not res.values["AS_uses_not_external"][i]:
+        return []
+    g, ext = res.g, res.values["AS_external"]
+    out = []
+    for as2 in g.rel("AS_sluzi_AS").outer(i):
+        if not ext[as2]:
+            as2_name = g.attr("AS", as2, "Gen_Profil_nazov") or "<bez názvu>"
+            as2_code = g.attr("AS", as2, "Gen_Profil_kod_metais") or "?"
+            out.append("AS ma vzťah na inú AS ktorá nemá príznak \"určená na externú integráciu\": " + as2_name + " (" + as2_code + ")")
+    return out
+
+@rule("AS_uses_not_external", "AS", relations=["AS_sluzi_AS"], attributes=NAME_ATTRS, depends=["AS_external"],
+      message=_as_uses_not_external_msg)
+def _as_uses_not_external(g: Graph, values):
+    sluzi = g.rel("AS_sluzi_AS")
+    bad = ~values["AS_external"][sluzi.outer_ids]
+    return np.bincount(sluzi.central_ids[bad], minlength=len(g))[:len(g)] > 0
+
+
+# ------------------------------ Evaluation ------------------------------
+class RuleResults:
+    def __init__(self, g: Graph, rules: List[Rule], values: Dict[str, object], timings: Dict[str, float]):
+        self.g = g
+        self.n = len(g)
+        self.rules = rules
+        self.values = values      # rule name -> computed result
+        self.timings = timings    # rule name -> seconds
+        self._by_type: Dict[str, List[Rule]] = {}
+        for r in sorted(rules, key=lambda r: list(RULES).index(r.name)):  # report order = registry order
+            if r.message is not None:
+                self._by_type.setdefault(r.comp_type, []).append(r)
+        self._cache: Dict[Tuple[str, int], List[str]] = {}
+
+    def errors(self, comp_type: str, comp_id: int, proj_id: Optional[int] = None) -> List[str]:
+        res: List[str] = []
+        for r in self._by_type.get(comp_type, []):
+            if r.per_project:
+                res += r.messages(self, comp_id, proj_id)
+                continue
+            key = (r.name, comp_id)
+            msgs = self._cache.get(key)
+            if msgs is None:
+                msgs = self._cache[key] = r.messages(self, comp_id, None)
+            res += msgs
+        return res
+
+    def counts(self) -> Dict[str, int]:
+        # how many nodes of the rule's type are flagged (flag rules only)
+        out = {}
+        for r in self.rules:
+            v = self.values[r.name]
+            if r.message is not None and isinstance(v, np.ndarray):
+                out[r.name] = int((v & self.g.type_mask(r.comp_type)).sum())
+        return out
+
+
+def evaluate(g: Graph, rules: Optional[List[Rule]] = None) -> RuleResults:
+    # rules must be in dependency order (what select() returns)
+    rules = select() if rules is None else rules
+    values: Dict[str, object] = {}
+    timings: Dict[str, float] = {}
+    for r in rules:
+        t0 = time.perf_counter()
+        values[r.name] = r.compute(g, values)
+        timings[r.name] = time.perf_counter() - t0
+    return RuleResults(g, rules, values, timings)
\ No newline at end of file
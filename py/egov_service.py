@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# egov_service.py — long-running eGov check: load the graph once, answer per project
+#
+# project_eGov_components.py loads every dump, checks every project and writes every
+# workbook - re-checking one project after an edit paid the whole load again. This keeps
+# the egov_graph.Graph and the evaluated rules (egov_rules.py) in memory and answers over
+# HTTP in milliseconds:
+#   GET  /health                   dumps loaded, load time, rules
+#   GET  /projects                 [{"uuid", "name"}] of every project
+#   GET  /project/<uuid>           the rows of that project's workbook
+#   GET  /errors?rule=KS_no_ZS     every (project, component) the rule flags
+#   GET  /errors?q=agendu          ... or whose error message contains the text
+#   POST /reload                   reload now
+# Rows come as {"columns": COLS, "rows": [[...], ...]}, the columns of the report.
+#
+# The dumps the enabled rules read are polled every --poll seconds; when one changes
+# (mtime / size, e.g. after sync.py or planner.py), the graph is rebuilt next to the old one
+# and swapped in, so requests keep being answered from the old graph meanwhile. A failed
+# reload (half-written dump, ...) keeps the old graph and is retried at the next poll.
+#
+# Usage:
+#   python3 py/egov_service.py [--port 8780] [--rules ...] [--skip-rules ...] [--poll 2]
+#   curl -s localhost:8780/project/<uuid>
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+import egov_rules
+import project_eGov_components as egov
+from egov_graph import Graph, load_graph
+from egov_rules import RuleResults, evaluate
+
+PORT = int(os.getenv("METAIS_SERVICE_PORT", "8780"))
+POLL = float(os.getenv("METAIS_SERVICE_POLL", "2"))  # seconds between dump checks (0 = never)
+
+
+# ------------------------------ State ------------------------------
+class Snapshot:
+    # One loaded graph with its rule results; replaced as a whole on reload, never mutated.
+    def __init__(self, g: Graph, results: RuleResults, stamps: Dict[str, Tuple[int, int]], load_s: float):
+        self.g = g
+        self.results = results
+        self.stamps = stamps          # dump path -> (mtime_ns, size) as loaded
+        self.load_s = load_s
+        self.loaded_at = time.time()
+        self.projects = {g.uuids[i]: i for i in g.nodes["Projekt"].ids}
+
+def _stamp(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+class Service:
+    def __init__(self, rules: List[egov_rules.Rule], dir_nodes: str = egov.dir_nodes, dir_relations: str = egov.dir_relations):
+        self.rules = rules
+        self.node_names, self.rela_names, self.attr_names = egov.requirements(rules)
+        self.paths = ([os.path.join(dir_nodes, f"{n}_raw.json") for n in self.node_names]
+                      + [os.path.join(dir_relations, f"{r}.json") for r in self.rela_names])
+        self.dir_nodes = dir_nodes
+        self.dir_relations = dir_relations
+        self.snap: Optional[Snapshot] = None
+        self._reload_lock = threading.Lock()
+
+    def changed(self) -> List[str]:
+        if self.snap is None:
+            return list(self.paths)
+        out = []
+        for p in self.paths:
+            try:
+                if _stamp(p) != self.snap.stamps.get(p):
+                    out.append(p)
+            except OSError:
+                pass  # a dump being replaced; picked up once it is back
+        return out
+
+    def reload(self) -> Snapshot:
+        # Build a new snapshot and swap it in (one reload at a time; readers are never blocked).
+        with self._reload_lock:
+            t0 = time.perf_counter()
+            stamps = {p: _stamp(p) for p in self.paths}
+            g = load_graph(self.node_names, self.rela_names, attrs=self.attr_names,
+                           dir_nodes=self.dir_nodes, dir_relations=self.dir_relations)
+            results = evaluate(g, self.rules)
+            if any(_stamp(p) != stamps[p] for p in self.paths):
+                raise RuntimeError("a dump changed while it was being loaded")
+            self.snap = Snapshot(g, results, stamps, time.perf_counter() - t0)
+            return self.snap
+
+    def watch(self, poll: float) -> None:
+        while True:
+            time.sleep(poll)
+            changed = self.changed()
+            if not changed:
+                continue
+            names = ", ".join(os.path.basename(p) for p in changed)
+            try:
+                snap = self.reload()
+                print(f"[INFO] Reloaded ({names}) in {snap.load_s:.2f}s", flush=True)
+            except Exception as e:
+                print(f"[WARN] Reload after change of {names} failed, keeping the old graph: {e}", file=sys.stderr, flush=True)
+
+    # ---- queries ----
+    def project(self, uuid: str) -> Optional[List[List[str]]]:
+        snap = self.snap
+        proj_id = snap.projects.get(uuid)
+        if proj_id is None:
+            return None
+        return egov.project_rows(snap.g, snap.results, proj_id)
+
+    def errors(self, rule: str = "", text: str = "") -> List[List[str]]:
+        # (project, type, component, error) for every error of `rule` and / or containing `text`;
+        # every cell filled in, since the rows are not grouped under a project heading
+        snap = self.snap
+        g, res = snap.g, snap.results
+        comp_types = [egov_rules.RULES[rule].comp_type] if rule else None
+        rows = []
+        for proj_uuid, proj_id in snap.projects.items():
+            proj_cell = None
+            for rel_name, comp_type, _ in egov.relation_specs:
+                if comp_types is not None and comp_type not in comp_types:
+                    continue
+                for comp_id in sorted(g.rel(rel_name).central(proj_id), key=lambda i: g.uuids[i]):
+                    if rule:
+                        errs = egov_rules.RULES[rule].messages(res, comp_id, proj_id)
+                    else:
+                        errs = res.errors(comp_type, comp_id, proj_id)
+                    errs = [e for e in errs if text.lower() in e.lower()]
+                    if not errs:
+                        continue
+                    if proj_cell is None:
+                        proj_cell = (g.attr("Projekt", proj_id, "Gen_Profil_nazov", proj_uuid) + " ("
+                                     + g.attr("Projekt", proj_id, "Gen_Profil_kod_metais", proj_uuid) + ")")
+                    comp_cell = egov.get_name(g, comp_type, comp_id) + " (" + egov.get_metais(g, comp_type, comp_id) + ")"
+                    rows += [[proj_cell, comp_type, comp_cell, e] for e in errs]
+        return rows
+
+    def health(self) -> Dict[str, Any]:
+        snap = self.snap
+        return {
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(snap.loaded_at)),
+            "load_s": round(snap.load_s, 3),
+            "projects": len(snap.projects),
+            "dumps": [os.path.basename(p) for p in self.paths],
+            "rules": [r.name for r in self.rules],
+        }
+
+
+# ------------------------------ HTTP ------------------------------
+class Handler(BaseHTTPRequestHandler):
+    service: Service
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _json(self, status: int, doc: Any) -> None:
+        body = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _rows(self, rows: List[List[str]]) -> None:
+        self._json(200, {"columns": egov.COLS, "rows": rows})
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        path = url.path.rstrip("/")
+        svc = self.service
+        if path == "/health":
+            self._json(200, svc.health())
+        elif path == "/projects":
+            g = svc.snap.g
+            self._json(200, [{"uuid": u, "name": g.attr("Projekt", i, "Gen_Profil_nazov", u)}
+                             for u, i in svc.snap.projects.items()])
+        elif path.startswith("/project/"):
+            uuid = unquote(path[len("/project/"):])
+            rows = svc.project(uuid)
+            if rows is None:
+                self._json(404, {"error": f"no project {uuid}"})
+            else:
+                self._rows(rows)
+        elif path == "/errors":
+            qs = parse_qs(url.query)
+            rule = (qs.get("rule") or [""])[0]
+            text = (qs.get("q") or [""])[0]
+            if not rule and not text:
+                self._json(400, {"error": "give rule=<name> and / or q=<text>"})
+            elif rule and rule not in {r.name for r in svc.rules}:
+                self._json(404, {"error": f"rule {rule} is not enabled in this service"})
+            else:
+                self._rows(svc.errors(rule, text))
+        else:
+            self._json(404, {"error": f"unknown path {url.path}"})
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path.rstrip("/") != "/reload":
+            self._json(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            snap = self.service.reload()
+        except Exception as e:
+            self._json(500, {"error": f"reload failed, keeping the old graph: {e}"})
+            return
+        self._json(200, {"reloaded": True, "load_s": round(snap.load_s, 3)})
+
+
+def serve(service: Service, port: int = PORT, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    # Returns the server (not started); call serve_forever() on it, or run it in a thread.
+    handler = type("EgovHandler", (Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Serve the eGov components check from an in-memory graph (hot reload of changed dumps).")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=PORT, help=f"Default {PORT} (env METAIS_SERVICE_PORT)")
+    ap.add_argument("--rules", default="", help="Comma-separated rules to run (default: all)")
+    ap.add_argument("--skip-rules", default="", help="Comma-separated rules to leave out")
+    ap.add_argument("--poll", type=float, default=POLL,
+                    help=f"Seconds between checks of the dumps for changes, 0 = only POST /reload (default: {POLL:g}, env METAIS_SERVICE_POLL)")
+    args = ap.parse_args(argv)
+
+    try:
+        service = Service(egov.select_rules(args.rules, args.skip_rules))
+        snap = service.reload()
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    print(f"[INFO] Loaded {len(service.node_names)} node types, {len(service.rela_names)} relations, "
+          f"{len(snap.projects)} projects in {snap.load_s:.2f}s")
+
+    if args.poll > 0:
+        threading.Thread(target=service.watch, args=(args.poll,), daemon=True).start()
+    server = serve(service, args.port, args.host)
+    print(f"[INFO] eGov check service on http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
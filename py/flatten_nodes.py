@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# flatten_nodes.py — raw node dumps -> one wide CSV / Parquet table per type
+#
+# convert.py only handles TABLE reports; a *_raw.json dump is a list of nodes with their
+# attributes as [{"name", "value"}] pairs. Here every node becomes one row:
+#   uuid | type | <attribute>... | meta_<metaAttribute>...
+# - attributes are pivoted with unique_attributes.flatten_attrs; a name that occurs several
+#   times on a node (multi-valued) is one cell joined with --multi-sep (CSV) or a list
+#   column (Parquet)
+# - enum codes (c_stav_dost_ext_int.1, ...) are replaced by their labels from the output of
+#   groovy/misc/all_enums.groovy (--enums, default output/all_enums.json if it exists):
+#     run/run.sh -s groovy/misc/all_enums.groovy --params groovy/misc/enum_names.json
+# - the dump is parsed once: rows are spooled (marshal) to a temp file while the column set
+#   is collected, then written out in column order - memory stays at one node
+# - types are flattened in parallel (one process per type)
+# CSV is written like convert.py (';', UTF-8 BOM); missing attributes are empty cells.
+#
+# Usage:
+#   python3 py/flatten_nodes.py                          (every output/nodes/*_raw.json -> output/flat/<TYPE>.csv)
+#   python3 py/flatten_nodes.py KS AS --format parquet -j 4
+#   python3 py/flatten_nodes.py KS --no-enums --multi-sep ", "
+import argparse
+import json
+import marshal
+import os
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+import convert
+import metrics
+from jsonstream import iter_result_items
+from unique_attributes import META_PREFIX, node_row, node_types
+
+DIR_NODES = "output/nodes"
+DIR_FLAT = "output/flat"
+ENUMS_PATH = os.getenv("METAIS_ENUMS", "output/all_enums.json")
+MULTI_SEP = " | "
+JOBS = int(os.getenv("METAIS_CONVERT_JOBS", str(os.cpu_count() or 1)))
+
+Row = List[Tuple[int, Any]]  # (column index, value) pairs of one node
+
+
+# ------------------------------ Enums ------------------------------
+def load_enums(path: str) -> Dict[str, str]:
+    # all_enums.groovy returns {ENUM_NAME: {code: label}} (inside the usual "result" envelope);
+    # codes carry their enum prefix (c_stav_dost_ext_int.1), so one code -> label map is enough
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    enums = doc.get("result", doc) if isinstance(doc, dict) else {}
+    labels: Dict[str, str] = {}
+    for m in (enums or {}).values() if isinstance(enums, dict) else []:
+        if isinstance(m, dict):
+            labels.update((str(code), label) for code, label in m.items() if label is not None)
+    return labels
+
+def _decode(v: Any, labels: Dict[str, str]) -> Any:
+    if isinstance(v, str):
+        return labels.get(v, v)
+    if isinstance(v, list):
+        return [labels.get(x, x) if isinstance(x, str) else x for x in v]
+    return v
+
+
+# ------------------------------ Pass 1: parse + spool ------------------------------
+def spool(path: str, spool_file, labels: Dict[str, str]) -> Tuple[List[str], List[bool], int]:
+    # -> (column names in order of first appearance, multi-valued flags, nodes)
+    index: Dict[str, int] = {"uuid": 0, "type": 1}
+    names = ["uuid", "type"]
+    multi = [False, False]
+    n = 0
+    for obj in iter_result_items(path):
+        if not isinstance(obj, dict):
+            continue
+        row: Row = [(0, obj.get("uuid")), (1, obj.get("type"))]
+        for k, v in node_row(obj).items():
+            i = index.get(k)
+            if i is None:
+                i = index[k] = len(names)
+                names.append(k)
+                multi.append(False)
+            if isinstance(v, list):
+                multi[i] = True
+            row.append((i, _decode(v, labels) if labels else v))
+        marshal.dump(row, spool_file)
+        n += 1
+    return names, multi, n
+
+def _column_order(names: List[str]) -> List[int]:
+    # uuid, type, attributes A-Z, meta_* A-Z
+    rest = sorted(range(2, len(names)), key=lambda i: (names[i].startswith(META_PREFIX), names[i]))
+    return [0, 1] + rest
+
+def _spooled(spool_file, n: int):
+    spool_file.seek(0)
+    for _ in range(n):
+        yield marshal.load(spool_file)
+
+
+# ------------------------------ Pass 2: write ------------------------------
+def write_csv(out_path: str, names: List[str], order: List[int], rows, multi_sep: str = MULTI_SEP) -> None:
+    q = convert.make_quoter(convert.DELIM)
+    pos = {col: j for j, col in enumerate(order)}
+    width = len(order)
+
+    def cell(v: Any) -> str:
+        if v is None:
+            return ""
+        if isinstance(v, list):
+            return q(multi_sep.join(convert.tostring(x) for x in v if x is not None))
+        return q(v)
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(out_path) or ".", prefix=".tmp_", suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+            f.write(convert.BOM + convert.DELIM.join(q(names[i]) for i in order) + "\n")
+            for row in rows:
+                cells = [""] * width
+                for i, v in row:
+                    cells[pos[i]] = cell(v)
+                f.write(convert.DELIM.join(cells) + "\n")
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def write_parquet(out_path: str, names: List[str], multi: List[bool], order: List[int], rows) -> None:
+    pa, pq = convert.pa, convert.pq
+    if pa is None:
+        raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+    types = [pa.list_(pa.string()) if multi[i] else pa.string() for i in order]
+    schema = pa.schema([pa.field(n, t) for n, t in zip(convert.unique_names([names[i] for i in order]), types)])
+    pos = {col: j for j, col in enumerate(order)}
+    width = len(order)
+
+    def cell(v: Any, is_multi: bool) -> Any:
+        if v is None:
+            return None
+        if is_multi:
+            return [convert.tostring(x) for x in (v if isinstance(v, list) else [v])]
+        return convert.tostring(v)
+
+    def flush(w, cols):
+        w.write_table(pa.Table.from_arrays([pa.array(c, t) for c, t in zip(cols, types)], schema=schema))
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(out_path) or ".", prefix=".tmp_", suffix=".parquet")
+    os.close(fd)
+    try:
+        with pq.ParquetWriter(tmp, schema, compression="zstd") as w:
+            cols: List[List[Any]] = [[] for _ in range(width)]
+            n = 0
+            for row in rows:
+                for c in cols:
+                    c.append(None)
+                for i, v in row:
+                    cols[pos[i]][-1] = cell(v, multi[i])
+                n += 1
+                if n % convert.PARQUET_BATCH == 0:
+                    flush(w, cols)
+                    cols = [[] for _ in range(width)]
+            if n % convert.PARQUET_BATCH or n == 0:
+                flush(w, cols)
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# ------------------------------ Per type ------------------------------
+def flatten(type_name: str, path: str, out_path: str, fmt: str = "csv", labels: Optional[Dict[str, str]] = None,
+            multi_sep: str = MULTI_SEP) -> Tuple[int, int]:
+    # -> (nodes, columns)
+    out_dir = os.path.dirname(out_path) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    with metrics.span("flatten", item=type_name, format=fmt) as m, \
+         tempfile.TemporaryFile(dir=out_dir, prefix=".spool_") as sp:
+        names, multi, n = spool(path, sp, labels or {})
+        order = _column_order(names)
+        if fmt == "parquet":
+            write_parquet(out_path, names, multi, order, _spooled(sp, n))
+        else:
+            write_csv(out_path, names, order, _spooled(sp, n), multi_sep)
+        m.update(rows=n, columns=len(names), bytes=os.path.getsize(out_path))
+    return n, len(names)
+
+def _job(args) -> Tuple[str, str, Optional[Tuple[int, int]], str]:
+    type_name, path, out_path, fmt, labels, multi_sep = args
+    try:
+        return type_name, out_path, flatten(type_name, path, out_path, fmt, labels, multi_sep), ""
+    except (OSError, ValueError, RuntimeError) as e:
+        return type_name, out_path, None, str(e) or type(e).__name__
+
+
+# ------------------------------ CLI ------------------------------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Flatten raw node dumps into one wide CSV / Parquet table per type.")
+    ap.add_argument("types", nargs="*", help=f"Node types (default: every {DIR_NODES}/*_raw.json)")
+    ap.add_argument("--format", choices=convert.FORMATS, default="csv", help="Output format (default: csv)")
+    ap.add_argument("-d", "--outdir", default=DIR_FLAT, help=f"Output directory (default: {DIR_FLAT})")
+    ap.add_argument("--enums", default=None,
+                    help=f"all_enums.groovy output used to decode enum codes (default: {ENUMS_PATH} if it exists)")
+    ap.add_argument("--no-enums", action="store_true", help="Keep enum codes as they are")
+    ap.add_argument("--multi-sep", default=MULTI_SEP, help=f"Separator of multi-valued cells in CSV (default: '{MULTI_SEP}')")
+    ap.add_argument("-j", "--jobs", type=int, default=JOBS,
+                    help=f"Types flattened in parallel (default: {JOBS}, env METAIS_CONVERT_JOBS)")
+    metrics.add_metrics_arg(ap)
+    args = ap.parse_args(argv)
+    metrics.apply_args(args)
+
+    if args.format == "parquet" and convert.pa is None:
+        print("[ERROR] Parquet output needs pyarrow (pip install pyarrow)", file=sys.stderr)
+        return 1
+
+    labels: Dict[str, str] = {}
+    enums_path = args.enums or (ENUMS_PATH if os.path.exists(ENUMS_PATH) else "")
+    if enums_path and not args.no_enums:
+        try:
+            labels = load_enums(enums_path)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Could not read enums from {enums_path} ({e})", file=sys.stderr)
+            return 1
+        print(f"[INFO] Decoding {len(labels)} enum codes from {enums_path}")
+
+    types = args.types or node_types(DIR_NODES)
+    if not types:
+        print(f"[ERROR] Nothing to flatten: no types given and {DIR_NODES} is empty.", file=sys.stderr)
+        return 1
+    tasks = []
+    for t in types:
+        path = os.path.join(DIR_NODES, f"{t}_raw.json")
+        if not os.path.exists(path):
+            print(f"[ERROR] Node dump not found: {path}", file=sys.stderr)
+            continue
+        tasks.append((t, path, os.path.join(args.outdir, f"{t}.{args.format}"), args.format, labels, args.multi_sep))
+
+    ok, failed = 0, len(types) - len(tasks)
+    for type_name, out, res, err in convert.run_pool(_job, tasks, args.jobs):
+        if err:
+            failed += 1
+            print(f"[ERROR] {type_name}: {err}", file=sys.stderr)
+        else:
+            ok += 1
+            print(f"Wrote: {out} ({res[0]} nodes, {res[1]} columns)", flush=True)
+    print(f"[INFO] Completed: {ok} ok / {failed} failed.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
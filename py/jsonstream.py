@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# jsonstream.py — streaming reader for the big MetaIS JSON dumps
+#
+# json.load on a multi-hundred-MB *_raw.json builds the whole document as Python dicts
+# (several GB of RSS). Everything in here reads the file in chunks and yields one array
+# element at a time, so memory stays at "one node" no matter how big the dump is.
+#
+#   iter_result_items(path)    nodes of a raw dump: doc["result"][i]  (or doc[i] for a plain list)
+#   iter_relation_rows(path)   rows of a TABLE:     doc["result"]["rows"][i]
+#   read_value(path, keys)     one (small) value, e.g. read_value(p, ["result", "headers"])
+#   iter_result_spans(path)    (byte offset, byte length, node) of each node - see uuid_index.py
+#
+# Uses ijson when it is installed; otherwise a small hand-written scanner that skips
+# unwanted values without building them and decodes each wanted element with the stdlib
+# JSON decoder.
+import json
+from typing import Any, Iterator, List, Sequence, Tuple
+
+try:
+    import ijson  # optional, faster C backend
+except ImportError:
+    ijson = None
+
+CHUNK = 1 << 20
+_WS = " \t\n\r"
+_NUM = "0123456789.eE+-"  # characters that can continue a number
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.base = 0  # file offset of buf[0] (in characters)
+        self.eof = False
+
+    # ---- buffer management ----
+    def _fill(self, size: int = CHUNK) -> bool:
+        if self.eof:
+            return False
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.base += self.pos
+            self.pos = 0
+        data = self.f.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf += data
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"Malformed JSON: expected '{ch}', got '{got or 'EOF'}'")
+        self.pos += 1
+
+    # ---- values ----
+    def decode(self) -> Any:
+        # Decode one complete value. If the buffer ends inside it, read more (doubling the
+        # read size, so a large value costs O(n) and not O(n^2)) and try again.
+        self.peek()
+        size = CHUNK
+        while True:
+            try:
+                val, end = _decoder.raw_decode(self.buf, self.pos)
+                # A scalar cut by the buffer edge decodes as a shorter value ("12." -> 12,
+                # "1e" -> 1, "tru" fails): accept it only once a delimiter or EOF follows.
+                if self.eof or self.buf[self.pos] in '"[{' or (end < len(self.buf) and self.buf[end] not in _NUM):
+                    self.pos = end
+                    return val
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(size)
+            size = min(size * 2, 1 << 28)
+
+    def skip(self) -> None:
+        # Skip one value without building it (tracks nesting and string escapes).
+        ch = self.peek()
+        if ch not in "[{":
+            self.decode()  # scalar, small
+            return
+        depth = 0
+        in_str = esc = False
+        while True:
+            buf, i, n = self.buf, self.pos, len(self.buf)
+            while i < n:
+                c = buf[i]
+                i += 1
+                if in_str:
+                    if esc:
+                        esc = False
+                    elif c == "\\":
+                        esc = True
+                    elif c == '"':
+                        in_str = False
+                elif c == '"':
+                    in_str = True
+                elif c in "[{":
+                    depth += 1
+                elif c in "]}":
+                    depth -= 1
+                    if depth == 0:
+                        self.pos = i
+                        return
+            self.pos = i
+            if not self._fill():
+                raise ValueError("Malformed JSON: unexpected EOF while skipping a value")
+
+    # ---- navigation ----
+    def enter(self, keys: Sequence[str]) -> None:
+        # Position the reader at the value under doc[keys[0]][keys[1]]...
+        for key in keys:
+            self.expect("{")
+            while True:
+                if self.peek() == "}":
+                    raise KeyError(key)
+                name = self.decode()
+                self.expect(":")
+                if name == key:
+                    break
+                self.skip()
+                if self.peek() == ",":
+                    self.pos += 1
+
+    def items(self, spans: bool = False) -> Iterator[Any]:
+        # Iterate the array at the current position.
+        # spans=True yields (offset, length, value) with offsets in characters from the file start.
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            if spans:
+                self.peek()
+                start = self.base + self.pos
+                val = self.decode()
+                yield start, self.base + self.pos - start, val
+            else:
+                yield self.decode()
+            ch = self.peek()
+            self.pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise ValueError(f"Malformed JSON: expected ',' or ']' in array, got '{ch or 'EOF'}'")
+
+
+def _first_char(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return _Reader(f).peek()
+
+def iter_array(path: str, keys: Sequence[str]) -> Iterator[Any]:
+    # Yield the elements of the array found under keys (empty keys = top-level array).
+    if ijson:
+        with open(path, "rb") as f:
+            yield from ijson.items(f, ".".join(list(keys) + ["item"]), use_float=True)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        r = _Reader(f)
+        try:
+            r.enter(keys)
+        except KeyError as e:
+            raise ValueError(f"{path}: no '{e.args[0]}' key on path {'.'.join(keys)}")
+        yield from r.items()
+
+def read_value(path: str, keys: Sequence[str]) -> Any:
+    # Read one value (meant for small things like result.headers or totalCount).
+    with open(path, "r", encoding="utf-8") as f:
+        r = _Reader(f)
+        r.enter(keys)
+        return r.decode()
+
+def iter_result_items(path: str) -> Iterator[Any]:
+    # Raw dumps are an envelope {"page", "perPage", "result": [...], "totalCount", "type"}
+    # or (older dumps) a plain list; same two shapes get_result_array accepts.
+    if _first_char(path) == "[":
+        return iter_array(path, [])
+    return iter_array(path, ["result"])
+
+def iter_result_spans(path: str) -> Iterator[Tuple[int, int, Any]]:
+    # Like iter_result_items, plus where each node sits in the file: (byte offset, byte length, node).
+    # The file is read as latin-1 so that character offsets are byte offsets; the cost is that
+    # non-ASCII text inside the nodes comes out garbled. Meant for ASCII fields like the uuid -
+    # read the span again (and decode it as UTF-8) for the rest.
+    keys = [] if _first_char(path) == "[" else ["result"]
+    with open(path, "r", encoding="latin-1", newline="") as f:
+        r = _Reader(f)
+        try:
+            r.enter(keys)
+        except KeyError as e:
+            raise ValueError(f"{path}: no '{e.args[0]}' key on path {'.'.join(keys)}")
+        yield from r.items(spans=True)
+
+def iter_relation_rows(path: str) -> Iterator[Any]:
+    return iter_array(path, ["result", "rows"])
+
+def read_headers(path: str) -> List[Any]:
+    return read_value(path, ["result", "headers"])
\ No newline at end of file
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# manifest.py — per-batch job manifest so an interrupted run can be resumed
+#
+# raw_reports.py / raw_relations.py append one JSON line per finished job:
+#   {"key": "KS", "status": "ok", "out": "output/nodes/KS_raw.json", "bytes": 123,
+#    "sha256": "...", "duration": 4.2, "at": "2025-01-01T10:00:00+00:00", "spec": {...}}
+# to output/manifests/<batch>.jsonl (the last line for a key wins). A new run starts a
+# fresh manifest; with --resume the old one is kept and jobs whose last record is "ok"
+# and whose output is still on disk with the recorded size are skipped. Failed jobs and
+# jobs that never finished (no line at all) are queued again.
+#
+# Outputs only ever appear complete (metais_client and core.sh write to a temp file and
+# rename), so a job killed mid-download has neither an "ok" line nor a partial file.
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+DIR_MANIFESTS = os.getenv("METAIS_MANIFEST_DIR", "output/manifests")
+
+Worker = Callable[[Any, int, int], Tuple[bool, List[str]]]
+
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _written(lines: List[str]) -> Optional[str]:
+    # first "Wrote: path" line of a job's output (the JSON; run.sh may add a CSV after it)
+    for line in lines:
+        if line.startswith("Wrote:"):
+            return line[len("Wrote:"):].strip()
+    return None
+
+
+class Manifest:
+    def __init__(self, name: str, resume: bool = False, directory: str = DIR_MANIFESTS):
+        self.path = os.path.join(directory, f"{name}.jsonl")
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        if resume:
+            self.records = self.load(self.path)
+        else:
+            open(self.path, "w", encoding="utf-8").close()
+
+    @staticmethod
+    def load(path: str) -> Dict[str, Dict[str, Any]]:
+        records: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(path):
+            return records
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line of a killed run
+                records[rec["key"]] = rec
+        return records
+
+    def done(self, key: str) -> bool:
+        rec = self.records.get(key)
+        if not rec or rec.get("status") != "ok":
+            return False
+        out = rec.get("out")
+        return not out or (os.path.exists(out) and os.path.getsize(out) == rec.get("bytes"))
+
+    def pending(self, items: Iterable[Any], key: Callable[[Any], str]) -> List[Any]:
+        return [it for it in items if not self.done(key(it))]
+
+    def record(self, key: str, ok: bool, lines: List[str], duration: float, spec: Any = None) -> None:
+        rec: Dict[str, Any] = {"key": key, "status": "ok" if ok else "failed"}
+        out = _written(lines) if ok else None
+        if out and os.path.exists(out):
+            rec.update(out=out, bytes=os.path.getsize(out), sha256=sha256_file(out))
+        rec["duration"] = round(duration, 3)
+        rec["at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        if spec is not None and not isinstance(spec, str):
+            rec["spec"] = spec
+        line = json.dumps(rec, ensure_ascii=False)
+        with self._lock:
+            self.records[key] = rec
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def track(self, worker: Worker, key: Callable[[Any], str]) -> Worker:
+        # Wrap a batch worker so every finished job is recorded.
+        def run(item, idx, total):
+            t0 = time.monotonic()
+            try:
+                ok, lines = worker(item, idx, total)
+            except Exception:
+                self.record(key(item), False, [], time.monotonic() - t0, item)
+                raise
+            self.record(key(item), ok, lines, time.monotonic() - t0, item)
+            return ok, lines
+        return run
+
+    def track_chunks(self, worker: Worker, key: Callable[[Any], str], out_path: Callable[[Any], str]) -> Worker:
+        # Same for workers that take a list of items (bulk requests): one record per item,
+        # "ok" if the worker printed a "Wrote:" line for that item's output file.
+        # Returns (items ok, lines), for batch.run_batch(..., size=len).
+        def run(chunk, idx, total):
+            t0 = time.monotonic()
+            lines: List[str] = []
+            n_ok = 0
+            try:
+                _, lines = worker(chunk, idx, total)
+            finally:
+                wrote = {os.path.normpath(line[len("Wrote:"):].strip()) for line in lines if line.startswith("Wrote:")}
+                for item in chunk:
+                    p = out_path(item)
+                    done = os.path.normpath(p) in wrote
+                    n_ok += done
+                    self.record(key(item), done, [f"Wrote: {p}"] if done else [], time.monotonic() - t0, item)
+            return n_ok, lines
+        return run
+
+
+def add_resume_arg(ap) -> None:
+    ap.add_argument("--resume", action="store_true",
+                    help=f"Skip jobs the last run finished (per {DIR_MANIFESTS}/<batch>.jsonl); "
+                         "re-run only failed or missing ones.")
+
+def prepare(name: str, items: List[Any], key: Callable[[Any], str], resume: bool) -> Tuple[Manifest, List[Any]]:
+    # -> (manifest, items still to run); prints what --resume skipped
+    m = Manifest(name, resume=resume)
+    if not resume:
+        return m, items
+    todo = m.pending(items, key)
+    print(f"[INFO] Resuming from {m.path}: {len(items) - len(todo)} done, {len(todo)} to go.")
+    return m, todo
\ No newline at end of file
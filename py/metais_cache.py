@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# metais_cache.py — on-disk cache of MetaIS report responses
+#
+# Every report POST is keyed by sha256 of (API URL, payload), where the payload is the
+# {body, parameters, page?, perPage?} JSON that core.sh / metais_client.py send - so the
+# rendered Groovy body, params.json, page and perPage all take part in the key. GET
+# listings (get_json) are keyed by their URL; the type lists (citypes, relationshiptypes)
+# have their own catalog with ETag revalidation, see schema_catalog.py.
+#   output/cache/<k[:2]>/<key>.json     (mtime = when it was fetched, atime = last used)
+#   output/cache/.size                  running size total, so a store doesn't walk the cache
+# Entries are hard links to the outputs they were stored from / served to (outputs and
+# entries are only ever replaced by a rename, never rewritten in place); a copy where
+# links don't work (another filesystem).
+#
+# Knobs (env, or the --refresh / --offline switches of run.sh and the python scripts):
+#   METAIS_CACHE_MODE    ""       use the cache, fetch on a miss or when expired (default)
+#                        refresh  always fetch, store the fresh response
+#                        offline  never touch the network; any cached age is fine, miss = error
+#                        off      bypass the cache completely
+#   METAIS_CACHE_TTL     seconds a response stays fresh (default 3600)
+#   METAIS_CACHE_MAX_MB  size bound; least recently used entries are evicted (default 1024)
+#   METAIS_CACHE_DIR     default output/cache in the repo
+#
+# Usage:
+#   python3 py/metais_cache.py stats
+#   python3 py/metais_cache.py clear
+#   python3 py/metais_cache.py lookup --url URL --payload payload.json --out OUT.json   (used by core.sh)
+#   python3 py/metais_cache.py store  --url URL --payload payload.json --file OUT.json
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.getenv("METAIS_CACHE_DIR", os.path.join(ROOT, "output", "cache"))
+TTL = float(os.getenv("METAIS_CACHE_TTL", "3600"))
+MAX_BYTES = int(float(os.getenv("METAIS_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+EVICT_TO = 0.8  # an eviction goes down to this share of MAX_BYTES, so the next one is far off
+MODES = ("", "refresh", "offline", "off")
+MODE = os.getenv("METAIS_CACHE_MODE", "")
+
+_lock = threading.Lock()
+
+
+class CacheMiss(RuntimeError):
+    # raised in offline mode when there is nothing cached for a request
+    pass
+
+
+def set_mode(mode: str) -> None:
+    global MODE
+    if mode not in MODES:
+        raise ValueError(f"Unknown cache mode: {mode!r} (expected one of {MODES})")
+    MODE = mode
+    os.environ["METAIS_CACHE_MODE"] = mode  # so run/raw.sh, run/relation.sh subprocesses follow
+
+def add_cache_args(ap) -> None:
+    g = ap.add_mutually_exclusive_group()
+    g.add_argument("--refresh", action="store_const", dest="cache_mode", const="refresh",
+                   help="Ignore cached responses and fetch again (the fresh ones are cached).")
+    g.add_argument("--offline", action="store_const", dest="cache_mode", const="offline",
+                   help="Only use cached responses; fail instead of calling the API.")
+
+def apply_args(args) -> None:
+    if getattr(args, "cache_mode", None):
+        set_mode(args.cache_mode)
+
+
+# ------------------------------ Keys & paths ------------------------------
+def report_key(url: str, payload: Dict[str, Any]) -> str:
+    canon = json.dumps({"url": url, "payload": payload}, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+def get_key(url: str) -> str:
+    return hashlib.sha256(f"GET {url}".encode("utf-8")).hexdigest()
+
+def _path(key: str) -> str:
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.json")
+
+
+# ------------------------------ Lookup / store ------------------------------
+def lookup(key: str) -> Optional[str]:
+    # Path of a usable cached response, or None. Offline mode accepts any age.
+    if MODE in ("off", "refresh"):
+        return None
+    path = _path(key)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        if MODE == "offline":
+            raise CacheMiss(f"offline: no cached response (key {key[:12]})")
+        return None
+    if MODE != "offline" and TTL >= 0 and time.time() - st.st_mtime > TTL:
+        return None
+    try:
+        os.utime(path, (time.time(), st.st_mtime))  # touch atime = LRU order, keep mtime = fetch time
+    except OSError:
+        pass
+    return path
+
+def copy_to(src: str, out_path: str) -> int:
+    # atomic copy (temp file + rename), like every other writer here
+    out_dir = os.path.dirname(out_path) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=".tmp_", suffix=".json")
+    try:
+        with os.fdopen(fd, "wb") as f, open(src, "rb") as s:
+            shutil.copyfileobj(s, f)
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return os.path.getsize(out_path)
+
+def link_to(src: str, out_path: str) -> int:
+    # Like copy_to, but out_path becomes a hard link to src: no bytes are written.
+    out_dir = os.path.dirname(out_path) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = os.path.join(out_dir, f".tmp_{uuid.uuid4().hex}.json")
+    try:
+        os.link(src, tmp)
+    except OSError:
+        return copy_to(src, out_path)  # another filesystem, or no hard links there
+    try:
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return os.path.getsize(out_path)
+
+def store(key: str, src: str) -> None:
+    if MODE == "off":
+        return
+    size = os.path.getsize(src)
+    if size > MAX_BYTES // 4:
+        return  # one huge dump shouldn't flush the whole cache
+    path = _path(key)
+    try:
+        old = os.path.getsize(path)
+    except OSError:
+        old = 0
+    link_to(src, path)
+    with _lock:
+        total = _read_total()
+        if total is None:
+            total = _walk()[1]
+        else:
+            total += size - old
+        if total > MAX_BYTES:
+            _evict(int(MAX_BYTES * EVICT_TO))
+        else:
+            _write_total(total)
+
+# The total is a hint: parallel run/core.sh processes may race on it. Every eviction
+# recounts it from the files.
+def _size_path() -> str:
+    return os.path.join(CACHE_DIR, ".size")
+
+def _read_total() -> Optional[int]:
+    try:
+        with open(_size_path(), "r", encoding="utf-8") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def _write_total(total: int) -> None:
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, prefix=".tmp_", suffix=".size")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(str(max(0, total)))
+            os.replace(tmp, _size_path())
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    except OSError:
+        pass  # recounted at the next eviction
+
+def _walk() -> Tuple[List[Tuple[float, int, str]], int]:
+    # -> ([(atime, size, path)] of every entry, total bytes); dot files (.size, temp files) aren't entries
+    entries = []
+    total = 0
+    for dirpath, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            if name.startswith("."):
+                continue
+            p = os.path.join(dirpath, name)
+            try:
+                st = os.stat(p)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_atime, st.st_size, p))
+            total += st.st_size
+    return entries, total
+
+def _evict(max_bytes: int) -> int:
+    entries, total = _walk()
+    freed = 0
+    for _, size, p in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(p)
+        except FileNotFoundError:
+            pass
+        total -= size
+        freed += size
+    _write_total(total)
+    return freed
+
+def evict(max_bytes: Optional[int] = None) -> int:
+    # Drop least recently used entries until the cache fits; returns bytes freed.
+    with _lock:
+        return _evict(MAX_BYTES if max_bytes is None else max_bytes)
+
+def get_json(url: str, fetch: Callable[[], Any]) -> Any:
+    # Cached GET of a JSON listing: fetch() does the actual request and returns parsed JSON.
+    key = get_key(url)
+    path = lookup(key)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    data = fetch()
+    if MODE != "off":
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            store(key, tmp)
+        finally:
+            os.remove(tmp)
+    return data
+
+
+# ------------------------------ CLI ------------------------------
+def _stats() -> None:
+    n = total = 0
+    oldest = None
+    for dirpath, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            if name.startswith("."):
+                continue
+            st = os.stat(os.path.join(dirpath, name))
+            n += 1
+            total += st.st_size
+            oldest = st.st_mtime if oldest is None else min(oldest, st.st_mtime)
+    print(f"Cache dir:  {CACHE_DIR}")
+    print(f"Entries:    {n}")
+    print(f"Size:       {total / 1024 / 1024:.1f} MB of {MAX_BYTES / 1024 / 1024:.0f} MB")
+    print(f"TTL:        {TTL:.0f}s")
+    if oldest is not None:
+        print(f"Oldest:     {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(oldest))}")
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="On-disk cache of MetaIS report responses.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats", help="Show cache size and entry count")
+    sub.add_parser("clear", help="Delete every cached response")
+    for name in ("lookup", "store"):
+        p = sub.add_parser(name, help=f"{name} a report response (used by run/core.sh)")
+        p.add_argument("--url", required=True, help="API endpoint")
+        p.add_argument("--payload", required=True, help="Payload JSON file ({body, parameters, page?, perPage?})")
+        if name == "lookup":
+            p.add_argument("--out", required=True, help="Where to copy the cached response on a hit")
+        else:
+            p.add_argument("--file", required=True, help="Response file to store")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "stats":
+        _stats()
+        return 0
+    if args.cmd == "clear":
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        print(f"Cleared: {CACHE_DIR}")
+        return 0
+
+    with open(args.payload, "r", encoding="utf-8") as f:
+        key = report_key(args.url, json.load(f))
+    if args.cmd == "store":
+        store(key, args.file)
+        return 0
+
+    # lookup: exit 0 = hit (copied to --out), 1 = miss, 2 = miss in offline mode
+    try:
+        path = lookup(key)
+    except CacheMiss as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    if not path:
+        return 1
+    link_to(path, args.out)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# metais_client.py — in-process MetaIS report client
+#
+# Does what run/raw.sh / run/relation.sh → run.sh → core.sh do, without the
+# sed / jq / curl subprocess chain:
+#   - renders groovy/templates/extract_*_template.groovy (replaces __PLACEHOLDER__ tokens)
+#   - POSTs {body, parameters, page?, perPage?} to /api/report/reports/run
+#     through a keep-alive requests.Session (one per thread)
+#   - streams the response body straight into output/nodes or output/relations
+#     (temp file + rename, so a failed download never leaves a half-written file)
+#   - answers repeated requests from the on-disk response cache (metais_cache.py;
+#     --refresh / --offline)
+#   - records render / server / transfer / validate / write spans per type or relation
+#     when METAIS_METRICS (--metrics) is set, see metrics.py
+#
+# Usage (same arguments as the shell wrappers):
+#   python3 py/metais_client.py raw KS
+#   python3 py/metais_client.py raw Projekt --paged -P 2000      (page-by-page, pages fetched in parallel)
+#   python3 py/metais_client.py relation KS PO je_gestor
+#   python3 py/metais_client.py relation Projekt Projekt asociuje Projekt_je_asociovany_s_projektom
+#   python3 py/metais_client.py relations KS:PO:PO_je_gestor_KS KS:AS:AS_sluzi_KS   (one request, split per relation)
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import batch
+import metais_cache
+import metrics
+import retry
+from jsonstream import iter_relation_rows, read_headers, read_value
+
+API_URL = os.getenv("METAIS_API_URL", "https://metais-test.slovensko.sk/api/report/reports/run?lang=sk")
+PARAMS_PATH = os.getenv("METAIS_PARAMS", "params/params.json")
+TEMPLATE_DIR = "groovy/templates"
+RAW_TEMPLATE = os.path.join(TEMPLATE_DIR, "extract_raw_template.groovy")
+RAW_PAGED_TEMPLATE = os.path.join(TEMPLATE_DIR, "extract_raw_paged_template.groovy")
+REL_TEMPLATE = os.path.join(TEMPLATE_DIR, "extract_relation_template.groovy")
+REL_BULK_TEMPLATE = os.path.join(TEMPLATE_DIR, "extract_relations_bulk_template.groovy")
+DIR_NODES = "output/nodes"
+DIR_RELATIONS = "output/relations"
+
+CONNECT_TIMEOUT = float(os.getenv("METAIS_CONNECT_TIMEOUT", "10"))
+REPORT_TIMEOUT = float(os.getenv("METAIS_REPORT_TIMEOUT", "900"))  # read timeout; big types are slow
+INSECURE = os.getenv("RUN_INSECURE", "0") not in ("0", "", "false", "no")
+CHUNK = 1 << 16
+
+# Paged raw extraction: METAIS_PER_PAGE > 0 switches raw_reports.py to page-by-page downloads
+PER_PAGE = int(os.getenv("METAIS_PER_PAGE", "0"))
+DEFAULT_PER_PAGE = 5000
+PAGE_JOBS = int(os.getenv("METAIS_PAGE_JOBS", "4"))
+
+# Bulk relation extraction: relation types per request in raw_relations.py (0 = one request each)
+REL_BULK = int(os.getenv("METAIS_REL_BULK", "0"))
+
+# Same hints core.sh prints for failed requests
+HTTP_HINTS = {
+    401: "Hint: your TOKEN may be missing/expired/wrong audience.",
+    403: "Hint: your TOKEN may be missing/expired/wrong audience.",
+    400: "Hint: payload likely malformed (check script.groovy and params.json).",
+    404: "Hint: endpoint may differ between test/prod or lang param.",
+}
+
+
+class MetaisError(RuntimeError):
+    # status is the HTTP status code, or None for non-HTTP failures (bad JSON, ...)
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+# --------------------------------------- Templates ---------------------------------------
+def render_template(path: str, **subs: str) -> str:
+    # render_template(RAW_TEMPLATE, TYPE="KS") replaces every __TYPE__ with KS
+    with open(path, "r", encoding="utf-8") as f:
+        body = f.read()
+    for key, val in subs.items():
+        body = body.replace(f"__{key}__", val)
+    return body
+
+def render_raw(type_name: str) -> str:
+    return render_template(RAW_TEMPLATE, TYPE=type_name)
+
+def render_raw_paged(type_name: str) -> str:
+    return render_template(RAW_PAGED_TEMPLATE, TYPE=type_name)
+
+# Mirrors run/relation.sh: the report is saved as OUTER_REL_CENTRAL, and the relation
+# type defaults to the same name unless an explicit technical name (override) is given.
+def relation_base(central: str, outer: str, verb: str) -> str:
+    return f"{outer}_{verb}_{central}"
+
+def render_relation(central: str, outer: str, verb: str, override: str = "") -> str:
+    return render_template(REL_TEMPLATE, CENTRAL=central, OUTER=outer,
+                           RELATION=override or relation_base(central, outer, verb))
+
+# --------------------------------------- HTTP ---------------------------------------
+_local = threading.local()
+
+def get_session() -> requests.Session:
+    # One keep-alive session per thread (the batch runner calls us from a thread pool).
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = requests.Session()
+        s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        s.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        s.verify = not INSECURE
+        _local.session = s
+    return s
+
+_params_cache: Dict[str, Any] = {}
+
+def load_params(path: str = PARAMS_PATH) -> Any:
+    if path not in _params_cache:
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                _params_cache[path] = json.load(f)
+            except json.JSONDecodeError as e:
+                raise MetaisError(f"{path} is not valid JSON ({e})")
+    return _params_cache[path]
+
+def build_payload(body: str, params: Any, page: Optional[int] = None, per_page: Optional[int] = None) -> Dict[str, Any]:
+    payload = {"body": body, "parameters": params}
+    if page is not None:
+        payload["page"] = page
+    if per_page is not None:
+        payload["perPage"] = per_page
+    return payload
+
+def _looks_like_json(path: str) -> bool:
+    # Cheap sanity check instead of a full re-parse: first and last non-blank bytes
+    # must be a matching {} / [] pair (catches HTML error pages and truncated bodies).
+    size = os.path.getsize(path)
+    if size == 0:
+        return False
+    with open(path, "rb") as f:
+        head = f.read(min(size, 64)).lstrip()
+        f.seek(max(0, size - 64))
+        tail = f.read().rstrip()
+    if not head or not tail:
+        return False
+    return (head[:1], tail[-1:]) in ((b"{", b"}"), (b"[", b"]"))
+
+def _error_text(resp: requests.Response) -> str:
+    text = resp.text or ""
+    if not text:
+        return "(empty response body)"
+    try:
+        return json.dumps(resp.json(), ensure_ascii=False, indent=2)
+    except ValueError:
+        return text
+
+def post_report(body: str, out_path: str, params: Any = None, page: Optional[int] = None,
+                per_page: Optional[int] = None, api_url: str = API_URL, item: str = "") -> int:
+    # POST one report and stream the JSON response into out_path. Returns bytes written.
+    # item labels the metrics spans (type / relation name; default: the output file name)
+    if params is None:
+        params = load_params()
+    payload = build_payload(body, params, page, per_page)
+    item = item or os.path.splitext(os.path.basename(out_path))[0]
+
+    cache_key = metais_cache.report_key(api_url, payload)
+    try:
+        cached = metais_cache.lookup(cache_key)
+    except metais_cache.CacheMiss as e:
+        raise MetaisError(f"{e} for {os.path.basename(out_path)}")
+    if cached:
+        with metrics.span("cache", item=item, page=page) as m:
+            m["bytes"] = metais_cache.link_to(cached, out_path)
+        return m["bytes"]
+
+    token = os.getenv("TOKEN")
+    if not token:
+        raise MetaisError("TOKEN env var is required")
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+    out_dir = os.path.dirname(out_path) or "."
+    os.makedirs(out_dir, exist_ok=True)
+
+    # The host slot is taken per request, so nested parallelism (types x pages) still
+    # never puts more than METAIS_PER_HOST requests on the endpoint.
+    with batch.host_slot(api_url):
+        t0 = time.perf_counter()
+        with get_session().post(api_url, json=payload, headers=headers, stream=True,
+                                timeout=(CONNECT_TIMEOUT, REPORT_TIMEOUT)) as resp:
+            # headers are in: the report has run on the server
+            metrics.emit("server", time.perf_counter() - t0, item=item, page=page, status=resp.status_code)
+            written = _receive(resp, out_path, api_url, item, page)
+    with metrics.span("write", item=item, page=page):
+        metais_cache.store(cache_key, out_path)
+    return written
+
+def _receive(resp: requests.Response, out_path: str, api_url: str, item: str, page: Optional[int]) -> int:
+    # status check + body download of post_report (the host slot is still held)
+    out_dir = os.path.dirname(out_path) or "."
+    if resp.status_code != 200:
+        msg = f"HTTP ERROR: {resp.status_code} from {api_url}\n------ Server response ------\n{_error_text(resp)}"
+        hint = HTTP_HINTS.get(resp.status_code)
+        if hint:
+            msg += "\n" + hint
+        raise MetaisError(msg, status=resp.status_code)
+
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=".tmp_", suffix=".json")
+    try:
+        with metrics.span("transfer", item=item, page=page) as m:
+            written = 0
+            with os.fdopen(fd, "wb") as f:
+                for chunk in resp.iter_content(chunk_size=CHUNK):
+                    f.write(chunk)
+                    written += len(chunk)
+            m["bytes"] = written
+        with metrics.span("validate", item=item, page=page):
+            ok = _looks_like_json(tmp)
+        if not ok:
+            with open(tmp, "rb") as f:
+                head = f.read(200).decode("utf-8", "replace")
+            raise MetaisError("API returned non-JSON despite 200 OK. Refusing to write "
+                              f"{out_path}.\n------ Response (first 200 chars) ------\n{head}")
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return written
+
+# --------------------------------------- Extractions ---------------------------------------
+def extract_raw(type_name: str, outdir: str = DIR_NODES, **kw) -> str:
+    out_path = os.path.join(outdir, f"{type_name}_raw.json")
+    with metrics.span("render", item=type_name):
+        body = render_raw(type_name)
+    post_report(body, out_path, item=type_name, **kw)
+    return out_path
+
+# -------- Paged raw extraction --------
+# Page 1 tells us totalCount; the remaining pages are fetched in parallel, each with its
+# own retry loop, so a timeout only costs one page instead of the whole type. Pages land
+# in a scratch dir next to the output and are merged into the usual
+# {page, perPage, result, totalCount, type} envelope (what get_result_array expects).
+def _fetch_page(body: str, path: str, page: int, per_page: int, **kw) -> None:
+    try:
+        retry.call(f"page {page}", lambda: post_report(body, path, page=page, per_page=per_page, **kw))
+    except retry.ERRORS as e:
+        raise MetaisError(f"page {page}: {e}", status=retry.status_of(e))
+
+def _page_items(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    items = doc.get("result") if isinstance(doc, dict) else doc
+    if not isinstance(items, list):
+        raise MetaisError(f"{path}: expected a 'result' list in paged RAW response")
+    return items
+
+def merge_pages(page_paths: List[str], out_path: str, typ: str = "RAW") -> int:
+    # Stream page after page into one envelope; only one page is in memory at a time.
+    # Nodes are deduplicated by uuid in case the data shifted between page requests.
+    out_dir = os.path.dirname(out_path) or "."
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=".tmp_", suffix=".json")
+    seen = set()
+    count = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write('{"page": null, "perPage": null, "result": [')
+            for p in page_paths:
+                for item in _page_items(p):
+                    u = item.get("uuid")
+                    if u:
+                        if u in seen:
+                            continue
+                        seen.add(u)
+                    if count:
+                        f.write(",")
+                    json.dump(item, f, ensure_ascii=False)
+                    count += 1
+            f.write(f'], "totalCount": {count}, "type": {json.dumps(typ)}}}')
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return count
+
+def extract_raw_paged(type_name: str, per_page: int = 0, jobs: int = PAGE_JOBS,
+                      outdir: str = DIR_NODES, **kw) -> str:
+    per_page = per_page or PER_PAGE or DEFAULT_PER_PAGE
+    out_path = os.path.join(outdir, f"{type_name}_raw.json")
+    with metrics.span("render", item=type_name):
+        body = render_raw_paged(type_name)
+    kw["item"] = type_name
+    os.makedirs(outdir, exist_ok=True)
+    page_dir = tempfile.mkdtemp(dir=outdir, prefix=f".{type_name}_pages_")
+    try:
+        first = os.path.join(page_dir, "page_1.json")
+        _fetch_page(body, first, 1, per_page, **kw)
+        with open(first, "r", encoding="utf-8") as f:
+            head = json.load(f)
+        total = int(head.get("totalCount") or 0)
+        typ = head.get("type") or "RAW"
+        del head
+
+        n_pages = max(1, -(-total // per_page))
+        paths = [first] + [os.path.join(page_dir, f"page_{n}.json") for n in range(2, n_pages + 1)]
+        if n_pages > 1:
+            with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+                futures = [pool.submit(_fetch_page, body, paths[n - 1], n, per_page, **kw)
+                           for n in range(2, n_pages + 1)]
+                for fut in futures:
+                    fut.result()
+
+        with metrics.span("merge", item=type_name, pages=n_pages) as m:
+            written = merge_pages(paths, out_path, typ)
+            m["bytes"] = os.path.getsize(out_path)
+        if written != total:
+            print(f"[WARN] {type_name}: server reported {total} nodes, merged {written} "
+                  "(data changed during download?)", file=sys.stderr)
+    finally:
+        shutil.rmtree(page_dir, ignore_errors=True)
+    return out_path
+
+def extract_relation(central: str, outer: str, verb: str, override: str = "",
+                     outdir: str = DIR_RELATIONS, **kw) -> str:
+    base = relation_base(central, outer, verb)
+    out_path = os.path.join(outdir, f"{base}.json")
+    with metrics.span("render", item=base):
+        body = render_relation(central, outer, verb, override)
+    post_report(body, out_path, item=base, **kw)
+    return out_path
+
+# -------- Bulk relation extraction --------
+# One request for many relation types (extract_relations_bulk_template.groovy). The server
+# returns one TABLE with the relation type in column 0; it is split back into the usual
+# per-relation files (same shape and names as extract_relation writes), streaming, with one
+# open temp file per relation of the request.
+def split_relations_bulk(path: str, relations: List[str], out_paths: List[str]) -> Dict[str, int]:
+    # -> rows written per relation
+    headers = (read_headers(path) or [])[1:]
+    head = json.dumps(headers, ensure_ascii=False)
+    files: Dict[str, Any] = {}
+    counts: Dict[str, int] = {}
+    tmps: List[str] = []
+    try:
+        for rel, out_path in zip(relations, out_paths):
+            out_dir = os.path.dirname(out_path) or "."
+            os.makedirs(out_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=".tmp_", suffix=".json")
+            tmps.append(tmp)
+            f = os.fdopen(fd, "w", encoding="utf-8")
+            f.write(f'{{"type": "TABLE", "result": {{"headers": {head}, "rows": [')
+            files[rel] = f
+            counts[rel] = 0
+        unknown = 0
+        for row in iter_relation_rows(path):
+            vals = row.get("values", [])
+            f = files.get(vals[0]) if vals else None
+            if f is None:
+                unknown += 1
+                continue
+            if counts[vals[0]]:
+                f.write(",")
+            json.dump({"values": vals[1:]}, f, ensure_ascii=False)
+            counts[vals[0]] += 1
+        for rel, f in files.items():
+            f.write(f']}}, "totalCount": {counts[rel]}}}')
+            f.close()
+        for tmp, out_path in zip(tmps, out_paths):
+            os.replace(tmp, out_path)
+        if unknown:
+            print(f"[WARN] bulk relations: skipped {unknown} rows of relation types that were not requested",
+                  file=sys.stderr)
+    finally:
+        for f in files.values():
+            f.close()
+        for tmp in tmps:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    return counts
+
+def extract_relations_bulk(triplets: List[Any], outdir: str = DIR_RELATIONS, count: bool = False,
+                           bases: Optional[List[str]] = None, params: Any = None, **kw) -> List[str]:
+    # triplets: [(central, outer, relation type name), ...]; bases: output file names
+    # (default: the relation type name; raw_relations passes relation_base() like extract_relation).
+    # count=True also runs the count() query per relation and checks it against the rows.
+    relations = [rel for _, _, rel in triplets]
+    bases = bases or relations
+    out_paths = [os.path.join(outdir, f"{b}.json") for b in bases]
+    params = dict(load_params() if params is None else params or {})
+    params["relations"] = [{"central": c, "outer": o, "relation": r} for c, o, r in triplets]
+    params["count"] = count
+
+    os.makedirs(outdir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=outdir, prefix=".bulk_", suffix=".json")
+    os.close(fd)
+    # spans of the shared request are labelled with all its relations
+    item = "bulk[" + ",".join(bases) + "]"
+    try:
+        with metrics.span("render", item=item):
+            body = render_template(REL_BULK_TEMPLATE)
+        post_report(body, tmp, params=params, item=item, **kw)
+        with metrics.span("split", item=item, relations=len(relations)) as m:
+            counts = split_relations_bulk(tmp, relations, out_paths)
+            m["rows"] = sum(counts.values())
+        if count:
+            total = read_value(tmp, ["totalCount"])
+            if total != sum(counts.values()):
+                print(f"[WARN] bulk relations: server counted {total} rows, received {sum(counts.values())}",
+                      file=sys.stderr)
+    finally:
+        os.remove(tmp)
+    return out_paths
+
+# --------------------------------------- CLI ---------------------------------------
+def _common_args(ap: argparse.ArgumentParser, default_outdir: str) -> None:
+    ap.add_argument("-d", "--outdir", default=default_outdir, help=f"Output directory (default: {default_outdir}).")
+    ap.add_argument("-p", "--page", type=int, help="Page number (omit to exclude from payload).")
+    ap.add_argument("-P", "--per-page", type=int, help="Page size (omit to exclude from payload).")
+    ap.add_argument("-A", "--api", default=API_URL, help="Override API endpoint.")
+    ap.add_argument("--params", default=PARAMS_PATH, help="Parameters JSON file (default: params/params.json).")
+    ap.add_argument("-k", "--insecure", action="store_true", help="Allow insecure server connections.")
+    ap.add_argument("--no-csv", action="store_true", help="Accepted for run.sh compatibility; raw/relation dumps are never converted.")
+    metais_cache.add_cache_args(ap)
+    metrics.add_metrics_arg(ap)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Extract MetaIS raw node dumps and relation tables without the bash/jq/curl chain.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    ap_raw = sub.add_parser("raw", help="Raw export of one node type → output/nodes/<TYPE>_raw.json")
+    ap_raw.add_argument("type", help="Node type, e.g. KS")
+    ap_raw.add_argument("--paged", action="store_true",
+                        help=f"Download page by page (-P sets the page size, default {DEFAULT_PER_PAGE}) and merge.")
+    ap_raw.add_argument("--page-jobs", type=int, default=PAGE_JOBS,
+                        help=f"Pages fetched in parallel in --paged mode (default: {PAGE_JOBS}).")
+    _common_args(ap_raw, DIR_NODES)
+
+    ap_rel = sub.add_parser("relation", help="Relation table → output/relations/<OUTER>_<REL>_<CENTRAL>.json")
+    ap_rel.add_argument("central")
+    ap_rel.add_argument("outer")
+    ap_rel.add_argument("rel")
+    ap_rel.add_argument("override", nargs="?", default="", help="Full relation type name for irregular naming.")
+    _common_args(ap_rel, DIR_RELATIONS)
+
+    ap_bulk = sub.add_parser("relations", help="Several relation tables in one request → output/relations/<RELATION>.json")
+    ap_bulk.add_argument("triplets", nargs="+", metavar="CENTRAL:OUTER:RELATION")
+    ap_bulk.add_argument("--count", action="store_true", help="Also run the count query per relation and check it.")
+    _common_args(ap_bulk, DIR_RELATIONS)
+
+    args = ap.parse_args(argv)
+    metais_cache.apply_args(args)
+    metrics.apply_args(args)
+    if args.insecure:
+        # before any session exists: the paged workers open their own (verify = not INSECURE)
+        global INSECURE
+        INSECURE = True
+        os.environ["RUN_INSECURE"] = "1"
+
+    try:
+        kw = dict(params=load_params(args.params), page=args.page, per_page=args.per_page, api_url=args.api)
+        if args.cmd == "raw" and args.paged:
+            kw.pop("page")
+            out = extract_raw_paged(args.type, per_page=kw.pop("per_page") or 0, jobs=args.page_jobs,
+                                    outdir=args.outdir, **kw)
+        elif args.cmd == "raw":
+            out = extract_raw(args.type, outdir=args.outdir, **kw)
+        elif args.cmd == "relations":
+            triplets = [t.split(":") for t in args.triplets]
+            if any(len(t) != 3 or not all(t) for t in triplets):
+                ap.error("relations: expected CENTRAL:OUTER:RELATION triplets")
+            out = extract_relations_bulk(triplets, outdir=args.outdir, count=args.count, **kw)
+        else:
+            out = extract_relation(args.central, args.outer, args.rel, args.override, outdir=args.outdir, **kw)
+    except (MetaisError, requests.RequestException) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    for path in out if isinstance(out, list) else [out]:
+        print(f"Wrote: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# metrics.py — per-stage timing spans for the extraction and analysis pipeline
+#
+# With METAIS_METRICS=<file.jsonl> set (or --metrics FILE on the python scripts, which sets
+# it for run/*.sh subprocesses too), every stage appends one JSON line:
+#   {"ts": 1735725600.123, "stage": "server", "dur": 4.21, "pid": 4242, "src": "py",
+#    "item": "KS", "status": 200}
+# Unset = off; a span then costs one string check.
+#
+# Stages (item = node type, relation table or rule; bytes where something was moved):
+#   render     groovy template -> request body            (metais_client, core.sh)
+#   server     POST sent -> response headers / first byte (report execution on MetaIS)
+#   transfer   response body download, bytes              (curl -w timings in core.sh)
+#   validate   JSON sanity check of the response
+#   write      rename into place + response cache store
+#   cache      response served from output/cache
+#   schema     type list (citypes / relationshiptypes) fetched or revalidated (schema_catalog)
+#   merge      paged download merged into one dump
+#   split      bulk relation response split per relation
+#   convert    TABLE JSON -> CSV / Parquet (convert.py, called by run.sh)
+#   parse      dump / relation table loaded into the egov graph
+#   rule       one egov_rules check;  rows / report: building and writing the eGov report
+#
+# Appends are single O_APPEND writes, so threads, batch processes and core.sh can share a file.
+#
+# Usage:
+#   METAIS_METRICS=output/metrics.jsonl python3 py/raw_reports.py
+#   python3 py/metrics.py summary output/metrics.jsonl            (stage totals + slowest types/relations)
+#   python3 py/metrics.py summary output/metrics.jsonl --stage server --top 10
+#   python3 py/metrics.py prom output/metrics.jsonl > metais.prom (Prometheus text format)
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+PATH = os.getenv("METAIS_METRICS", "")
+
+
+def enabled() -> bool:
+    return bool(PATH)
+
+def set_path(path: str) -> None:
+    global PATH
+    PATH = path
+    os.environ["METAIS_METRICS"] = path  # so run/raw.sh, run/relation.sh subprocesses follow
+
+def add_metrics_arg(ap) -> None:
+    ap.add_argument("--metrics", metavar="FILE", default=None,
+                    help="Append per-stage timing spans to FILE (JSONL; env METAIS_METRICS). "
+                         "See python3 py/metrics.py summary FILE.")
+
+def apply_args(args) -> None:
+    if getattr(args, "metrics", None):
+        set_path(args.metrics)
+
+
+# ------------------------------ Emitting ------------------------------
+def emit(stage: str, dur: float, **fields: Any) -> None:
+    if not PATH:
+        return
+    rec = {"ts": round(time.time(), 3), "stage": stage, "dur": round(dur, 6), "pid": os.getpid(), "src": "py"}
+    rec.update((k, v) for k, v in fields.items() if v is not None)
+    line = (json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8")
+    try:
+        d = os.path.dirname(PATH)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        fd = os.open(PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        print(f"[WARN] metrics: could not write {PATH} ({e})", file=sys.stderr)
+
+@contextmanager
+def span(stage: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+    # with metrics.span("parse", item="KS") as m: ...; m["rows"] = n   (fields can be added inside)
+    if not PATH:
+        yield fields
+        return
+    t0 = time.perf_counter()
+    try:
+        yield fields
+    except BaseException:
+        fields["error"] = True
+        raise
+    finally:
+        emit(stage, time.perf_counter() - t0, **fields)
+
+
+# ------------------------------ Reading ------------------------------
+def load(path: str) -> List[Dict[str, Any]]:
+    recs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn line of a killed run
+            if isinstance(rec, dict) and "stage" in rec and isinstance(rec.get("dur"), (int, float)):
+                recs.append(rec)
+    return recs
+
+def _pct(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, max(0, math.ceil(q * len(sorted_vals)) - 1))]
+
+def stage_totals(recs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    durs: Dict[str, List[float]] = defaultdict(list)
+    nbytes: Dict[str, int] = defaultdict(int)
+    for r in recs:
+        durs[r["stage"]].append(r["dur"])
+        nbytes[r["stage"]] += int(r.get("bytes") or 0)
+    out = {}
+    for stage, vals in durs.items():
+        vals.sort()
+        out[stage] = {"count": len(vals), "total": sum(vals), "p50": _pct(vals, 0.5),
+                      "p95": _pct(vals, 0.95), "max": vals[-1], "bytes": nbytes[stage]}
+    return out
+
+def item_totals(recs: List[Dict[str, Any]], stage: str = "") -> Dict[str, Dict[str, float]]:
+    # item -> {stage: seconds, ..., "total": seconds}
+    items: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for r in recs:
+        item = r.get("item")
+        if not item or (stage and r["stage"] != stage):
+            continue
+        items[item][r["stage"]] += r["dur"]
+        items[item]["total"] += r["dur"]
+    return items
+
+
+# ------------------------------ CLI ------------------------------
+def print_summary(recs: List[Dict[str, Any]], top: int = 20, stage: str = "") -> None:
+    totals = stage_totals(recs)
+    if not totals:
+        print("No spans recorded.")
+        return
+    order = sorted(totals, key=lambda s: -totals[s]["total"])
+    print(f"{'Stage':12} {'Spans':>7} {'Total [s]':>10} {'p50 [s]':>9} {'p95 [s]':>9} {'Max [s]':>9} {'MB':>9}")
+    for s in order:
+        t = totals[s]
+        mb = f"{t['bytes'] / 1e6:9.1f}" if t["bytes"] else f"{'':9}"
+        print(f"{s:12} {t['count']:7} {t['total']:10.3f} {t['p50']:9.3f} {t['p95']:9.3f} {t['max']:9.3f} {mb}")
+
+    items = item_totals(recs, stage)
+    if not items:
+        return
+    cols = [s for s in order if (not stage or s == stage) and any(s in v for v in items.values())][:6]
+    ranked = sorted(items.items(), key=lambda kv: -kv[1]["total"])[:top]
+    width = max(30, min(60, max(len(k) for k, _ in ranked)))
+    title = f"Slowest types / relations{f' by {stage}' if stage else ''} (top {len(ranked)} of {len(items)})"
+    print(f"\n{title}\n{'Item':{width}} {'Total [s]':>10} " + " ".join(f"{c[:9]:>9}" for c in cols))
+    for name, v in ranked:
+        print(f"{name[:width]:{width}} {v['total']:10.3f} " + " ".join(f"{v[c]:9.3f}" if c in v else f"{'':9}" for c in cols))
+
+def _label(v: Any) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def prometheus(recs: List[Dict[str, Any]], by_item: bool = False) -> str:
+    # summary-style _sum/_count per stage (and item), plus byte counters
+    secs: Dict[tuple, List[float]] = defaultdict(lambda: [0.0, 0])
+    nbytes: Dict[tuple, int] = defaultdict(int)
+    for r in recs:
+        key = (r["stage"], r.get("src", "py")) + ((r.get("item", ""),) if by_item else ())
+        secs[key][0] += r["dur"]
+        secs[key][1] += 1
+        if r.get("bytes"):
+            nbytes[key] += int(r["bytes"])
+
+    def labels(key):
+        names = ("stage", "src", "item")
+        return ",".join(f'{n}="{_label(v)}"' for n, v in zip(names, key))
+
+    lines = ["# HELP metais_stage_seconds Time spent per pipeline stage.",
+             "# TYPE metais_stage_seconds summary"]
+    for key in sorted(secs):
+        lines.append(f"metais_stage_seconds_sum{{{labels(key)}}} {secs[key][0]:.6f}")
+        lines.append(f"metais_stage_seconds_count{{{labels(key)}}} {secs[key][1]}")
+    lines += ["# HELP metais_stage_bytes_total Bytes moved per pipeline stage.",
+              "# TYPE metais_stage_bytes_total counter"]
+    for key in sorted(nbytes):
+        lines.append(f"metais_stage_bytes_total{{{labels(key)}}} {nbytes[key]}")
+    return "\n".join(lines) + "\n"
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Summarize the timing spans written with METAIS_METRICS / --metrics.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ap_sum = sub.add_parser("summary", help="Totals per stage and the slowest types / relations")
+    ap_sum.add_argument("file", nargs="?", default=PATH or None)
+    ap_sum.add_argument("--top", type=int, default=20, help="Items to list (default: 20)")
+    ap_sum.add_argument("--stage", default="", help="Rank items by this stage only (e.g. server, parse)")
+    ap_prom = sub.add_parser("prom", help="Prometheus text exposition format")
+    ap_prom.add_argument("file", nargs="?", default=PATH or None)
+    ap_prom.add_argument("--by-item", action="store_true", help="Add an item label (one series per type / relation)")
+    args = ap.parse_args(argv)
+
+    if not args.file:
+        ap.error("no metrics file (pass FILE or set METAIS_METRICS)")
+    if not os.path.exists(args.file):
+        print(f"[ERROR] {args.file} not found", file=sys.stderr)
+        return 1
+    recs = load(args.file)
+    if args.cmd == "summary":
+        print_summary(recs, top=args.top, stage=args.stage)
+    else:
+        sys.stdout.write(prometheus(recs, by_item=args.by_item))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# mock_metais.py — local stand-in for the MetaIS API, for benchmarks and offline testing
+#
+# Implements just enough of the API for the scripts in this repo:
+#   GET  /api/types-repo/citypes/list            node types (application)
+#   GET  /api/types-repo/relationshiptypes/list  relation types (the ones the eGov check reads + one irregular)
+#        both lists carry an ETag and answer If-None-Match with 304
+#   POST /api/report/reports/run                 recognises the groovy/templates bodies:
+#        raw / raw paged        -> RAW envelope with synthetic nodes (page/perPage honoured)
+#        relation / bulk        -> TABLE of (central, outer) uuid pairs (bulk: relation name first)
+#        raw / relation delta   -> a few changed, new and invalidated nodes / upserted and
+#                                  deleted pairs, modified an hour after `since` (so every sync
+#                                  moves the high-water mark on)
+#        anything else          -> empty TABLE
+# Nodes carry their modification time both as metaAttributes.lastModifiedAt and as the
+# $cmdb_lastModifiedAt attribute.
+# Data is synthetic but deterministic (same --seed, same answers): --nodes nodes per type,
+# about --density outers per central node in every relation, --attrs filler attributes
+# per node on top of the ones project_eGov_components.py reads.
+# Responses are streamed, so --nodes 1000000 doesn't need the whole payload in memory.
+#
+# Usage:
+#   python3 py/mock_metais.py --port 8900 --nodes 20000 --latency 50 --fail-rate 0.02
+#   export METAIS_API_URL=http://127.0.0.1:8900/api/report/reports/run?lang=sk
+#   export METAIS_TYPES_URL=http://127.0.0.1:8900/api/types-repo/citypes/list
+#   export METAIS_REL_URL=http://127.0.0.1:8900/api/types-repo/relationshiptypes/list
+#   export TOKEN=mock
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+NODE_TYPES = ["Projekt", "ISVS", "KS", "AS", "ZS", "Kanal", "Agenda", "InfraSluzba"]
+REL_TYPES = [
+    "Projekt_realizuje_KS", "Projekt_realizuje_ISVS", "Projekt_realizuje_AS",
+    "AS_sluzi_KS", "AS_sluzi_AS", "Kanal_spristupnuje_KS", "ZS_zoskupuje_KS", "KS_asociuje_Agenda",
+    "ISVS_patri_pod_ISVS", "InfraSluzba_prevadzkuje_ISVS", "ISVS_realizuje_AS",
+    "Projekt_je_asociovany_s_projektom",
+]
+# attributes the eGov rules parse, with the values they get
+TYPED_ATTRS = {
+    "ISVS": [("EA_Profil_ISVS_modul_isvs", [True, False, False, "true"])],
+    "AS": [("EA_Profil_AS_dostupnost_pre_externu_integraciu", ["c_stav_dost_ext_int.1", "c_stav_dost_ext_int.2", None])],
+}
+LAST_MODIFIED = "2024-01-01T00:00:00.000+01:00"
+
+_TYPE_RE = re.compile(r'type\("([^"]+)"\)')
+_REL_TYPE_RE = re.compile(r'type_(CENTRAL|OUTER|REL)\s*=\s*type\("([^"]+)"\)')
+
+
+class Config:
+    def __init__(self, nodes: int = 1000, density: float = 1.5, attrs: int = 10, latency: float = 0.0,
+                 ms_per_1k: float = 0.0, fail_rate: float = 0.0, fail_status: int = 503, seed: int = 1):
+        self.nodes = nodes
+        self.density = density
+        self.attrs = attrs
+        self.latency = latency / 1000.0      # seconds per request
+        self.per_row = ms_per_1k / 1e6       # seconds per generated row
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.seed = seed
+        self.requests = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+
+# ------------------------------ Synthetic data ------------------------------
+def node_uuid(seed: int, type_name: str, i: int) -> str:
+    return str(uuid.UUID(bytes=hashlib.md5(f"{seed}:{type_name}:{i}".encode()).digest()))
+
+def make_node(cfg: Config, type_name: str, i: int, modified: Any = LAST_MODIFIED) -> Dict[str, Any]:
+    rng = random.Random(f"{cfg.seed}:{type_name}:{i}")
+    attrs = [
+        {"name": "Gen_Profil_nazov", "value": f"{type_name} {i}" + ("" if modified == LAST_MODIFIED else " (upravené)")},
+        {"name": "Gen_Profil_kod_metais", "value": f"{type_name}_{i:06d}"},
+        {"name": "$cmdb_lastModifiedAt", "value": modified},
+    ]
+    for name, choices in TYPED_ATTRS.get(type_name, []):
+        v = rng.choice(choices)
+        if v is not None:
+            attrs.append({"name": name, "value": v})
+    for k in range(cfg.attrs):
+        if rng.random() < 0.8:  # some attributes missing, like in real dumps
+            attrs.append({"name": f"{type_name}_Profil_attr_{k:02d}", "value": rng.choice(["a", "b", "c", k, None])})
+    return {"uuid": node_uuid(cfg.seed, type_name, i), "type": type_name, "attributes": attrs,
+            "metaAttributes": {"state": "DRAFT", "lastModifiedAt": modified}}
+
+def relation_rows(cfg: Config, central: str, outer: str, relation: str) -> Iterator[List[str]]:
+    # ~density outers per central, deterministic per relation
+    rng = random.Random(f"{cfg.seed}:{relation}")
+    whole, frac = int(cfg.density), cfg.density - int(cfg.density)
+    for c in range(cfg.nodes):
+        k = whole + (1 if rng.random() < frac else 0)
+        if not k:
+            continue
+        cu = node_uuid(cfg.seed, central, c)
+        for _ in range(k):
+            yield [cu, node_uuid(cfg.seed, outer, rng.randrange(cfg.nodes))]
+
+def later(since: Any) -> Any:
+    # an hour after `since`, in its format (epoch millis or ISO string)
+    s = str(since).strip()
+    if s.lstrip("-").isdigit():
+        return int(s) + 3600 * 1000
+    try:
+        t = datetime.fromisoformat(s)
+    except ValueError:
+        return LAST_MODIFIED
+    return (t + timedelta(hours=1)).isoformat(timespec="milliseconds")
+
+def node_delta(cfg: Config, type_name: str, since: Any) -> Dict[str, Any]:
+    # ~1% of the nodes changed, one new node and one invalidated, all modified later(since)
+    n = cfg.nodes if type_name in NODE_TYPES else 0
+    rng = random.Random(f"{cfg.seed}:{type_name}:{since}")
+    modified = later(since)
+    picks = rng.sample(range(n), min(n, n // 100 + 2))
+    changed = [make_node(cfg, type_name, i, modified) for i in picks[1:]]
+    if n:
+        changed.append(make_node(cfg, type_name, n + rng.randrange(10 ** 6), modified))
+    gone = [{"uuid": node_uuid(cfg.seed, type_name, i), "modified": modified} for i in picks[:1]]
+    return {"changed": changed, "invalidated": gone}
+
+def relation_delta(cfg: Config, central: str, outer: str, relation: str, since: Any) -> Iterator[List[Any]]:
+    # two existing pairs deleted, two new ones upserted
+    if relation not in REL_TYPES or not cfg.nodes:
+        return
+    rng = random.Random(f"{cfg.seed}:{relation}:{since}")
+    modified = later(since)
+    head = list(itertools.islice(relation_rows(cfg, central, outer, relation), 200))
+    for c, o in rng.sample(head, min(2, len(head))):
+        yield [c, o, "delete", modified]
+    for _ in range(2):
+        yield [node_uuid(cfg.seed, central, rng.randrange(cfg.nodes)), node_uuid(cfg.seed, outer, rng.randrange(cfg.nodes)),
+               "upsert", modified]
+
+
+# ------------------------------ HTTP ------------------------------
+class Handler(BaseHTTPRequestHandler):
+    cfg: Config = Config()
+    protocol_version = "HTTP/1.0"  # close-delimited bodies: we stream without Content-Length
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _delay(self, rows: int = 0) -> None:
+        t = self.cfg.latency + rows * self.cfg.per_row
+        if t > 0:
+            time.sleep(t)
+
+    def _failing(self) -> bool:
+        cfg = self.cfg
+        with cfg.lock:
+            cfg.requests += 1
+            fail = cfg.fail_rate > 0 and random.random() < cfg.fail_rate
+            if fail:
+                cfg.failures += 1
+        if fail:
+            self._json(cfg.fail_status, {"error": "mock failure"})
+        return fail
+
+    def _json(self, status: int, doc: Any, etag: bool = False) -> None:
+        body = json.dumps(doc).encode("utf-8")
+        tag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if etag and self.headers.get("If-None-Match") == tag:
+            self.send_response(304)
+            self.send_header("ETag", tag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", tag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, parts: Iterator[str]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        buf: List[str] = []
+        size = 0
+        for p in parts:
+            buf.append(p)
+            size += len(p)
+            if size >= 1 << 16:
+                self.wfile.write("".join(buf).encode("utf-8"))
+                buf, size = [], 0
+        self.wfile.write("".join(buf).encode("utf-8"))
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        self._delay()
+        if path.endswith("/citypes/list"):
+            self._json(200, {"results": [{"technicalName": t, "name": t, "type": "application", "valid": True}
+                                         for t in NODE_TYPES]}, etag=True)
+        elif path.endswith("/relationshiptypes/list"):
+            self._json(200, {"results": [{"technicalName": r, "name": r, "type": "application", "valid": True}
+                                         for r in REL_TYPES]}, etag=True)
+        else:
+            self._json(404, {"error": f"unknown path {path}"})
+
+    def do_POST(self) -> None:
+        path = urlparse(self.path).path
+        n = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(n) or b"{}")
+        except json.JSONDecodeError:
+            self._json(400, {"error": "payload is not JSON"})
+            return
+        if not path.endswith("/reports/run"):
+            self._json(404, {"error": f"unknown path {path}"})
+            return
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._json(401, {"error": "missing bearer token"})
+            return
+        if self._failing():
+            return
+        body = payload.get("body") or ""
+        params = payload.get("parameters") or {}
+        if params.get("relations"):
+            self._bulk(params["relations"])
+        elif params.get("since") is not None:
+            self._delay()
+            if "rel(qi_rel" in body:
+                types = dict(_REL_TYPE_RE.findall(body))
+                rows = relation_delta(self.cfg, types.get("CENTRAL", ""), types.get("OUTER", ""), types.get("REL", ""), params["since"])
+                self._table(_headers("central_uuid", "outer_uuid", "change", "modified"), rows)
+            else:
+                m = _TYPE_RE.search(body)
+                self._json(200, {"type": "RAW", "result": node_delta(self.cfg, m.group(1) if m else "", params["since"])})
+        elif "rel(qi_rel" in body:
+            types = dict(_REL_TYPE_RE.findall(body))
+            self._relation(types.get("CENTRAL", ""), types.get("OUTER", ""), types.get("REL", ""))
+        elif "node(qi_node" in body and _TYPE_RE.search(body):
+            self._raw(_TYPE_RE.search(body).group(1), payload.get("page"), payload.get("perPage"))
+        else:
+            self._delay()
+            self._json(200, {"type": "TABLE", "result": {"headers": [], "rows": []}, "totalCount": 0})
+
+    def _raw(self, type_name: str, page: Optional[int], per_page: Optional[int]) -> None:
+        total = self.cfg.nodes if type_name in NODE_TYPES else 0
+        lo, hi = 0, total
+        if page and per_page:
+            lo, hi = min(total, (page - 1) * per_page), min(total, page * per_page)
+        self._delay(hi - lo)
+
+        def parts():
+            yield f'{{"page": {json.dumps(page)}, "perPage": {json.dumps(per_page)}, "result": ['
+            for i in range(lo, hi):
+                yield ("," if i > lo else "") + json.dumps(make_node(self.cfg, type_name, i), ensure_ascii=False)
+            yield f'], "totalCount": {total}, "type": "RAW"}}'
+        self._stream(parts())
+
+    def _table(self, headers: List[Dict[str, str]], rows: Iterator[List[str]]) -> None:
+        def parts():
+            yield f'{{"type": "TABLE", "result": {{"headers": {json.dumps(headers)}, "rows": ['
+            n = 0
+            for r in rows:
+                yield ("," if n else "") + json.dumps({"values": r})
+                n += 1
+            yield f']}}, "totalCount": {n}}}'
+        self._stream(parts())
+
+    def _relation(self, central: str, outer: str, relation: str) -> None:
+        self._delay(int(self.cfg.nodes * self.cfg.density))
+        rows = relation_rows(self.cfg, central, outer, relation) if relation in REL_TYPES else iter(())
+        self._table(_headers("central_uuid", "outer_uuid"), rows)
+
+    def _bulk(self, specs: List[Dict[str, str]]) -> None:
+        self._delay(int(self.cfg.nodes * self.cfg.density) * len(specs))
+
+        def rows():
+            for s in specs:
+                if s.get("relation") in REL_TYPES:
+                    for r in relation_rows(self.cfg, s["central"], s["outer"], s["relation"]):
+                        yield [s["relation"]] + r
+        self._table(_headers("relation", "central_uuid", "outer_uuid"), rows())
+
+def _headers(*names: str) -> List[Dict[str, str]]:
+    return [{"name": n, "type": "STRING"} for n in names]
+
+
+def serve(port: int, cfg: Config, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    # Returns the server (not started); call serve_forever() on it, or run it in a thread.
+    handler = type("MockHandler", (Handler,), {"cfg": cfg})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Local mock of the MetaIS report API with synthetic data.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8900)
+    ap.add_argument("--nodes", type=int, default=1000, help="Nodes per type (default 1000).")
+    ap.add_argument("--density", type=float, default=1.5, help="Average outers per central node in a relation (default 1.5).")
+    ap.add_argument("--attrs", type=int, default=10, help="Filler attributes per node (default 10).")
+    ap.add_argument("--latency", type=float, default=0.0, help="Milliseconds added to every request.")
+    ap.add_argument("--ms-per-1k", type=float, default=0.0, help="Milliseconds added per 1000 returned rows (server-side query time).")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of report runs answered with --fail-status (type listings never fail).")
+    ap.add_argument("--fail-status", type=int, default=503)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    cfg = Config(args.nodes, args.density, args.attrs, args.latency, args.ms_per_1k,
+                 args.fail_rate, args.fail_status, args.seed)
+    server = serve(args.port, cfg, args.host)
+    print(f"[INFO] Mock MetaIS on http://{args.host}:{server.server_address[1]} "
+          f"({args.nodes} nodes/type, {len(NODE_TYPES)} types, {len(REL_TYPES)} relation types)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[INFO] Served {cfg.requests} requests ({cfg.failures} failed on purpose).", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
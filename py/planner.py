@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# planner.py — extract only what an analysis reads, then (optionally) run it
+#
+# project_eGov_components.py reads a handful of node dumps and relation tables (derived from
+# the enabled rules, see requirements() there), but feeding it used to mean raw_reports.py
+# plus raw_relations.py all - every type and every relation. The planner asks the target
+# analysis for the files it reads, checks them on disk:
+#   fresh    output/nodes/<T>_raw.json / output/relations/<R>.json younger than --max-age
+#   stale    older (fetched again)
+#   missing  never fetched
+# and runs only the stale / missing extractions through the same workers as the batch
+# scripts (retries, per-host limit, --per-page, --bulk). Relation names are resolved to
+# (central, verb, outer, override) with the schema catalog (schema_catalog.py), which is
+# only loaded when a relation actually has to be fetched - a fully fresh plan makes no request.
+#
+# Usage:
+#   python3 py/planner.py egov --dry-run             (show the plan)
+#   python3 py/planner.py egov --run                 (fetch what is missing / stale, then run the check)
+#   python3 py/planner.py egov --rules KS_no_ZS -j 8 --max-age 3600
+#   python3 py/planner.py --nodes KS,AS --relations Projekt_realizuje_KS
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import batch
+import metais_cache
+import metais_client
+import metrics
+import raw_relations
+import raw_reports
+import schema_catalog
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MAX_AGE = float(os.getenv("METAIS_PLAN_MAX_AGE", "86400"))  # seconds a dump counts as fresh
+
+
+# ------------------------------ Targets ------------------------------
+class Target(NamedTuple):
+    description: str
+    needs: Callable[[argparse.Namespace], Tuple[List[str], List[str]]]  # -> (node types, relation names)
+    command: Callable[[argparse.Namespace], List[str]]                  # -> argv of the analysis
+
+def _egov_needs(args) -> Tuple[List[str], List[str]]:
+    # imported here: egov_rules needs numpy, the other targets don't
+    import project_eGov_components as egov
+    nodes, rels, _ = egov.requirements(egov.select_rules(args.rules, args.skip_rules))
+    return nodes, rels
+
+def _egov_command(args) -> List[str]:
+    cmd = [sys.executable, os.path.join(HERE, "project_eGov_components.py")]
+    if args.rules:
+        cmd += ["--rules", args.rules]
+    if args.skip_rules:
+        cmd += ["--skip-rules", args.skip_rules]
+    return cmd
+
+TARGETS: Dict[str, Target] = {
+    "egov": Target("eGov components check (project_eGov_components.py; --rules / --skip-rules apply)",
+                   _egov_needs, _egov_command),
+}
+
+
+# ------------------------------ Plan ------------------------------
+class Step(NamedTuple):
+    kind: str             # node / relation
+    name: str             # node type or relation table name (OUTER_verb_CENTRAL)
+    path: str
+    state: str            # fresh / stale / missing
+    age: Optional[float]  # seconds, None if missing
+
+def check(kind: str, name: str, max_age: float, force: bool = False) -> Step:
+    if kind == "node":
+        path = os.path.join(metais_client.DIR_NODES, f"{name}_raw.json")
+    else:
+        path = os.path.join(metais_client.DIR_RELATIONS, f"{name}.json")
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return Step(kind, name, path, "missing", None)
+    return Step(kind, name, path, "stale" if force or age > max_age else "fresh", age)
+
+def make_plan(nodes: List[str], rels: List[str], max_age: float = MAX_AGE, force: bool = False) -> List[Step]:
+    return [check("node", n, max_age, force) for n in nodes] + [check("relation", r, max_age, force) for r in rels]
+
+def relation_specs(names: List[str]) -> Dict[str, Dict[str, str]]:
+    # relation table name -> raw_relations spec, for the relations the catalog knows
+    catalog = schema_catalog.load()
+    node_set = raw_relations.build_node_set(catalog.citypes)
+    specs = raw_relations.build_rel_specs(catalog.reltypes, node_set, catalog.triplets(node_set))
+    by_base = {metais_client.relation_base(s["central"], s["outer"], s["verb"]): s for s in specs}
+    return {n: by_base[n] for n in names if n in by_base}
+
+def print_plan(steps: List[Step]) -> None:
+    print(f"{'State':8} {'Kind':9} {'Name':40} {'Age':>9}")
+    for s in steps:
+        age = "-" if s.age is None else f"{s.age / 3600:7.1f} h"
+        print(f"{s.state:8} {s.kind:9} {s.name:40} {age:>9}")
+
+
+# ------------------------------ Run ------------------------------
+def run_job(job: Tuple[str, Any], idx: int, total: int) -> Tuple[bool, List[str]]:
+    kind, what = job
+    if kind == "node":
+        return raw_reports.run_with_retries(what, idx, total)
+    if kind == "bulk":
+        return raw_relations.run_bulk(what, idx, total)
+    return raw_relations.run_one(what, idx, total)
+
+def jobs_for(steps: List[Step], bulk: int = 0) -> List[Tuple[str, Any]]:
+    todo = [s for s in steps if s.state != "fresh"]
+    jobs: List[Tuple[str, Any]] = [("node", s.name) for s in todo if s.kind == "node"]
+    rel_names = [s.name for s in todo if s.kind == "relation"]
+    if not rel_names:
+        return jobs
+    specs = relation_specs(rel_names)
+    unknown = [n for n in rel_names if n not in specs]
+    if unknown:
+        raise ValueError("No relation type in the schema catalog for: " + ", ".join(unknown))
+    rel_specs = [specs[n] for n in rel_names]
+    if bulk > 0 and not raw_relations.RAW_CMD:
+        jobs += [("bulk", chunk) for chunk in raw_relations.bulk_chunks(rel_specs, bulk)]
+    else:
+        jobs += [("relation", s) for s in rel_specs]
+    return jobs
+
+
+# ------------------------------ CLI ------------------------------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Fetch only the node dumps / relation tables an analysis reads "
+                                             "(skipping fresh ones), then optionally run it.")
+    ap.add_argument("target", nargs="?", choices=sorted(TARGETS),
+                    help="; ".join(f"{k}: {t.description}" for k, t in TARGETS.items()))
+    ap.add_argument("--nodes", default="", help="Extra node types, comma-separated (e.g. KS,AS)")
+    ap.add_argument("--relations", default="", help="Extra relation tables, comma-separated (e.g. Projekt_realizuje_KS)")
+    ap.add_argument("--rules", default="", help="egov: only these rules (and their dependencies)")
+    ap.add_argument("--skip-rules", default="", help="egov: leave these rules out")
+    ap.add_argument("--max-age", type=float, default=MAX_AGE,
+                    help=f"Seconds a dump on disk counts as fresh (default: {MAX_AGE:.0f}, env METAIS_PLAN_MAX_AGE)")
+    ap.add_argument("--force", action="store_true", help="Fetch everything the target reads, fresh or not")
+    ap.add_argument("-n", "--dry-run", action="store_true", help="Only print the plan")
+    ap.add_argument("--run", action="store_true", help="Run the target analysis after a successful fetch")
+    ap.add_argument("--per-page", type=int, default=raw_reports.PER_PAGE,
+                    help="Node dumps in pages of N (as raw_reports.py --per-page)")
+    ap.add_argument("--bulk", type=int, default=raw_relations.BULK,
+                    help="N relation types per request (as raw_relations.py --bulk)")
+    batch.add_jobs_arg(ap)
+    metais_cache.add_cache_args(ap)
+    metrics.add_metrics_arg(ap)
+    args = ap.parse_args(argv)
+    metais_cache.apply_args(args)
+    metrics.apply_args(args)
+    raw_reports.PER_PAGE = args.per_page
+
+    nodes: List[str] = []
+    rels: List[str] = []
+    if args.target:
+        nodes, rels = TARGETS[args.target].needs(args)
+    nodes += [x.strip() for x in args.nodes.split(",") if x.strip() and x.strip() not in nodes]
+    rels += [x.strip() for x in args.relations.split(",") if x.strip() and x.strip() not in rels]
+    if not nodes and not rels:
+        ap.error("nothing to plan: give a target and/or --nodes / --relations")
+    if args.run and not args.target:
+        ap.error("--run needs a target")
+
+    steps = make_plan(nodes, rels, args.max_age, args.force)
+    print_plan(steps)
+    todo = [s for s in steps if s.state != "fresh"]
+    print(f"[INFO] {len(todo)} of {len(steps)} to fetch "
+          f"({sum(s.kind == 'node' for s in todo)} node types, {sum(s.kind == 'relation' for s in todo)} relations).")
+    if args.dry_run:
+        return 0
+
+    if todo:
+        try:
+            jobs = jobs_for(steps, args.bulk)
+        except Exception as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            return 1
+        print(f"[INFO] Running {len(jobs)} request job(s) with {args.jobs} parallel job(s).")
+        ok, failed = batch.run_batch(jobs, run_job, jobs=args.jobs)
+        print(f"\n[INFO] Completed: {ok} ok / {failed} failed.")
+        if failed:
+            return 1
+
+    if args.run:
+        cmd = TARGETS[args.target].command(args)
+        print(f"[INFO] Running: {' '.join(cmd)}", flush=True)
+        return subprocess.call(cmd)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 import subprocess
-import time
 import sys
-import os, re, requests
-
-CITYPES_URL = os.getenv("METAIS_TYPES_URL",
-    "https://metais-test.slovensko.sk/api/types-repo/citypes/list")
-REL_TYPES_URL = os.getenv("METAIS_REL_URL",
-    "https://metais-test.slovensko.sk/api/types-repo/relationshiptypes/list")
+import argparse
+import os, re
+
+import batch
+import manifest
+import metais_cache
+import metais_client
+import metrics
+import retry
+import schema_catalog
+from schema_catalog import infer_triplet
 
 # Include only application-level stuff by default (skip 'system' types).
 INCLUDE_NODE_TYPES = set(os.getenv("METAIS_INCLUDE_NODE_TYPES", "application").split(","))
@@ -16,94 +20,30 @@ INCLUDE_REL_TYPES  = set(os.getenv("METAIS_INCLUDE_REL_TYPES", "application").sp
 # Skip invalid=false relationship types
 ONLY_VALID = os.getenv("METAIS_ONLY_VALID", "1") not in ("0", "false", "False", "no", "n")
 
-# Known irregular technicalName → (central, verb, outer)
-# You can extend this list as you find more weird names.
-KNOWN_OVERRIDES = {
-    "Projekt_je_asociovany_s_projektom": ("Projekt", "asociuje", "Projekt"),
-}
+# Type lists (METAIS_TYPES_URL, METAIS_REL_URL), relation name inference and KNOWN_OVERRIDES:
+# schema_catalog.py, which keeps them in output/schema/catalog.json between runs.
 
 # A small helper to allow/deny relations by regex on technicalName (optional)
 INCLUDE_REGEX = os.getenv("METAIS_REL_INCLUDE_REGEX", "")  # e.g. r"^(AS|KS|Projekt)_"
 EXCLUDE_REGEX = os.getenv("METAIS_REL_EXCLUDE_REGEX", r"^(CMDB_|LATEST_REQUEST|PREVIOUS_REQUEST)$")
 
-# Runner + retries
-RAW_CMD = os.getenv("METAIS_REL_CMD", "run/relation.sh {central} {outer} {verb} {override} --no-csv")
-MAX_RETRIES = int(os.getenv("METAIS_MAX_RETRIES", "10"))
-RETRY_DELAY = float(os.getenv("METAIS_RETRY_DELAY", "0.25"))
-TIMEOUT = float(os.getenv("METAIS_FETCH_TIMEOUT", "25"))
+# Runner (retries: see retry.py)
+# Extractions run in-process through metais_client. Set METAIS_REL_CMD
+# (e.g. "run/relation.sh {central} {outer} {verb} {override} --no-csv") to shell out instead.
+RAW_CMD = os.getenv("METAIS_REL_CMD", "")
+# > 0: fetch this many relation types per request (metais_client.extract_relations_bulk); set by --bulk
+BULK = metais_client.REL_BULK
+COUNT = False  # --count: bulk requests run the per-relation count query too
 
 # -----------------------------------------------------------------------
 
 
-def fetch_json(url: str):
-    r = requests.get(url, timeout=TIMEOUT, headers={"Accept": "application/json"})
-    r.raise_for_status()
-    data = r.json()
-    return data.get("results", [])
+def build_node_set(citypes):
+    return schema_catalog.node_names(citypes, INCLUDE_NODE_TYPES, ONLY_VALID)
 
 
-def build_node_set(citypes):
-    nodes = set()
-    for it in citypes:
-        typ = (it.get("type") or "").lower()
-        if INCLUDE_NODE_TYPES and typ not in INCLUDE_NODE_TYPES:
-            continue
-        if ONLY_VALID and not it.get("valid", True):
-            continue
-        name = it.get("technicalName") or it.get("name")
-        if name:
-            nodes.add(name)
-    return nodes
-
-
-def tokenize(tn: str):
-    # Split on underscores; keep case as-is for node matches
-    parts = tn.split("_")
-    # Strip empty parts, normalize accidental spaces
-    return [p.strip() for p in parts if p.strip()]
-
-
-def infer_triplet(tn: str, node_set: set[str]):
-    """
-    Try to infer (central, verb, outer) from technicalName like 'Projekt_realizuje_AS'.
-    If irregular, consult KNOWN_OVERRIDES. If still unknown, return None.
-    """
-    if tn in KNOWN_OVERRIDES:
-        c, v, o = KNOWN_OVERRIDES[tn]
-        return c, v, o, True  # override flag True
-
-    parts = tokenize(tn)
-    if len(parts) < 3:
-        return None
-
-    # Heuristic 1: exact head/tail node names
-    head, tail = parts[0], parts[-1]
-    if head in node_set and tail in node_set:
-        verb = "_".join(parts[1:-1])
-        return head, verb, tail, False
-
-    # Heuristic 2: case-insensitive tail with common Slovak endings stripped (e.g., 'projektom' → 'Projekt')
-    # Only attempt if head is a known node.
-    if head in node_set:
-        raw_tail = parts[-1]
-        # try to desuffix (very light heuristic)
-        endings = ("om", "em", "am", "om", "u", "a", "y", "i", "e", "ou", "ov", "om")
-        base = raw_tail
-        for suf in endings:
-            if base.lower().endswith(suf):
-                base = base[:-len(suf)]
-                break
-        # Try capitalized base
-        cap = base[:1].upper() + base[1:]
-        if cap in node_set:
-            verb = "_".join(parts[1:-1])
-            # irregular name → use override (the exact technicalName)
-            return head, verb, cap, True
-
-    return None
-
-
-def build_rel_specs(reltypes, node_set):
+def build_rel_specs(reltypes, node_set, triplets=None):
+    # triplets: technicalName -> infer_triplet() result, precomputed (Catalog.triplets)
     include_re = re.compile(INCLUDE_REGEX) if INCLUDE_REGEX else None
     exclude_re = re.compile(EXCLUDE_REGEX) if EXCLUDE_REGEX else None
 
@@ -124,7 +64,7 @@ def build_rel_specs(reltypes, node_set):
         if exclude_re and exclude_re.search(tech):
             continue
 
-        inf = infer_triplet(tech, node_set)
+        inf = triplets[tech] if triplets is not None and tech in triplets else infer_triplet(tech, node_set)
         if not inf:
             continue
 
@@ -149,20 +89,16 @@ def build_rel_specs(reltypes, node_set):
     return specs
 
 
-def run_one(spec, idx, total):
+def download_one(spec):
+    # One attempt; returns the output lines, raises on failure.
     central, verb, outer, override = spec["central"], spec["verb"], spec["outer"], spec["override"]
-    label = f"{central}_{verb}_{outer}" + (f" [{override}]" if override else "")
-
-    # Build command; remove the {override} arg if empty so we don't pass a dangling word
-    if override:
-        cmd = RAW_CMD.format(central=central, outer=outer, verb=verb, override=override)
-    else:
-        cmd = RAW_CMD.replace("{override} ", "").format(central=central, outer=outer, verb=verb, override="")
-
-    print(f"\n=== Generating relation {central} <--({verb})-- {outer}  ({idx}/{total}) ===")
-    attempt = 1
-    while attempt <= MAX_RETRIES:
-        try:
+    if RAW_CMD:
+        # Build command; remove the {override} arg if empty so we don't pass a dangling word
+        if override:
+            cmd = RAW_CMD.format(central=central, outer=outer, verb=verb, override=override)
+        else:
+            cmd = RAW_CMD.replace("{override} ", "").format(central=central, outer=outer, verb=verb, override="")
+        with batch.host_slot():
             proc = subprocess.run(
                 cmd,
                 shell=True,
@@ -170,27 +106,78 @@ def run_one(spec, idx, total):
                 check=True,
                 capture_output=True,
             )
-            # Echo stdout, and append (done x/y) after any "Wrote:" line.
-            for line in proc.stdout.splitlines():
-                if line.startswith("Wrote:"):
-                    print(f"{line} (done {idx}/{total})")
-                else:
-                    print(line)
-            print(f"[OK] {label}")
-            return True
-        except subprocess.CalledProcessError as e:
-            print(f"[WARN] {label}: attempt {attempt}/{MAX_RETRIES} failed. Retrying in {RETRY_DELAY}s...")
-            if e.stdout:
-                for line in e.stdout.splitlines():
-                    print(line)
-            if e.stderr:
-                for line in e.stderr.splitlines():
-                    print(line)
-            time.sleep(RETRY_DELAY)
-            attempt += 1
-
-    print(f"[ERROR] Giving up on {label}")
-    return False
+        return proc.stdout.splitlines()
+
+    out_path = metais_client.extract_relation(central, outer, verb, override)
+    return [f"Wrote: {out_path}"]
+
+
+def spec_key(spec):
+    # log label, also the job key in the manifest
+    return f"{spec['central']}_{spec['verb']}_{spec['outer']}" + (f" [{spec['override']}]" if spec["override"] else "")
+
+
+def run_one(spec, idx, total):
+    # Runs in a batch worker thread: collect output and hand it back to batch.run_batch.
+    central, verb, outer = spec["central"], spec["verb"], spec["outer"]
+    label = spec_key(spec)
+
+    out = [f"\n=== Generating relation {central} <--({verb})-- {outer}  ({idx}/{total}) ==="]
+    try:
+        # Echo stdout; batch appends (done x/y) after any "Wrote:" line.
+        # A 400 here usually means a wrong relation name: retry.call gives up on it at once.
+        out.extend(retry.call(label, lambda: download_one(spec), out))
+    except retry.ERRORS:
+        out.append(f"[ERROR] Giving up on {label}")
+        return False, out
+
+    out.append(f"[OK] {label}")
+    return True, out
+
+
+def spec_path(spec):
+    return os.path.join(metais_client.DIR_RELATIONS,
+                        metais_client.relation_base(spec["central"], spec["outer"], spec["verb"]) + ".json")
+
+
+def bulk_chunks(specs, size):
+    # Chunks never mix central types, so the server reuses one central scan per chunk.
+    chunks = []
+    for group in group_by_central(specs).values():
+        chunks.extend(group[i:i + size] for i in range(0, len(group), size))
+    return chunks
+
+
+def download_bulk(chunk):
+    # same relation type name as render_relation: the override, else OUTER_verb_CENTRAL
+    bases = [metais_client.relation_base(s["central"], s["outer"], s["verb"]) for s in chunk]
+    triplets = [(s["central"], s["outer"], s["override"] or b) for s, b in zip(chunk, bases)]
+    paths = metais_client.extract_relations_bulk(triplets, bases=bases, count=COUNT)
+    return [f"Wrote: {p}" for p in paths]
+
+
+def run_bulk(chunk, idx, total):
+    # One request for the whole chunk. If the server rejects it (e.g. one bad relation
+    # name -> HTTP 400), fall back to one request per relation so the good ones still land.
+    centrals = ", ".join(sorted({s["central"] for s in chunk}))
+    label = f"bulk {idx}/{total}"
+    out = [f"\n=== Generating {len(chunk)} relations of {centrals} in one request ({idx}/{total}) ==="]
+    try:
+        out.extend(retry.call(label, lambda: download_bulk(chunk), out))
+    except retry.ERRORS as e:
+        if retry.classify(e)[0] != retry.FATAL or isinstance(e, retry.Aborted):
+            out.append(f"[ERROR] Giving up on {label}: {', '.join(spec_key(s) for s in chunk)}")
+            return False, out
+        out.append(f"[WARN] {label}: rejected; falling back to one request per relation")
+        ok = True
+        for n, spec in enumerate(chunk, start=1):
+            spec_ok, lines = run_one(spec, n, len(chunk))
+            out.extend(lines)
+            ok = ok and spec_ok
+        return ok, out
+
+    out.append(f"[OK] {label}: {', '.join(spec_key(s) for s in chunk)}")
+    return True, out
 
 
 def group_by_central(specs):
@@ -201,21 +188,33 @@ def group_by_central(specs):
 
 
 def main():
-    # Fetch node types and relationship types
-    try:
-        citypes = fetch_json(CITYPES_URL)
-        node_set = build_node_set(citypes)
-    except Exception as e:
-        print(f"[ERROR] Failed to fetch or parse node types: {e}", file=sys.stderr)
-        sys.exit(1)
-
+    global BULK, COUNT
+    ap = argparse.ArgumentParser(description="Batch-download relation tables into output/relations.")
+    ap.add_argument("central", nargs="?", default="all",
+                    help="Limit to relations of one central dataset (e.g. KS); 'all' or '*' for every relation.")
+    batch.add_jobs_arg(ap)
+    manifest.add_resume_arg(ap)
+    ap.add_argument("--bulk", type=int, default=BULK, metavar="N",
+                    help="Fetch N relation types per request and split the result per relation "
+                         "(default: env METAIS_REL_BULK, 0 = one request per relation).")
+    ap.add_argument("--count", action="store_true",
+                    help="With --bulk: also run the count query per relation (the single-relation template always does).")
+    metais_cache.add_cache_args(ap)
+    metrics.add_metrics_arg(ap)
+    args = ap.parse_args()
+    metais_cache.apply_args(args)
+    metrics.apply_args(args)
+    BULK, COUNT = args.bulk, args.count
+
+    # Node types and relationship types (local catalog, fetched only when stale)
     try:
-        reltypes = fetch_json(REL_TYPES_URL)
+        catalog = schema_catalog.load()
+        node_set = build_node_set(catalog.citypes)
     except Exception as e:
-        print(f"[ERROR] Failed to fetch relationship types: {e}", file=sys.stderr)
+        print(f"[ERROR] Failed to fetch or parse the type lists: {e}", file=sys.stderr)
         sys.exit(1)
 
-    specs = build_rel_specs(reltypes, node_set)
+    specs = build_rel_specs(catalog.reltypes, node_set, catalog.triplets(node_set))
     if not specs:
         print("[ERROR] No usable relationship types after filtering/inference.", file=sys.stderr)
         sys.exit(1)
@@ -224,8 +223,8 @@ def main():
 
     # If user specified a central node: limit set
     arg_central = None
-    if len(sys.argv) >= 2:
-        arg_central = sys.argv[1].strip()
+    if args.central:
+        arg_central = args.central.strip()
         if arg_central.lower() not in ("", "all", "*"):
             if arg_central not in by_central:
                 avail = ", ".join(sorted(by_central.keys()))
@@ -239,13 +238,21 @@ def main():
           + (f" for central '{arg_central}'" if arg_central and arg_central.lower() not in ("all", "*") else "")
           + ".")
 
-    failures = 0
-    for i, spec in enumerate(specs, start=1):
-        ok = run_one(spec, i, total)
-        if not ok:
-            failures += 1
+    # output/manifests/raw_relations_<central>.jsonl; --resume re-queues only failed/missing specs
+    scope = arg_central if arg_central and arg_central.lower() not in ("", "all", "*") else "all"
+    mf, specs = manifest.prepare(f"raw_relations_{scope}", specs, spec_key, args.resume)
+
+    if BULK > 0 and RAW_CMD:
+        print("[WARN] --bulk is ignored when METAIS_REL_CMD is set.", file=sys.stderr)
+    print(f"[INFO] Running with {args.jobs} parallel job(s).")
+    if BULK > 0 and not RAW_CMD:
+        chunks = bulk_chunks(specs, BULK)
+        print(f"[INFO] {len(specs)} relations in {len(chunks)} bulk request(s).")
+        ok, failures = batch.run_batch(chunks, mf.track_chunks(run_bulk, spec_key, spec_path), jobs=args.jobs, size=len)
+    else:
+        ok, failures = batch.run_batch(specs, mf.track(run_one, spec_key), jobs=args.jobs)
 
-    print(f"\n[INFO] Completed: {total - failures} ok / {failures} failed.")
+    print(f"\n[INFO] Completed: {ok} ok / {failures} failed.")
 
 
 if __name__ == "__main__":
@@ -1,15 +1,13 @@
-import subprocess, os, re
-import time
-import requests
+import subprocess, os, re, sys
+import argparse
 
-# How many retries per report
-MAX_RETRIES = 10
-RETRY_DELAY = 0.25  # seconds
-
-TYPES_URL = os.getenv(
-    "METAIS_TYPES_URL",
-    "https://metais-test.slovensko.sk/api/types-repo/citypes/list"
-)
+import batch
+import manifest
+import metais_cache
+import metais_client
+import metrics
+import retry
+import schema_catalog
 
 INCLUDE_TYPES = set(
     os.getenv("METAIS_INCLUDE_TYPES", "application").split(",")
@@ -19,25 +17,17 @@ EXCLUDE_REGEX = os.getenv("METAIS_EXCLUDE_REGEX", r"^(CMDB_|CMDB|CI_|CI$|CMDB_RE
 
 FORCE_INCLUDE = set(filter(None, [s.strip() for s in os.getenv("METAIS_FORCE_INCLUDE", "").split(",")]))
 
-RAW_CMD = os.getenv("METAIS_RAW_CMD", "run/raw.sh {name}")
-MAX_RETRIES = int(os.getenv("METAIS_MAX_RETRIES", "10"))
-RETRY_DELAY = float(os.getenv("METAIS_RETRY_DELAY", "0.25"))
-FETCH_TIMEOUT = float(os.getenv("METAIS_FETCH_TIMEOUT", "20"))
+# Extractions run in-process through metais_client. Set METAIS_RAW_CMD (e.g. "run/raw.sh {name}")
+# to shell out to a custom command instead.
+RAW_CMD = os.getenv("METAIS_RAW_CMD", "")
+# > 0: download each type page by page (see metais_client.extract_raw_paged); set by --per-page
+PER_PAGE = metais_client.PER_PAGE
 
 FALLBACK_REPORTS = ["Agenda", "AS", "InfraSluzba", "Integracia", "ISVS", "Kanal", "KRIS", "KS", "Projekt", "Program", "ZS"]
 
 def fetch_citypes():
-    headers = {"Accept": "application/json"}
-
-    print(f"[INFO] Fetching types from {TYPES_URL}")
-    resp = requests.get(TYPES_URL, headers=headers, timeout=FETCH_TIMEOUT)
-    resp.raise_for_status()
-    data = resp.json()
-
-    if not isinstance(data, dict) or "results" not in data:
-        raise ValueError("Unexpected response shape (no 'results' key).")
-
-    return data["results"]
+    # METAIS_TYPES_URL, kept in output/schema/catalog.json (fetched again only when stale)
+    return schema_catalog.load().citypes
 
 def build_report_list(results):
     include_re = re.compile(INCLUDE_REGEX) if INCLUDE_REGEX else None
@@ -85,12 +75,11 @@ def build_report_list(results):
 
     return deduped
 
-def run_with_retries(report_name, idx, total):
-    print(f"\n=== Downloading raw report {report_name} ({idx}/{total}) ===")
-    attempt = 1
-    while attempt <= MAX_RETRIES:
-        try:
-            cmd = RAW_CMD.format(name=report_name)
+def download_one(report_name):
+    # One attempt; returns the output lines, raises on failure.
+    if RAW_CMD:
+        cmd = RAW_CMD.format(name=report_name)
+        with batch.host_slot():
             process = subprocess.run(
                 cmd,
                 shell=True,
@@ -98,26 +87,44 @@ def run_with_retries(report_name, idx, total):
                 check=True,
                 capture_output=True,
             )
+        return process.stdout.splitlines()
 
-            # Reprint command output, but add (done idx/total) after “Wrote: …”
-            for line in process.stdout.splitlines():
-                if line.startswith("Wrote:"):
-                    print(f"{line} (done {idx}/{total})")
-                else:
-                    print(line)
+    if PER_PAGE > 0:
+        out_path = metais_client.extract_raw_paged(report_name, per_page=PER_PAGE)
+    else:
+        out_path = metais_client.extract_raw(report_name)
+    return [f"Wrote: {out_path}"]
 
-            print(f"[OK] {report_name} downloaded successfully")
-            return True
-
-        except subprocess.CalledProcessError as e:
-            print(f"[WARN] {report_name}: attempt {attempt}/{MAX_RETRIES} failed. Retrying in {RETRY_DELAY}s...")
-            time.sleep(RETRY_DELAY)
-            attempt += 1
+def run_with_retries(report_name, idx, total):
+    # Runs in a batch worker thread: collect output and hand it back to batch.run_batch.
+    # Backoff, fatal-vs-retryable and the batch-wide circuit breaker live in retry.py.
+    out = [f"\n=== Downloading raw report {report_name} ({idx}/{total}) ==="]
+    try:
+        # Reprint command output; batch adds (done x/y) after “Wrote: …”
+        out.extend(retry.call(report_name, lambda: download_one(report_name), out))
+    except retry.ERRORS:
+        out.append(f"[ERROR] {report_name}: giving up. Moving on...")
+        return False, out
 
-    print(f"[ERROR] {report_name}: failed after {MAX_RETRIES} attempts. Moving on...")
-    return False
+    out.append(f"[OK] {report_name} downloaded successfully")
+    return True, out
 
 def main():
+    global PER_PAGE
+    ap = argparse.ArgumentParser(description="Batch-download raw node dumps into output/nodes.")
+    batch.add_jobs_arg(ap)
+    manifest.add_resume_arg(ap)
+    ap.add_argument("--per-page", type=int, default=PER_PAGE,
+                    help="Download each type in pages of N nodes, fetched in parallel and merged "
+                         "(default: env METAIS_PER_PAGE, 0 = one request per type).")
+    metais_cache.add_cache_args(ap)
+    metrics.add_metrics_arg(ap)
+    args = ap.parse_args()
+    metais_cache.apply_args(args)
+    metrics.apply_args(args)
+
+    PER_PAGE = args.per_page
+
     try:
         results = fetch_citypes()
         reports = build_report_list(results)
@@ -126,15 +133,14 @@ def main():
         print(f"[ERROR] Could not fetch types ({e}). Using fallback list.", file=sys.stderr)
         reports = FALLBACK_REPORTS
 
-    total = len(reports)
-    failures = 0
-    for i, report in enumerate(reports, start=1):
-        ok = run_with_retries(report, i, total)
-        if not ok:
-            failures += 1
+    # output/manifests/raw_reports.jsonl: one line per finished type (--resume skips the ok ones)
+    mf, reports = manifest.prepare("raw_reports", reports, str, args.resume)
+
+    print(f"[INFO] Running with {args.jobs} parallel job(s).")
+    ok, failures = batch.run_batch(reports, mf.track(run_with_retries, str), jobs=args.jobs)
 
-    print(f"\n[INFO] Completed: {total - failures} ok / {failures} failed.")
+    print(f"\n[INFO] Completed: {ok} ok / {failures} failed.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
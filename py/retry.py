@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# retry.py — retry policy shared by raw_reports.py, raw_relations.py, sync.py and paged downloads
+#
+# Failures are sorted by what core.sh / metais_client already report:
+#   401 / 403                  auth      TOKEN is bad for every request -> stop the whole batch
+#   400 / 404 / other 4xx      fatal     bad payload, relation name or endpoint -> never retried
+#   offline cache miss         fatal
+#   timeout, connection, 5xx,  retry     exponential backoff with jitter:
+#   429, non-JSON 200, ...               delay = d/2 + rand(0, d/2), d = min(MAX_DELAY, BASE * 2^(attempt-1))
+# All workers share one circuit breaker: after BREAKER_THRESHOLD retryable failures in a row
+# (across the batch) every request pauses for BREAKER_COOLDOWN seconds; if the first failure
+# after that comes before any success, the pause doubles (up to 8x). Any answer closes it.
+#
+# Knobs (env):
+#   METAIS_MAX_RETRIES        attempts per request (default 10)
+#   METAIS_RETRY_DELAY        base backoff in seconds (default 0.25)
+#   METAIS_RETRY_MAX_DELAY    backoff cap (default 30)
+#   METAIS_BREAKER_THRESHOLD  consecutive failures that open the breaker (default 8, 0 = off)
+#   METAIS_BREAKER_COOLDOWN   pause in seconds (default 30)
+#
+# Usage:
+#   try:
+#       retry.call(label, lambda: download(...), out)   # out: list collecting log lines (None = stderr)
+#   except retry.ERRORS:
+#       ...                                             # the reason is already in out
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+import requests
+
+MAX_RETRIES = int(os.getenv("METAIS_MAX_RETRIES", "10"))
+BASE_DELAY = float(os.getenv("METAIS_RETRY_DELAY", "0.25"))
+MAX_DELAY = float(os.getenv("METAIS_RETRY_MAX_DELAY", "30"))
+BREAKER_THRESHOLD = int(os.getenv("METAIS_BREAKER_THRESHOLD", "8"))
+BREAKER_COOLDOWN = float(os.getenv("METAIS_BREAKER_COOLDOWN", "30"))
+
+AUTH, FATAL, RETRY = "auth", "fatal", "retry"
+
+_HTTP_RE = re.compile(r"HTTP ERROR: (\d{3})")
+_FATAL_TEXT = ("offline: no cached response", "TOKEN env var is required")
+
+
+class Aborted(RuntimeError):
+    # raised for every request once the batch was stopped (e.g. the TOKEN was rejected)
+    pass
+
+# What call() may raise; callers catch this tuple (metais_client.MetaisError is a RuntimeError).
+ERRORS = (RuntimeError, subprocess.CalledProcessError, requests.RequestException)
+
+
+# ------------------------------ Classification ------------------------------
+def _text(e: BaseException) -> str:
+    if isinstance(e, subprocess.CalledProcessError):
+        return "\n".join(s for s in (e.stdout, e.stderr) if isinstance(s, str))
+    return str(e)
+
+def status_of(e: BaseException) -> Optional[int]:
+    # HTTP status behind an error: MetaisError.status, requests' response, or the
+    # "HTTP ERROR: NNN" line core.sh / metais_client print (for METAIS_*_CMD subprocesses).
+    status = getattr(e, "status", None)
+    if status is None and isinstance(e, requests.RequestException) and e.response is not None:
+        status = e.response.status_code
+    if status is None:
+        m = _HTTP_RE.search(_text(e))
+        if m:
+            status = int(m.group(1))
+    return status
+
+def classify(e: BaseException) -> Tuple[str, str]:
+    # -> (AUTH | FATAL | RETRY, short reason for the log)
+    if isinstance(e, Aborted):
+        return FATAL, str(e)
+    if isinstance(e, (requests.Timeout, requests.ConnectionError)):
+        return RETRY, type(e).__name__
+    status = status_of(e)
+    if status in (401, 403):
+        return AUTH, f"HTTP {status}"
+    if status is not None and 400 <= status < 500 and status not in (408, 429):
+        return FATAL, f"HTTP {status}"
+    text = _text(e)
+    for marker in _FATAL_TEXT:
+        if marker in text:
+            return FATAL, marker
+    return RETRY, f"HTTP {status}" if status else "error"
+
+def backoff(attempt: int, base: float = BASE_DELAY, cap: float = MAX_DELAY) -> float:
+    d = min(cap, base * (2 ** (attempt - 1)))
+    return d / 2 + random.uniform(0, d / 2)
+
+
+# ------------------------------ Circuit breaker ------------------------------
+class Breaker:
+    # No single-probe gate: a paged download runs nested retry loops on several threads,
+    # and a probe held by the outer loop would block its own pages. Instead, after a pause
+    # the first failure (before any success) reopens it for twice as long.
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._cond = threading.Condition()
+        self.failures = 0         # consecutive retryable failures, batch-wide
+        self.open_until = 0.0
+        self.trips = 0            # times opened since the last success (scales the pause)
+        self.aborted = ""
+
+    def wait(self) -> float:
+        # Block while the breaker is open; returns seconds waited.
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                if self.aborted:
+                    raise Aborted(self.aborted)
+                left = self.open_until - time.monotonic()
+                if left <= 0:
+                    return time.monotonic() - start
+                self._cond.wait(left)
+
+    def success(self) -> None:
+        with self._cond:
+            self.failures = self.trips = 0
+
+    def failure(self) -> float:
+        # Record a retryable failure; returns the pause if this one opened the breaker.
+        with self._cond:
+            if time.monotonic() < self.open_until:
+                return 0.0  # started before the pause; already counted
+            self.failures += 1
+            if self.threshold <= 0 or not (self.trips or self.failures >= self.threshold):
+                return 0.0
+            pause = self.cooldown * (2 ** min(self.trips, 3))
+            self.trips += 1
+            self.failures = 0
+            self.open_until = time.monotonic() + pause
+            return pause
+
+    def abort(self, reason: str) -> None:
+        with self._cond:
+            if not self.aborted:
+                self.aborted = reason
+            self._cond.notify_all()
+
+BREAKER = Breaker()
+
+
+# ------------------------------ Retry loop ------------------------------
+def _log(out: Optional[List[str]], lines: List[str]) -> None:
+    if out is None:
+        print("\n".join(lines), file=sys.stderr)
+    else:
+        out.extend(lines)
+
+def call(label: str, fn: Callable[[], Any], out: Optional[List[str]] = None,
+         max_attempts: int = MAX_RETRIES, breaker: Breaker = BREAKER) -> Any:
+    # Run fn() until it succeeds; re-raises the last error when giving up.
+    attempt = 1
+    while True:
+        try:
+            waited = breaker.wait()
+            if waited >= 1:
+                _log(out, [f"[INFO] {label}: waited {waited:.0f}s for the API to recover"])
+            result = fn()
+        except ERRORS as e:
+            kind, reason = classify(e)
+            detail = _text(e).splitlines()
+            if kind == AUTH:
+                breaker.abort(f"batch stopped after {reason} on {label} (check TOKEN)")
+                _log(out, detail + [f"[ERROR] {label}: {reason}, not retrying; stopping the batch"])
+                raise
+            if kind == FATAL:
+                if not isinstance(e, Aborted):
+                    breaker.success()  # the server answered; it's the request that is wrong
+                    _log(out, detail)
+                _log(out, [f"[ERROR] {label}: {reason}, not retrying"])
+                raise
+            pause = breaker.failure()
+            if attempt >= max_attempts:
+                _log(out, detail + [f"[ERROR] {label}: {reason}, failed after {attempt} attempts"])
+                raise
+            delay = backoff(attempt)
+            _log(out, [f"[WARN] {label}: attempt {attempt}/{max_attempts} failed ({reason}). "
+                       f"Retrying in {delay:.2f}s..."] + detail)
+            if pause:
+                _log(out, [f"[WARN] API looks down ({reason}); pausing all requests for {pause:.0f}s"])
+            time.sleep(delay)
+            attempt += 1
+        else:
+            breaker.success()
+            return result
\ No newline at end of file
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# schema_catalog.py — local catalog of the MetaIS type lists (citypes + relationshiptypes)
+#
+# raw_reports.py, raw_relations.py and sync.py used to download the type lists on every start
+# and guess the (central, verb, outer) of every relation name again. Both lists now live in
+#   output/schema/catalog.json
+# together with the ETag / Last-Modified of each. Within METAIS_SCHEMA_TTL (default 1 day)
+# the catalog is used as is - no request at all. After that both lists are revalidated at once
+# (conditional GETs in parallel; 304 = nothing to download). The inferred relation triplets are
+# stored alongside and recomputed only when the relation list, the node set or
+# KNOWN_OVERRIDES change.
+#
+# --refresh / --offline (METAIS_CACHE_MODE, see metais_cache.py) apply here too:
+#   refresh  download both lists again, ignoring TTL and ETags
+#   offline  use the catalog whatever its age; no catalog = error
+#   off      always download, store nothing
+#
+# Usage:
+#   python3 py/schema_catalog.py show                 (sources, age, counts)
+#   python3 py/schema_catalog.py refresh              (revalidate now, whatever the TTL)
+#   python3 py/schema_catalog.py triplets [CENTRAL]   (inferred relations, as raw_relations.py sees them)
+#
+#   import schema_catalog
+#   cat = schema_catalog.load()
+#   cat.citypes, cat.reltypes, cat.triplets(node_set)
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import requests
+
+import metais_cache
+import metrics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATH = os.getenv("METAIS_SCHEMA_CATALOG", os.path.join(ROOT, "output", "schema", "catalog.json"))
+TTL = float(os.getenv("METAIS_SCHEMA_TTL", "86400"))
+TIMEOUT = float(os.getenv("METAIS_FETCH_TIMEOUT", "25"))
+VERSION = 1
+
+SOURCES = {
+    "citypes": os.getenv("METAIS_TYPES_URL",
+        "https://metais-test.slovensko.sk/api/types-repo/citypes/list"),
+    "reltypes": os.getenv("METAIS_REL_URL",
+        "https://metais-test.slovensko.sk/api/types-repo/relationshiptypes/list"),
+}
+
+# Known irregular technicalName → (central, verb, outer)
+# You can extend this list as you find more weird names.
+KNOWN_OVERRIDES = {
+    "Projekt_je_asociovany_s_projektom": ("Projekt", "asociuje", "Projekt"),
+}
+
+Triplet = Tuple[str, str, str, bool]
+
+
+# ------------------------------ Inference ------------------------------
+def node_names(citypes: Iterable[Dict[str, Any]], kinds: Set[str], only_valid: bool = True) -> Set[str]:
+    # technicalNames of the node types of these kinds ("application", ...); empty kinds = all
+    nodes = set()
+    for it in citypes:
+        typ = (it.get("type") or "").lower()
+        if kinds and typ not in kinds:
+            continue
+        if only_valid and not it.get("valid", True):
+            continue
+        name = it.get("technicalName") or it.get("name")
+        if name:
+            nodes.add(name)
+    return nodes
+
+
+def tokenize(tn: str):
+    # Split on underscores; keep case as-is for node matches
+    parts = tn.split("_")
+    # Strip empty parts, normalize accidental spaces
+    return [p.strip() for p in parts if p.strip()]
+
+
+def infer_triplet(tn: str, node_set: set[str]):
+    """
+    Try to infer (central, verb, outer) from technicalName like 'Projekt_realizuje_AS'.
+    If irregular, consult KNOWN_OVERRIDES. If still unknown, return None.
+    """
+    if tn in KNOWN_OVERRIDES:
+        c, v, o = KNOWN_OVERRIDES[tn]
+        return c, v, o, True  # override flag True
+
+    parts = tokenize(tn)
+    if len(parts) < 3:
+        return None
+
+    # Heuristic 1: exact head/tail node names
+    head, tail = parts[0], parts[-1]
+    if head in node_set and tail in node_set:
+        verb = "_".join(parts[1:-1])
+        return head, verb, tail, False
+
+    # Heuristic 2: case-insensitive tail with common Slovak endings stripped (e.g., 'projektom' → 'Projekt')
+    # Only attempt if head is a known node.
+    if head in node_set:
+        raw_tail = parts[-1]
+        # try to desuffix (very light heuristic)
+        endings = ("om", "em", "am", "om", "u", "a", "y", "i", "e", "ou", "ov", "om")
+        base = raw_tail
+        for suf in endings:
+            if base.lower().endswith(suf):
+                base = base[:-len(suf)]
+                break
+        # Try capitalized base
+        cap = base[:1].upper() + base[1:]
+        if cap in node_set:
+            verb = "_".join(parts[1:-1])
+            # irregular name → use override (the exact technicalName)
+            return head, verb, cap, True
+
+    return None
+
+
+def _triplet_key(node_set: Set[str]) -> str:
+    canon = json.dumps({"nodes": sorted(node_set), "overrides": KNOWN_OVERRIDES}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+
+# ------------------------------ Catalog ------------------------------
+class Catalog:
+    def __init__(self, data: Dict[str, Any], path: str = PATH, persist: bool = True):
+        self.data = data
+        self.path = path
+        self.persist = persist
+
+    @property
+    def citypes(self) -> List[Dict[str, Any]]:
+        return self.data["citypes"]
+
+    @property
+    def reltypes(self) -> List[Dict[str, Any]]:
+        return self.data["reltypes"]
+
+    def age(self) -> float:
+        # seconds since the least recently checked list was confirmed
+        return time.time() - min(s["checked_at"] for s in self.data["sources"].values())
+
+    def triplets(self, node_set: Set[str]) -> Dict[str, Optional[Triplet]]:
+        # technicalName -> infer_triplet() result, computed once per catalog + node set
+        key = _triplet_key(node_set)
+        cached = self.data.get("triplets") or {}
+        if cached.get("key") != key:
+            cached = {"key": key, "map": {}}
+            for it in self.reltypes:
+                tech = it.get("technicalName")
+                if tech:
+                    cached["map"][tech] = infer_triplet(tech, node_set)
+            self.data["triplets"] = cached
+            if self.persist:
+                _write(self.path, self.data)
+        return {t: tuple(v) if v else None for t, v in cached["map"].items()}
+
+
+def _read(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != VERSION:
+        return None
+    # a catalog of another MetaIS instance (METAIS_TYPES_URL changed) doesn't count
+    if any((data.get("sources") or {}).get(k, {}).get("url") != url for k, url in SOURCES.items()):
+        return None
+    return data
+
+def _write(path: str, data: Dict[str, Any]) -> None:
+    out_dir = os.path.dirname(path) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=".tmp_", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def _fetch(name: str, old: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], Optional[List[Any]]]:
+    # -> (source entry, results); results None = 304, the stored list is still current
+    url = SOURCES[name]
+    headers = {"Accept": "application/json"}
+    if old and old.get("etag"):
+        headers["If-None-Match"] = old["etag"]
+    if old and old.get("last_modified"):
+        headers["If-Modified-Since"] = old["last_modified"]
+    with metrics.span("schema", item=name) as m:
+        resp = requests.get(url, headers=headers, timeout=TIMEOUT)
+        m["status"] = resp.status_code
+        now = time.time()
+        if resp.status_code == 304 and old:
+            return dict(old, checked_at=now), None
+        resp.raise_for_status()
+        m["bytes"] = len(resp.content)
+        doc = resp.json()
+    if not isinstance(doc, dict) or not isinstance(doc.get("results"), list):
+        raise ValueError(f"{url}: unexpected response shape (no 'results' list)")
+    source = {"url": url, "etag": resp.headers.get("ETag", ""),
+              "last_modified": resp.headers.get("Last-Modified", ""), "fetched_at": now, "checked_at": now}
+    return source, doc["results"]
+
+def refresh(old: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # Fetch both lists in parallel (conditionally, if there is an old catalog).
+    print("[INFO] Fetching type lists: " + ", ".join(SOURCES.values()))
+    old_sources = (old or {}).get("sources", {})
+    with ThreadPoolExecutor(max_workers=len(SOURCES)) as ex:
+        futs = {name: ex.submit(_fetch, name, old_sources.get(name)) for name in SOURCES}
+        got = {name: fut.result() for name, fut in futs.items()}
+
+    data = {"version": VERSION, "sources": {}}
+    for name, (source, results) in got.items():
+        data["sources"][name] = source
+        data[name] = old[name] if results is None else results
+    if old and got["reltypes"][1] is None and old.get("triplets"):
+        data["triplets"] = old["triplets"]  # relation list unchanged, inference still valid
+    return data
+
+def load(revalidate: bool = False, path: str = PATH) -> Catalog:
+    # The catalog, fetching / revalidating the type lists only when needed (see the header).
+    mode = metais_cache.MODE
+    old = _read(path) if mode != "off" else None
+    if mode == "offline":
+        if old is None:
+            raise metais_cache.CacheMiss(f"offline: no schema catalog for {SOURCES['citypes']} in {path}")
+        return Catalog(old, path)
+    if old is not None and mode != "refresh" and not revalidate and Catalog(old).age() <= TTL:
+        return Catalog(old, path)
+    try:
+        data = refresh(old if mode != "refresh" else None)
+    except (requests.RequestException, ValueError) as e:
+        if old is None:
+            raise
+        print(f"[WARN] Could not refresh the type lists ({e}); using the catalog from "
+              f"{Catalog(old).age() / 3600:.1f} h ago.", file=sys.stderr)
+        return Catalog(old, path)
+    if mode != "off":
+        _write(path, data)
+    return Catalog(data, path, persist=mode != "off")
+
+
+# ------------------------------ CLI ------------------------------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Local catalog of the MetaIS node / relation type lists.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("show", help="Sources, ETags, age and counts")
+    sub.add_parser("refresh", help="Revalidate both lists now (conditional GETs)")
+    ap_t = sub.add_parser("triplets", help="Inferred (central, verb, outer, override) of every relation type")
+    ap_t.add_argument("central", nargs="?", default="", help="Only relations of this central type")
+    ap_t.add_argument("--kinds", default="application", help="Node type kinds in the node set (default: application)")
+    metais_cache.add_cache_args(ap)
+    args = ap.parse_args(argv)
+    metais_cache.apply_args(args)
+
+    try:
+        cat = load(revalidate=args.cmd == "refresh")
+    except (metais_cache.CacheMiss, requests.RequestException, ValueError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    if args.cmd in ("show", "refresh"):
+        print(f"Catalog:  {cat.path}")
+        print(f"Age:      {cat.age():.0f}s (TTL {TTL:.0f}s)")
+        for name, src in cat.data["sources"].items():
+            fetched = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(src["fetched_at"]))
+            print(f"{name:9} {len(cat.data[name]):6} types  fetched {fetched}  etag {src['etag'] or '-'}  {src['url']}")
+        return 0
+
+    node_set = node_names(cat.citypes, set(filter(None, args.kinds.split(","))))
+    rows = []
+    for tech, t in sorted(cat.triplets(node_set).items()):
+        if t is None:
+            rows.append(("?", "?", "?", tech))
+            continue
+        # raw_relations.py flips these: the relation table is stored from the outer side
+        outer, verb, central, irregular = t
+        rows.append((central, verb, outer, tech if irregular or f"{central}_{verb}_{outer}" != tech else ""))
+    if args.central:
+        rows = [r for r in rows if r[0] == args.central]
+    for central, verb, outer, override in rows:
+        print(f"{central:20} {verb:30} {outer:20} {override}")
+    print(f"[INFO] {sum(r[0] != '?' for r in rows)} relations inferred, {sum(r[0] == '?' for r in rows)} not recognized.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
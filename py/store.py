@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# store.py — local columnar store (SQLite) for extracted MetaIS data + loader API
+#
+# The raw dumps are big JSON files with every attribute as a {"name", "value"} pair, so
+# every analysis pays json.load + flatten_attrs over the whole thing. `ingest` does that
+# once and writes output/metais.sqlite:
+#   nodes_<TYPE>     one row per node, uuid PRIMARY KEY, one column per attribute name
+#                    (+ meta_<key> columns for metaAttributes)
+#   rel_<NAME>       (central, outer) pairs as integer ids into the `uuids` table,
+#                    indexed both ways
+#   uuids            id <-> uuid
+#   sources          what was ingested from which file (mtime/size, so re-ingest is skipped
+#                    for unchanged dumps)
+#   columns          per-type column list; multi-valued attributes are stored as JSON lists
+#
+# Usage:
+#   python3 py/store.py ingest                 # every dump in output/nodes and output/relations
+#   python3 py/store.py ingest KS AS --force   # selected node types, rebuild even if unchanged
+#   python3 py/store.py info
+#
+# egov_graph.load_graph (project_eGov_components.py, egov_service.py, ...) reads a type or a
+# relation from here instead of its JSON dump whenever the table is fresh, i.e. was ingested
+# from that dump as it is now; a dump changed since (sync.py, a new download) is read as JSON
+# until the next ingest.
+#
+# Loader API (from other scripts in py/):
+#   import store
+#   names = store.load_nodes("KS", ["Gen_Profil_nazov", "Gen_Profil_kod_metais"])  # uuid -> {col: value}
+#   pairs = store.load_relation("AS_sluzi_KS")                                    # [(central, outer), ...]
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from jsonstream import iter_result_items
+from unique_attributes import META_PREFIX, node_row, node_types, parse_relation_table_ids
+
+STORE_PATH = os.getenv("METAIS_STORE", "output/metais.sqlite")
+DIR_NODES = "output/nodes"
+DIR_RELATIONS = "output/relations"
+BATCH_ROWS = 5000
+
+# --------------------------------------- Helpers ---------------------------------------
+def _q(name: str) -> str:
+    # quote an identifier (attribute names are machine names, but be safe anyway)
+    return '"' + name.replace('"', '""') + '"'
+
+def node_table(type_name: str) -> str:
+    return f"nodes_{type_name}"
+
+def rel_table(rel_name: str) -> str:
+    return f"rel_{rel_name}"
+
+def _cell(v: Any) -> Any:
+    # SQLite takes scalars; anything structured goes in as JSON text
+    if v is None or isinstance(v, (str, int, float)):
+        return v
+    return json.dumps(v, ensure_ascii=False)
+
+def _chunks(it: Iterable[Any], size: int) -> Iterable[List[Any]]:
+    chunk: List[Any] = []
+    for x in it:
+        chunk.append(x)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def connect(path: str = STORE_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS uuids (id INTEGER PRIMARY KEY, uuid TEXT NOT NULL UNIQUE)")
+    conn.execute("CREATE TABLE IF NOT EXISTS sources (tbl TEXT PRIMARY KEY, path TEXT, mtime REAL, size INTEGER, rows INTEGER)")
+    conn.execute("CREATE TABLE IF NOT EXISTS columns (tbl TEXT, name TEXT, multi INTEGER, PRIMARY KEY (tbl, name))")
+    return conn
+
+def _is_fresh(conn: sqlite3.Connection, tbl: str, path: str) -> bool:
+    st = os.stat(path)
+    row = conn.execute("SELECT path, mtime, size FROM sources WHERE tbl = ?", (tbl,)).fetchone()
+    return (row is not None and os.path.abspath(row[0]) == os.path.abspath(path)
+            and row[1] == st.st_mtime and row[2] == st.st_size)
+
+def _record_source(conn: sqlite3.Connection, tbl: str, path: str, rows: int) -> None:
+    st = os.stat(path)
+    conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)", (tbl, path, st.st_mtime, st.st_size, rows))
+
+def _intern(conn: sqlite3.Connection, uuids: Iterable[str]) -> Dict[str, int]:
+    uuids = list(set(uuids))
+    conn.executemany("INSERT OR IGNORE INTO uuids (uuid) VALUES (?)", ((u,) for u in uuids))
+    ids: Dict[str, int] = {}
+    for i in range(0, len(uuids), 900):  # stay under SQLite's bound-variable limit
+        chunk = uuids[i:i + 900]
+        marks = ",".join("?" * len(chunk))
+        ids.update((u, i_) for i_, u in conn.execute(f"SELECT id, uuid FROM uuids WHERE uuid IN ({marks})", chunk))
+    return ids
+
+# --------------------------------------- Ingest ---------------------------------------
+def ingest_nodes(conn: sqlite3.Connection, type_name: str, path: str, force: bool = False) -> Optional[int]:
+    # Returns number of rows written, or None when the table is already up to date.
+    tbl = node_table(type_name)
+    if not force and _is_fresh(conn, tbl, path):
+        return None
+
+    def rows():
+        for o in iter_result_items(path):
+            if o.get("uuid"):
+                yield o["uuid"], node_row(o)
+
+    # column set = union of attribute names; remember which ones are ever multi-valued.
+    # The dump is streamed twice (columns first, then inserts) instead of being held in memory.
+    cols: Dict[str, bool] = {}
+    for _, r in rows():
+        for k, v in r.items():
+            cols[k] = cols.get(k, False) or isinstance(v, list)
+    names = sorted(cols)
+
+    with conn:
+        conn.execute(f"DROP TABLE IF EXISTS {_q(tbl)}")
+        col_sql = ", ".join(f"{_q(n)}" for n in names)
+        conn.execute(f"CREATE TABLE {_q(tbl)} (uuid TEXT PRIMARY KEY" + (", " + col_sql if names else "") + ")")
+        conn.execute("DELETE FROM columns WHERE tbl = ?", (tbl,))
+        conn.executemany("INSERT INTO columns VALUES (?, ?, ?)", ((tbl, n, int(cols[n])) for n in names))
+
+        sql = f"INSERT OR REPLACE INTO {_q(tbl)} (uuid{''.join(', ' + _q(n) for n in names)}) VALUES ({', '.join('?' * (len(names) + 1))})"
+        n_rows = 0
+        for chunk in _chunks(rows(), BATCH_ROWS):
+            conn.executemany(sql, (
+                [u] + [json.dumps(r[n], ensure_ascii=False) if cols[n] and n in r else _cell(r.get(n)) for n in names]
+                for u, r in chunk
+            ))
+            n_rows += len(chunk)
+        _record_source(conn, tbl, path, n_rows)
+    return n_rows
+
+def ingest_relation(conn: sqlite3.Connection, rel_name: str, path: str, force: bool = False) -> Optional[int]:
+    tbl = rel_table(rel_name)
+    if not force and _is_fresh(conn, tbl, path):
+        return None
+
+    _, _, pairs = parse_relation_table_ids(path)
+    with conn:
+        ids = _intern(conn, (u for p in pairs for u in p))
+        conn.execute(f"DROP TABLE IF EXISTS {_q(tbl)}")
+        conn.execute(f"CREATE TABLE {_q(tbl)} (central INTEGER NOT NULL, outer INTEGER NOT NULL)")
+        conn.executemany(f"INSERT INTO {_q(tbl)} VALUES (?, ?)", ((ids[c], ids[o]) for c, o in pairs))
+        conn.execute(f"CREATE INDEX {_q(tbl + '_central')} ON {_q(tbl)} (central)")
+        conn.execute(f"CREATE INDEX {_q(tbl + '_outer')} ON {_q(tbl)} (outer)")
+        _record_source(conn, tbl, path, len(pairs))
+    return len(pairs)
+
+# --------------------------------------- Loader ---------------------------------------
+_default_conn: Optional[sqlite3.Connection] = None
+
+def _conn(conn: Optional[sqlite3.Connection]) -> sqlite3.Connection:
+    global _default_conn
+    if conn is not None:
+        return conn
+    if _default_conn is None:
+        if not os.path.exists(STORE_PATH):
+            raise FileNotFoundError(f"Store not found: {STORE_PATH} (run: python3 py/store.py ingest)")
+        _default_conn = connect(STORE_PATH)
+    return _default_conn
+
+def open_store(path: Optional[str] = None) -> Optional[sqlite3.Connection]:
+    # A connection of its own (e.g. for a loader thread), or None when nothing was ingested yet.
+    path = path or STORE_PATH
+    return connect(path) if os.path.exists(path) else None
+
+def is_fresh(tbl: str, path: str, conn: Optional[sqlite3.Connection] = None) -> bool:
+    # True when tbl was ingested from the dump at path as it is now
+    try:
+        return _is_fresh(_conn(conn), tbl, path)
+    except (OSError, sqlite3.Error):
+        return False
+
+def node_columns(type_name: str, conn: Optional[sqlite3.Connection] = None) -> Dict[str, bool]:
+    # column name -> multi-valued?
+    rows = _conn(conn).execute("SELECT name, multi FROM columns WHERE tbl = ?", (node_table(type_name),))
+    return {n: bool(m) for n, m in rows}
+
+def load_nodes(type_name: str, columns: Optional[List[str]] = None,
+               conn: Optional[sqlite3.Connection] = None) -> Dict[str, Dict[str, Any]]:
+    # uuid -> {column: value} with only the requested columns (all when None).
+    # Columns the type doesn't have are simply absent, like a missing attribute.
+    c = _conn(conn)
+    known = node_columns(type_name, c)
+    wanted = [n for n in (columns if columns is not None else sorted(known)) if n in known]
+    select = "".join(", " + _q(n) for n in wanted)
+    out: Dict[str, Dict[str, Any]] = {}
+    for row in c.execute(f"SELECT uuid{select} FROM {_q(node_table(type_name))}"):
+        rec = {}
+        for n, v in zip(wanted, row[1:]):
+            if v is None:
+                continue
+            rec[n] = json.loads(v) if known[n] else v
+        out[row[0]] = rec
+    return out
+
+def load_relation(rel_name: str, conn: Optional[sqlite3.Connection] = None) -> List[Tuple[str, str]]:
+    # [(central_uuid, outer_uuid), ...] in the same orientation as the relation TABLE
+    c = _conn(conn)
+    tbl = _q(rel_table(rel_name))
+    return c.execute(
+        f"SELECT uc.uuid, uo.uuid FROM {tbl} r JOIN uuids uc ON uc.id = r.central JOIN uuids uo ON uo.id = r.outer"
+    ).fetchall()
+
+def attribute_presence(type_name: str, conn: Optional[sqlite3.Connection] = None) -> Tuple[Dict[str, int], int]:
+    # Same numbers as unique_attributes.count_attribute_presence, straight from SQL.
+    c = _conn(conn)
+    tbl = _q(node_table(type_name))
+    names = [n for n in node_columns(type_name, c) if not n.startswith(META_PREFIX)]
+    total = c.execute(f"SELECT COUNT(*) FROM {tbl}").fetchone()[0]
+    if not names:
+        return {}, total
+    counts = c.execute("SELECT " + ", ".join(f"COUNT({_q(n)})" for n in names) + f" FROM {tbl}").fetchone()
+    return {n: cnt for n, cnt in zip(names, counts) if cnt}, total
+
+# --------------------------------------- CLI ---------------------------------------
+def _dump_names(directory: str, suffix: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(f[:-len(suffix)] for f in os.listdir(directory) if f.endswith(suffix) and not f.startswith("."))
+
+def main():
+    ap = argparse.ArgumentParser(description="Ingest MetaIS dumps into a local SQLite column store.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ap_in = sub.add_parser("ingest", help="Convert node dumps and relation tables into the store.")
+    ap_in.add_argument("types", nargs="*", help="Node types (default: every output/nodes/*_raw.json).")
+    ap_in.add_argument("--no-relations", action="store_true", help="Skip output/relations.")
+    ap_in.add_argument("--force", action="store_true", help="Re-ingest even if the source file is unchanged.")
+    sub.add_parser("info", help="List ingested tables.")
+    ap.add_argument("--store", default=STORE_PATH, help=f"SQLite file (default: {STORE_PATH}).")
+    args = ap.parse_args()
+
+    conn = connect(args.store)
+
+    if args.cmd == "info":
+        for tbl, path, rows in conn.execute("SELECT tbl, path, rows FROM sources ORDER BY tbl"):
+            print(f"{tbl:60} {rows:9d}  {path}")
+        return
+
+    types = args.types or node_types(DIR_NODES)
+    for t in types:
+        path = os.path.join(DIR_NODES, f"{t}_raw.json")
+        if not os.path.exists(path):
+            print(f"[ERROR] Node dump not found: {path}", file=sys.stderr)
+            continue
+        n = ingest_nodes(conn, t, path, force=args.force)
+        print(f"[INFO] {t}: " + ("unchanged, skipped" if n is None else f"{n} nodes"))
+
+    if not args.no_relations:
+        for r in _dump_names(DIR_RELATIONS, ".json"):
+            try:
+                n = ingest_relation(conn, r, os.path.join(DIR_RELATIONS, f"{r}.json"), force=args.force)
+            except ValueError as e:
+                print(f"[WARN] {r}: not a relation TABLE ({e}); skipped", file=sys.stderr)
+                continue
+            print(f"[INFO] {r}: " + ("unchanged, skipped" if n is None else f"{n} pairs"))
+
+    print(f"Wrote: {args.store}")
+
+
+if __name__ == "__main__":
+    main()
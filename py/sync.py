@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# sync.py — incremental (delta) refresh of output/nodes/*_raw.json and output/relations/*.json
+#
+# Instead of re-downloading whole types, we keep a per-type / per-relation high-water mark
+# ($cmdb_lastModifiedAt of the newest thing we've seen) in output/sync_state.json and ask
+# MetaIS only for what changed after it (groovy/templates/extract_*_delta_template.groovy).
+# Changed entries are merged into the existing dumps, invalidated ones are removed.
+#
+# Where the first high-water mark comes from:
+#   1. --since VALUE (forces a mark for this run)
+#   2. the mark saved by the previous sync
+#   3. the newest lastModifiedAt found in the existing dump
+#   4. "dateFrom" from params/params.json
+# If there is no dump yet, the type/relation is downloaded in full first.
+#
+# Usage:
+#   python3 py/sync.py                    # all node dumps present in output/nodes
+#   python3 py/sync.py KS AS Projekt      # selected node types
+#   python3 py/sync.py --relations KS     # + relations for central KS ('all' for every relation)
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, TextIO, Tuple
+
+import batch
+import metais_cache
+import metais_client
+import metrics
+import raw_relations
+import retry
+import schema_catalog
+from jsonstream import iter_relation_rows, iter_result_items, read_headers
+from unique_attributes import flatten_attrs, meta_attrs, node_types
+
+STATE_PATH = os.getenv("METAIS_SYNC_STATE", "output/sync_state.json")
+DIR_NODES = metais_client.DIR_NODES
+DIR_RELATIONS = metais_client.DIR_RELATIONS
+RAW_DELTA_TEMPLATE = os.path.join(metais_client.TEMPLATE_DIR, "extract_raw_delta_template.groovy")
+REL_DELTA_TEMPLATE = os.path.join(metais_client.TEMPLATE_DIR, "extract_relation_delta_template.groovy")
+
+# --------------------------------------- State ---------------------------------------
+_state_lock = threading.Lock()
+
+def load_state(path: str = STATE_PATH) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {"nodes": {}, "relations": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    state.setdefault("nodes", {})
+    state.setdefault("relations", {})
+    return state
+
+def save_state(state: Dict[str, Any], path: str = STATE_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    write_json_atomic(path, state, indent=2)
+
+def write_atomic(path: str, write: Callable[[TextIO], None]) -> None:
+    # write(f) fills a temp file next to path, which then replaces path in one step
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp_", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            write(f)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def write_json_atomic(path: str, doc: Any, indent: Optional[int] = None) -> None:
+    write_atomic(path, lambda f: json.dump(doc, f, ensure_ascii=False, indent=indent))
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+# ------------------------------------ Timestamps ------------------------------------
+# lastModifiedAt comes back either as epoch millis or as an ISO string depending on where
+# we read it from; compare numbers with numbers and strings with strings.
+def _ts_key(v: Any) -> Optional[Tuple[int, Any]]:
+    if v is None or v == "":
+        return None
+    if isinstance(v, (int, float)):
+        return (0, v)
+    s = str(v).strip()
+    if s.lstrip("-").isdigit():
+        return (0, int(s))
+    return (1, s)
+
+def newest(*values: Any) -> Any:
+    best, best_key = None, None
+    for v in values:
+        k = _ts_key(v)
+        if k is not None and (best_key is None or k > best_key):
+            best, best_key = v, k
+    return best
+
+# The delta templates filter on the $cmdb_lastModifiedAt property: nodes carry it as
+# metaAttributes.lastModifiedAt and / or as a "$cmdb_lastModifiedAt" attribute.
+def node_modified(node: Dict[str, Any]) -> Any:
+    return (meta_attrs(node).get("lastModifiedAt")
+            or flatten_attrs(node.get("attributes", [])).get("$cmdb_lastModifiedAt")
+            or node.get("lastModifiedAt"))
+
+def initial_since(dump_path: str, kind: str) -> Any:
+    # Newest lastModifiedAt in an existing dump; falls back to params.json dateFrom.
+    mark = None
+    if os.path.exists(dump_path) and kind == "nodes":
+        mark = newest(*(node_modified(o) for o in iter_result_items(dump_path)))
+    if mark is None:
+        mark = (metais_client.load_params() or {}).get("dateFrom") or None
+    return mark
+
+# --------------------------------------- Fetch ---------------------------------------
+def fetch_delta(body: str, since: Any, item: str = "") -> Any:
+    # POST a delta report (params.json + since) and return the parsed result.
+    params = dict(metais_client.load_params() or {})
+    params["since"] = since
+    fd, tmp = tempfile.mkstemp(prefix=".delta_", suffix=".json")
+    os.close(fd)
+    try:
+        metais_client.post_report(body, tmp, params=params, item=item)
+        with open(tmp, "r", encoding="utf-8") as f:
+            return json.load(f).get("result")
+    finally:
+        os.remove(tmp)
+
+# --------------------------------------- Merge ---------------------------------------
+# Both merges stream the old dump node by node / row by row into the new one (the same
+# envelope metais_client.merge_pages writes); only the delta is held in memory.
+def merge_nodes(dump_path: str, changed: List[Dict[str, Any]], invalidated: Set[str]) -> Tuple[int, int, int]:
+    # Returns (updated, added, removed).
+    by_uuid = {o.get("uuid"): o for o in changed if o.get("uuid")}
+    updated = added = removed = 0
+
+    def write(f: TextIO) -> None:
+        nonlocal updated, added, removed
+        count = 0
+        f.write('{"page": null, "perPage": null, "result": [')
+        for o in iter_result_items(dump_path):
+            u = o.get("uuid")
+            if u in invalidated:
+                removed += 1
+                continue
+            if u in by_uuid:
+                o = by_uuid.pop(u)
+                updated += 1
+            if count:
+                f.write(", ")
+            json.dump(o, f, ensure_ascii=False)
+            count += 1
+        added = len(by_uuid)
+        for o in by_uuid.values():
+            if count:
+                f.write(", ")
+            json.dump(o, f, ensure_ascii=False)
+            count += 1
+        f.write(f'], "totalCount": {count}, "type": "RAW"}}')
+
+    write_atomic(dump_path, write)
+    return updated, added, removed
+
+def merge_relation(rel_path: str, delta_rows: List[Dict[str, Any]], invalid_nodes: Set[str]) -> Tuple[int, int]:
+    # delta rows: values = [central_uuid, outer_uuid, change, modified]. Returns (added, removed).
+    upserts, deletes = set(), set()
+    for r in delta_rows:
+        vals = r.get("values", [])
+        if len(vals) < 3:
+            continue
+        (deletes if vals[2] == "delete" else upserts).add((vals[0], vals[1]))
+    pending: Dict[str, List[str]] = {}  # central -> outers of the upserts not written yet
+    for c, o in sorted(upserts):
+        pending.setdefault(c, []).append(o)
+    headers = read_headers(rel_path)
+    added = removed = 0
+
+    def write(f: TextIO) -> None:
+        # The template groups the rows by central (ordered by $cmdb_id); the new pairs of a
+        # central are written after its group, those of new centrals at the end.
+        nonlocal added, removed
+        count = 0
+        present: Set[Tuple[str, str]] = set()  # upserts that were in the dump already
+        written: Set[Tuple[str, str]] = set()  # upserts written after their group
+        prev = None
+
+        def row(pair: Tuple[str, str]) -> None:
+            nonlocal count
+            if count:
+                f.write(", ")
+            json.dump({"values": list(pair)}, f, ensure_ascii=False)
+            count += 1
+
+        def flush(central: str) -> None:
+            nonlocal added
+            for o in pending.pop(central, []):
+                if (central, o) not in present:
+                    row((central, o))
+                    written.add((central, o))
+                    added += 1
+
+        f.write('{"type": "TABLE", "result": {"headers": ' + json.dumps(headers, ensure_ascii=False) + ', "rows": [')
+        for r in iter_relation_rows(rel_path):
+            vals = r.get("values", [])
+            if len(vals) < 2:
+                continue
+            pair = (vals[0], vals[1])
+            if prev is not None and pair[0] != prev[0]:
+                flush(prev[0])
+            if pair == prev:
+                continue  # duplicate row
+            prev = pair
+            if pair in deletes or pair[0] in invalid_nodes or pair[1] in invalid_nodes:
+                removed += 1
+                continue
+            if pair in written:
+                added -= 1  # its central came back after the group was closed; was not new
+                continue
+            if pair in upserts:
+                present.add(pair)
+            row(pair)
+        if prev is not None:
+            flush(prev[0])
+        for central in list(pending):
+            flush(central)
+        f.write(f']}}, "totalCount": {count}}}')
+
+    write_atomic(rel_path, write)
+    return added, removed
+
+# --------------------------------------- Jobs ---------------------------------------
+def _retrying(label: str, out: List[str], fn):
+    # retry.call logs the failure reason into out and re-raises when it gives up
+    return retry.call(label, fn, out)
+
+def sync_node_type(type_name: str, state: Dict[str, Any], since_override: Any,
+                   invalidated_all: Set[str]) -> Tuple[bool, List[str]]:
+    out = [f"\n=== Syncing nodes {type_name} ==="]
+    dump_path = os.path.join(DIR_NODES, f"{type_name}_raw.json")
+    entry = state["nodes"].get(type_name, {})
+    try:
+        if not os.path.exists(dump_path):
+            out.append(f"[INFO] {dump_path} missing; downloading in full")
+            _retrying(type_name, out, lambda: metais_client.extract_raw(type_name))
+            mark = initial_since(dump_path, "nodes")
+        else:
+            since = since_override or entry.get("since") or initial_since(dump_path, "nodes")
+            if since is None:
+                out.append(f"[WARN] {type_name}: no high-water mark (no lastModifiedAt, no dateFrom); full download")
+                _retrying(type_name, out, lambda: metais_client.extract_raw(type_name))
+                mark = initial_since(dump_path, "nodes")
+            else:
+                body = metais_client.render_template(RAW_DELTA_TEMPLATE, TYPE=type_name)
+                res = _retrying(type_name, out, lambda: fetch_delta(body, since, type_name)) or {}
+                changed = res.get("changed") or []
+                gone = res.get("invalidated") or []
+                gone_ids = {g.get("uuid") for g in gone if g.get("uuid")}
+                upd, add, rem = merge_nodes(dump_path, changed, gone_ids)
+                with _state_lock:
+                    invalidated_all |= gone_ids
+                mark = newest(since, *(node_modified(o) for o in changed), *(g.get("modified") for g in gone))
+                out.append(f"[INFO] {type_name}: since {since}: {upd} updated, {add} added, {rem} removed")
+    except retry.ERRORS:  # the reason is already in out
+        out.append(f"[ERROR] {type_name}: sync failed")
+        return False, out
+
+    with _state_lock:
+        state["nodes"][type_name] = {"since": mark, "synced_at": now_iso()}
+    out.append(f"Wrote: {dump_path}")
+    return True, out
+
+def sync_relation(spec: Dict[str, str], state: Dict[str, Any], since_override: Any,
+                  invalidated_all: Set[str]) -> Tuple[bool, List[str]]:
+    central, verb, outer, override = spec["central"], spec["verb"], spec["outer"], spec["override"]
+    base = metais_client.relation_base(central, outer, verb)
+    out = [f"\n=== Syncing relation {central} <--({verb})-- {outer} ==="]
+    rel_path = os.path.join(DIR_RELATIONS, f"{base}.json")
+    entry = state["relations"].get(base, {})
+    try:
+        since = since_override or entry.get("since") or initial_since(rel_path, "relations")
+        if not os.path.exists(rel_path) or since is None:
+            out.append(f"[INFO] {base}: no dump or no high-water mark; downloading in full")
+            _retrying(base, out, lambda: metais_client.extract_relation(central, outer, verb, override))
+            # Relation rows carry no timestamps. Any mark older than this download is safe
+            # (it only re-fetches a bit more next time), and the node marks of both ends are.
+            with _state_lock:
+                mark = newest(since, *(state["nodes"].get(t, {}).get("since") for t in (central, outer)))
+        else:
+            body = metais_client.render_template(REL_DELTA_TEMPLATE, CENTRAL=central, OUTER=outer,
+                                                 RELATION=override or base)
+            res = _retrying(base, out, lambda: fetch_delta(body, since, base)) or {}
+            delta_rows = res.get("rows", []) if isinstance(res, dict) else []
+            added, removed = merge_relation(rel_path, delta_rows, invalidated_all)
+            mark = newest(since, *(r.get("values", [None] * 4)[3] for r in delta_rows))
+            out.append(f"[INFO] {base}: since {since}: {added} added, {removed} removed")
+    except retry.ERRORS:  # the reason is already in out
+        out.append(f"[ERROR] {base}: sync failed")
+        return False, out
+
+    with _state_lock:
+        state["relations"][base] = {"since": mark, "synced_at": now_iso()}
+    out.append(f"Wrote: {rel_path}")
+    return True, out
+
+# --------------------------------------- Main ---------------------------------------
+def relation_specs(central: str) -> List[Dict[str, str]]:
+    # Same spec list raw_relations.py would download; only relations already on disk are synced
+    # (the rest have never been fetched, so there is nothing to keep up to date).
+    catalog = schema_catalog.load()
+    node_set = raw_relations.build_node_set(catalog.citypes)
+    specs = raw_relations.build_rel_specs(catalog.reltypes, node_set, catalog.triplets(node_set))
+    if central.lower() not in ("all", "*"):
+        specs = [s for s in specs if s["central"] == central]
+    return [s for s in specs
+            if os.path.exists(os.path.join(DIR_RELATIONS, metais_client.relation_base(s["central"], s["outer"], s["verb"]) + ".json"))]
+
+def main():
+    ap = argparse.ArgumentParser(description="Incrementally refresh node dumps and relation tables (only changed data).")
+    ap.add_argument("types", nargs="*", help="Node types to sync (default: every *_raw.json in output/nodes).")
+    ap.add_argument("--relations", metavar="CENTRAL",
+                    help="Also sync relation tables already in output/relations for this central ('all' for every one).")
+    ap.add_argument("--since", help="Override the high-water mark ($cmdb_lastModifiedAt) for this run.")
+    ap.add_argument("--no-nodes", action="store_true", help="Only sync relations.")
+    batch.add_jobs_arg(ap)
+    metais_cache.add_cache_args(ap)
+    metrics.add_metrics_arg(ap)
+    args = ap.parse_args()
+    metrics.apply_args(args)
+    # a sync is about fresh data: unless told otherwise, fetch again and only refill the cache
+    metais_cache.set_mode(args.cache_mode or metais_cache.MODE or "refresh")
+
+    state = load_state()
+    invalidated: Set[str] = set()
+    total_ok = total_failed = 0
+
+    if not args.no_nodes:
+        types = args.types or node_types(DIR_NODES)
+        if not types:
+            print("[ERROR] Nothing to sync: no node types given and output/nodes is empty.", file=sys.stderr)
+            sys.exit(1)
+        print(f"[INFO] Syncing {len(types)} node types: {', '.join(types)}")
+        ok, failed = batch.run_batch(
+            types, lambda t, i, n: sync_node_type(t, state, args.since, invalidated), jobs=args.jobs)
+        total_ok += ok
+        total_failed += failed
+        save_state(state)
+
+    if args.relations:
+        try:
+            specs = relation_specs(args.relations)
+        except Exception as e:
+            print(f"[ERROR] Failed to fetch relation types: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"[INFO] Syncing {len(specs)} relations.")
+        ok, failed = batch.run_batch(
+            specs, lambda s, i, n: sync_relation(s, state, args.since, invalidated), jobs=args.jobs)
+        total_ok += ok
+        total_failed += failed
+        save_state(state)
+
+    print(f"\n[INFO] Completed: {total_ok} ok / {total_failed} failed.")
+
+
+if __name__ == "__main__":
+    main()
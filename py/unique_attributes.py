@@ -3,7 +3,10 @@ import argparse
 import json
 import os
 from collections import Counter
-from typing import Dict, List, Tuple, Any, Optional, Set
+from typing import Dict, Iterable, Iterator, List, Tuple, Any, Optional, Set, Union
+
+import uuid_index
+from jsonstream import iter_relation_rows, iter_result_items, read_headers
 
 # --------------------------------------- Utilities ---------------------------------------
 # Resolve a token to a JSON file path under output/. Supports:
@@ -67,15 +70,58 @@ def get_result_array(doc: Any) -> List[Dict[str, Any]]:
 # "name" is the machine name of the attribute, i.e. the name of the thing is stored in "value" corresponding to "name": "Gen_Profil_nazov"
 # { "name": "Gen_Profil_nazov", "value": "Publikovanie informácií o výkone pozemkových úprav"}
 # in this function we look at how many attributes of the same kind appear across the dataset: i.e. if we expect all entries to be named, then Gen_Profil_nazov should appear everywhere.
-def count_attribute_presence(objs: List[Dict[str, Any]]) -> Tuple[Counter, int]:
+# objs can be a list or a generator (iter_result_items) - we count the total while we go, so the dump never has to be in memory
+def count_attribute_presence(objs: Iterable[Dict[str, Any]]) -> Tuple[Counter, int]:
     # Count unique attribute 'name' presence across objects (per-object set) and return (counter, total).
-    total = len(objs)
+    total = 0
     counter = Counter()
     for o in objs:
+        total += 1
         names = {a.get("name") for a in o.get("attributes", []) if a.get("name")}
         counter.update(names)
     return counter, total
 
+# turn the "attributes" list of one entry into a plain dictionary {name: value}
+# attributes that appear several times (multi-valued) become a list of values
+# ex: [{"name": "Gen_Profil_nazov", "value": "X"}] -> {"Gen_Profil_nazov": "X"}
+def flatten_attrs(attr_list):
+    out = {}
+    for a in attr_list or []:
+        k, v = a.get("name"), a.get("value")
+        if k is None:
+            continue
+        if k in out:
+            if not isinstance(out[k], list):
+                out[k] = [out[k]]
+            out[k].append(v)
+        else:
+            out[k] = v
+    return out
+
+# "metaAttributes" is a {name: value} object in the raw dumps; tolerate the [{name, value}] list form of "attributes" as well
+def meta_attrs(obj: Dict[str, Any]) -> Dict[str, Any]:
+    meta = obj.get("metaAttributes") or {}
+    if isinstance(meta, list):
+        meta = {m.get("name"): m.get("value") for m in meta if isinstance(m, dict)}
+    return meta
+
+# one entry as a flat row: flatten_attrs(attributes) plus its metaAttributes as meta_<name> keys
+# (the column names of store.py, flatten_nodes.py and attr_profile.py)
+META_PREFIX = "meta_"
+
+def node_row(obj: Dict[str, Any]) -> Dict[str, Any]:
+    row = flatten_attrs(obj.get("attributes", []))
+    for k, v in meta_attrs(obj).items():
+        if k is not None:
+            row[META_PREFIX + k] = v
+    return row
+
+# node types that have a dump in `directory` (<TYPE>_raw.json), sorted
+def node_types(directory: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(f[:-len("_raw.json")] for f in os.listdir(directory) if f.endswith("_raw.json") and not f.startswith("."))
+
 # here we print out the counts and frequency (%) of each attribute sorted in descending order by their frequency
 # i.e. Gen_Profil_nazov will be most likely near the top because it appears in all entries
 # obscure stuff like KS_Profil_UPVS_KS_Profil_UPVS_podporovany_operacny_system or Service_Heartbeat_Status will appear near the bottom cuz who even uses that, right?
@@ -98,12 +144,18 @@ def print_attr_table(counter: Counter, total: int, title: Optional[str] = None)
 # that maps from a unique identifier (uuid, key)
 # to the value being the json portion of the data entry where that uuid appears
 # the data entry is also a map/dictionary, so the syntax is str -> Dict[str, Any], don't get confused
-def build_uuid_index(raw_doc: Any) -> Dict[str, Dict[str, Any]]:
+# raw_doc is either an already loaded document or a path to a raw dump (then it's streamed, see jsonstream.py)
+# keep: if given, only these uuids end up in the index - everything else is thrown away right after parsing
+#       (for a path, only the kept nodes are even read, via the uuid_index.py sidecar)
+def build_uuid_index(raw_doc: Any, keep: Optional[Set[str]] = None) -> Dict[str, Dict[str, Any]]:
     # Map top-level uuid → object.
+    if isinstance(raw_doc, str) and keep is not None:
+        return {o["uuid"]: o for o in uuid_index.open_index(raw_doc).get_many(keep)}
+    objs = iter_result_items(raw_doc) if isinstance(raw_doc, str) else get_result_array(raw_doc)
     idx: Dict[str, Dict[str, Any]] = {}
-    for o in get_result_array(raw_doc):
+    for o in objs:
         u = o.get("uuid")
-        if u:
+        if u and (keep is None or u in keep):
             idx[u] = o
     return idx
 
@@ -128,10 +180,16 @@ def build_uuid_index(raw_doc: Any) -> Dict[str, Dict[str, Any]]:
 #
 #    Returns:
 #        (central_header_name, endpoint_header_name, [(central_uuid, endpoint_uuid), ...])
-def parse_relation_table_ids(doc: Dict[str, Any]) -> Tuple[str, str, List[Tuple[str, str]]]:
-    result = doc.get("result", {})
-    headers = result.get("headers", [])
-    rows = result.get("rows", [])
+#    doc can also be a path - then headers and rows are streamed from the file
+#    (iter_relation_table_ids gives the pairs as a generator instead of a list)
+def iter_relation_table_ids(doc: Union[str, Dict[str, Any]]) -> Tuple[str, str, Iterator[Tuple[str, str]]]:
+    if isinstance(doc, str):
+        headers = read_headers(doc)
+        rows = iter_relation_rows(doc)
+    else:
+        result = doc.get("result", {})
+        headers = result.get("headers", [])
+        rows = result.get("rows", [])
 
     if len(headers) < 2:
         raise ValueError("Relation TABLE must have at least two headers (<central>_uuid, <endpoint>_uuid).")
@@ -143,17 +201,21 @@ def parse_relation_table_ids(doc: Dict[str, Any]) -> Tuple[str, str, List[Tuple[
     if not h0.lower().endswith("_uuid") or not h1.lower().endswith("_uuid"):
         raise ValueError(f"Expected first two headers to be '*_uuid'. Got: '{h0}', '{h1}'")
 
-    pairs: List[Tuple[str, str]] = []
-    for r in rows:
-        vals = r.get("values", [])
-        if len(vals) < 2:
-            continue
-        ks_u = vals[0]
-        ep_u = vals[1]
-        if ks_u and ep_u:
-            pairs.append((str(ks_u).strip(), str(ep_u).strip()))
+    def pairs():
+        for r in rows:
+            vals = r.get("values", [])
+            if len(vals) < 2:
+                continue
+            ks_u = vals[0]
+            ep_u = vals[1]
+            if ks_u and ep_u:
+                yield str(ks_u).strip(), str(ep_u).strip()
 
-    return h0, h1, pairs
+    return h0, h1, pairs()
+
+def parse_relation_table_ids(doc: Union[str, Dict[str, Any]]) -> Tuple[str, str, List[Tuple[str, str]]]:
+    h0, h1, pairs = iter_relation_table_ids(doc)
+    return h0, h1, list(pairs)
 
 # this is tied to how the script is called.
 # python3 py/unique_attributes.py <central> - just stats the central file
@@ -189,12 +251,14 @@ def main():
     if not os.path.exists(central_path):
         raise FileNotFoundError(f"Central file not found: {central_path}")
 
-    central_doc = load_json(central_path)
-    central_objs = get_result_array(central_doc)
-    central_uuid_index = build_uuid_index(central_doc)
-
-    # Central attribute coverage
-    central_counter, central_total = count_attribute_presence(central_objs)
+    # Central attribute coverage - one streamed pass, we only keep the uuids around
+    central_uuids: Set[str] = set()
+    def central_objs():
+        for o in iter_result_items(central_path):
+            if o.get("uuid"):
+                central_uuids.add(o["uuid"])
+            yield o
+    central_counter, central_total = count_attribute_presence(central_objs())
     print_attr_table(central_counter, central_total, title=f"======== {os.path.basename(central_path)} (central) ========")
 
     # Each relation
@@ -204,21 +268,23 @@ def main():
         if not os.path.exists(endpoint_raw_path):
             raise FileNotFoundError(f"Endpoint RAW not found: {endpoint_raw_path}")
 
-        rel_doc = load_json(rel_path)
-        central_col, endpoint_col, pairs = parse_relation_table_ids(rel_doc)
-
-        endpoint_doc = load_json(endpoint_raw_path)
-        endpoint_uuid_index = build_uuid_index(endpoint_doc)
+        central_col, endpoint_col, pairs = iter_relation_table_ids(rel_path)
 
         # Keep only endpoints whose central_uuid exists in the central file
-        endpoint_ids: Set[str] = set(ep for ks, ep in pairs if ks in central_uuid_index)
+        n_rows = 0
+        endpoint_ids: Set[str] = set()
+        for ks, ep in pairs:
+            n_rows += 1
+            if ks in central_uuids:
+                endpoint_ids.add(ep)
 
-        matched_endpoints = [endpoint_uuid_index[u] for u in endpoint_ids if u in endpoint_uuid_index]
+        # read only the matched entries, located through the dump's uuid index (built on first use)
+        matched_endpoints = uuid_index.open_index(endpoint_raw_path).get_many(endpoint_ids)
         ep_counter, ep_total = count_attribute_presence(matched_endpoints)
 
         pretty_title = f"-------- {title} ({central_col} → {endpoint_col}) ---------"
         print_attr_table(ep_counter, ep_total, title=pretty_title)
-        print(f"[INFO] {title}: relation rows = {len(pairs)}, joined endpoints = {len(endpoint_ids)}, hydrated = {len(matched_endpoints)}.\n")
+        print(f"[INFO] {title}: relation rows = {n_rows}, joined endpoints = {len(endpoint_ids)}, hydrated = {ep_total}.\n")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# uuid_index.py — on-disk uuid -> byte offset index of a raw node dump
+#
+# Hydrating "the nodes of PO that KS points to" used to mean streaming the whole PO dump
+# again for every relation spec. The first time a dump is used, this writes a sidecar
+#   output/nodes/PO_raw.json.uidx
+# with one fixed-size record per node, sorted by key:
+#   16-byte blake2b(uuid) | u64 byte offset | u32 byte length
+# behind a header holding the dump's mtime and size. Later lookups mmap the sidecar,
+# binary-search it and read just the needed node's bytes from the dump. If the dump changes
+# (different mtime or size), the sidecar is rebuilt on next use.
+#
+# Usage:
+#   python3 py/uuid_index.py build               (every output/nodes/*_raw.json; only stale ones)
+#   python3 py/uuid_index.py get PO <uuid>       (print one node)
+#
+#   import uuid_index
+#   for node in uuid_index.open_index("output/nodes/PO_raw.json").get_many(uuids): ...
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from jsonstream import iter_result_spans
+
+DIR_NODES = "output/nodes"
+SUFFIX = ".uidx"
+MAGIC = b"MUIDX\x00\x00\x01"
+HEADER = struct.Struct("<8sqqq")  # magic, dump mtime_ns, dump size, records
+RECORD = struct.Struct("<16sQI")  # key, offset, length
+KEY_LEN = 16
+
+
+def _key(uuid: str) -> bytes:
+    return hashlib.blake2b(uuid.encode("utf-8"), digest_size=KEY_LEN).digest()
+
+def sidecar_path(dump: str) -> str:
+    return dump + SUFFIX
+
+def is_fresh(dump: str, sidecar: Optional[str] = None) -> bool:
+    sidecar = sidecar or sidecar_path(dump)
+    try:
+        with open(sidecar, "rb") as f:
+            magic, mtime_ns, size, _ = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return False
+    st = os.stat(dump)
+    return magic == MAGIC and mtime_ns == st.st_mtime_ns and size == st.st_size
+
+def build(dump: str) -> int:
+    # -> records written. Nodes without a uuid are not indexed; a duplicate uuid keeps the first.
+    st = os.stat(dump)
+    recs: Dict[bytes, Tuple[int, int]] = {}
+    for offset, length, node in iter_result_spans(dump):
+        u = node.get("uuid") if isinstance(node, dict) else None
+        if u:
+            recs.setdefault(_key(u), (offset, length))
+    if os.stat(dump).st_mtime_ns != st.st_mtime_ns:
+        raise RuntimeError(f"{dump} changed while it was being indexed")
+
+    out = sidecar_path(dump)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(out) or ".", prefix=".tmp_", suffix=SUFFIX)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, st.st_mtime_ns, st.st_size, len(recs)))
+            f.write(b"".join(RECORD.pack(k, off, n) for k, (off, n) in sorted(recs.items())))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, out)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return len(recs)
+
+
+class UuidIndex:
+    def __init__(self, dump: str):
+        self.dump = dump
+        self.sidecar = sidecar_path(dump)
+        if not is_fresh(dump, self.sidecar):
+            build(dump)
+        self._idx_file = open(self.sidecar, "rb")
+        self._dump_file = open(dump, "rb")
+        _, self.mtime_ns, self.size, self.count = HEADER.unpack(self._idx_file.read(HEADER.size))
+        # mmap refuses empty files; an empty index / dump simply has nothing to map
+        self._idx = mmap.mmap(self._idx_file.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+        self._data = mmap.mmap(self._dump_file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def close(self) -> None:
+        for m in (self._idx, self._data):
+            if m is not None:
+                m.close()
+        self._idx_file.close()
+        self._dump_file.close()
+
+    def __enter__(self) -> "UuidIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def stale(self) -> bool:
+        st = os.stat(self.dump)
+        return st.st_mtime_ns != self.mtime_ns or st.st_size != self.size
+
+    def _find(self, uuid: str) -> Optional[Tuple[int, int]]:
+        key = _key(uuid)
+        idx, rec = self._idx, RECORD.size
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            at = HEADER.size + mid * rec
+            k = idx[at:at + KEY_LEN]
+            if k < key:
+                lo = mid + 1
+            elif k > key:
+                hi = mid
+            else:
+                _, off, n = RECORD.unpack_from(idx, at)
+                return off, n
+        return None
+
+    def __contains__(self, uuid: str) -> bool:
+        return self.count > 0 and self._find(uuid) is not None
+
+    def _read(self, uuid: str, off: int, n: int) -> Optional[Dict[str, Any]]:
+        node = json.loads(self._data[off:off + n])
+        return node if isinstance(node, dict) and node.get("uuid") == uuid else None  # key collision guard
+
+    def get(self, uuid: str) -> Optional[Dict[str, Any]]:
+        hit = self._find(uuid) if self.count else None
+        return self._read(uuid, *hit) if hit else None
+
+    def get_many(self, uuids: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        # Nodes for the uuids that are in the dump, in file order (sequential reads).
+        if not self.count:
+            return
+        hits = sorted((hit[0], hit[1], u) for u in set(uuids) for hit in [self._find(u)] if hit)
+        for off, n, u in hits:
+            node = self._read(u, off, n)
+            if node is not None:
+                yield node
+
+
+# One open index per dump and process, so several relation specs sharing an endpoint
+# (PO_raw three times) map it once.
+_open: Dict[str, UuidIndex] = {}
+_lock = threading.Lock()
+
+def open_index(dump: str) -> UuidIndex:
+    key = os.path.abspath(dump)
+    with _lock:
+        ix = _open.get(key)
+        if ix is None or ix.stale():
+            if ix is not None:
+                ix.close()
+            ix = _open[key] = UuidIndex(dump)
+        return ix
+
+
+# ------------------------------ CLI ------------------------------
+def _dump_path(token: str) -> str:
+    return token if token.endswith(".json") else os.path.join(DIR_NODES, f"{token}_raw.json")
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Build / query the uuid -> offset sidecar index of raw node dumps.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ap_b = sub.add_parser("build", help=f"Index dumps (default: every {DIR_NODES}/*_raw.json)")
+    ap_b.add_argument("types", nargs="*")
+    ap_b.add_argument("--force", action="store_true", help="Rebuild even if the index is up to date")
+    ap_g = sub.add_parser("get", help="Print the node with this uuid")
+    ap_g.add_argument("type", help="Node type (KS) or dump path")
+    ap_g.add_argument("uuid")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "get":
+        with UuidIndex(_dump_path(args.type)) as ix:
+            node = ix.get(args.uuid)
+        if node is None:
+            print(f"[ERROR] {args.uuid} not found in {_dump_path(args.type)}", file=sys.stderr)
+            return 1
+        print(json.dumps(node, ensure_ascii=False, indent=2))
+        return 0
+
+    paths: List[str] = [_dump_path(t) for t in args.types] or sorted(
+        os.path.join(DIR_NODES, f) for f in os.listdir(DIR_NODES) if f.endswith("_raw.json") and not f.startswith("."))
+    for p in paths:
+        if not os.path.exists(p):
+            print(f"[ERROR] Node dump not found: {p}", file=sys.stderr)
+            continue
+        if not args.force and is_fresh(p):
+            print(f"[INFO] {p}: index up to date")
+            continue
+        n = build(p)
+        print(f"Wrote: {sidecar_path(p)} ({n} uuids)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,6 +1,8 @@
 #!/usr/bin/env bash
-# convert.sh — KS.json -> KS.csv using jq
-# Usage: ./convert.sh input.json output.csv
+# convert.sh — KS.json -> KS.csv
+# Usage: ./convert.sh input.json output.csv [DELIM]
+# Thin wrapper around py/convert.py, which streams the TABLE instead of loading it into jq
+# (same ';' delimiter, quoting and UTF-8 BOM; also Parquet and whole directories, see there).
 set -euo pipefail
 
 if [[ $# -lt 2 || $# -gt 3 ]]; then
@@ -9,27 +11,4 @@ if [[ $# -lt 2 || $# -gt 3 ]]; then
   exit 1
 fi
 
-infile=$1
-outfile=$2
-DELIM=${3:-";"}
-
-if ! command -v jq >/dev/null 2>&1; then
-  echo "Error: jq is required but not found in PATH." >&2
-  exit 1
-fi
-
-# Convert JSON -> CSV with quoting for fields containing delimiter, quotes, or newlines.
-# Adds UTF-8 BOM at the top (for Excel compatibility).
-jq -r --arg d "$DELIM" '
-  # quote for CSV with custom delimiter
-  def q($d):
-    tostring
-    | gsub("\"";"\"\"")
-    | if test("[" + $d + "\n\r\"]") then "\""+.+"\"" else . end;
-
-  .result as $r
-  | [$r.headers[].name] as $h
-  | ($h | map(q($d)) | join($d)),
-    ($r.rows[] | [.values[]] | map(q($d)) | join($d))
-' "$infile" \
-| sed "1s/^/\xef\xbb\xbf/" > "$outfile"
+exec python3 "$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)/py/convert.py" "$1" "$2" --delim "${3:-;}"
@@ -10,8 +10,20 @@ set -euo pipefail
 #   OUT_JSON       – output file path for JSON (required)
 #   PAGE_JSON      – page number or 'null' (string, required)
 #   PERPAGE_JSON   – perPage number or 'null' (string, required)
+# Optional:
+#   METAIS_CACHE_MODE – '' (default) / refresh / offline / off, see py/metais_cache.py
+#   METAIS_METRICS    – JSONL file for timing spans (render, server, transfer, validate,
+#                       write, cache), see py/metrics.py; off when empty
 
-: "${TOKEN:?TOKEN env var is required}"
+# shellcheck source=lib.sh
+. "$(dirname -- "${BASH_SOURCE[0]}")/lib.sh"
+
+_cache_py="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)/py/metais_cache.py"
+_cache_mode="${METAIS_CACHE_MODE:-}"
+
+if [[ "$_cache_mode" != "offline" ]]; then
+  : "${TOKEN:?TOKEN env var is required}"
+fi
 : "${APIURI:?APIURI env var is required}"
 : "${PARAMS_PATH:?PARAMS_PATH env var is required}"
 : "${OUT_JSON:?OUT_JSON env var is required}"
@@ -26,9 +38,17 @@ if [[ -z "${SCRIPT_CONTENT:-}" ]]; then
 fi
 
 _payload="$(mktemp)"
-_resp_tmp="$(mktemp)"
+# Response goes to a temp file next to OUT_JSON: the final mv is then a rename on the same
+# filesystem, so OUT_JSON is either the old file or the complete new one, never partial.
+mkdir -p "$(dirname -- "$OUT_JSON")"
+_resp_tmp="$(mktemp "$(dirname -- "$OUT_JSON")/.tmp_XXXXXX")"
 trap 'rm -f "$_payload" "$_resp_tmp"' EXIT
 
+# spans are labelled with the output name: KS_raw.json -> KS, PO_je_gestor_KS.json -> PO_je_gestor_KS
+_item="$(basename -- "$OUT_JSON" .json)"
+_item="${_item%_raw}"
+_t0="$(metric_clock)"
+
 jq -n \
   --arg body "$SCRIPT_CONTENT" \
   --rawfile params_raw "$PARAMS_PATH" \
@@ -45,6 +65,21 @@ jq -n \
     | del(.page   | select(.==null))
     | del(.perPage| select(.==null))
   ' > "$_payload"
+metric_emit render "$(metric_since "$_t0")" item "$_item"
+
+# --- response cache: same key (API URL + payload) as the python client ---
+if [[ "$_cache_mode" != "off" ]]; then
+  set +e
+  _t0="$(metric_clock)"
+  python3 "$_cache_py" lookup --url "$APIURI" --payload "$_payload" --out "$OUT_JSON"
+  _cache_rc=$?
+  set -e
+  case "$_cache_rc" in
+    0) metric_emit cache "$(metric_since "$_t0")" item "$_item" bytes "$(wc -c <"$OUT_JSON")"
+       echo "NOTE: $OUT_JSON served from cache (use --refresh to fetch again)." >&2; exit 0 ;;
+    2) exit 1 ;;  # offline and not cached
+  esac
+fi
 
 curl_flags=(
   -sS
@@ -53,18 +88,34 @@ curl_flags=(
   -H "Content-Type: application/json"
   --data @"$_payload"
   -o "$_resp_tmp"
-  -w '%{http_code}'
+  -w '%{http_code} %{time_starttransfer} %{time_total} %{size_download}'
 )
 
 if [[ "${RUN_INSECURE:-0}" -eq 1 ]]; then
   curl_flags+=(-k)
 fi
 
-http_code="$(curl "${curl_flags[@]}")"
+curl_out="$(curl "${curl_flags[@]}")"
+read -r http_code t_first t_total size_dl <<<"$curl_out"
+
+# curl -w: time to first byte = connect + report execution on the server; the rest is the body
+if [[ -n "${METAIS_METRICS:-}" ]]; then
+  metric_emit server "$t_first" item "$_item" status "$http_code"
+  metric_emit transfer "$(awk -v a="$t_total" -v b="$t_first" 'BEGIN { printf "%.6f", a - b }')" \
+    item "$_item" bytes "$size_dl"
+fi
 
 if [[ "$http_code" == "200" ]]; then
+  _t0="$(metric_clock)"
   if jq -e . "$_resp_tmp" > /dev/null 2>&1; then
+    metric_emit validate "$(metric_since "$_t0")" item "$_item"
+    _t0="$(metric_clock)"
     mv -f "$_resp_tmp" "$OUT_JSON"
+    if [[ "$_cache_mode" != "off" ]]; then
+      python3 "$_cache_py" store --url "$APIURI" --payload "$_payload" --file "$OUT_JSON" \
+        || echo "WARN: could not store $OUT_JSON in the response cache." >&2
+    fi
+    metric_emit write "$(metric_since "$_t0")" item "$_item"
   else
     echo "ERROR: API returned non-JSON despite 200 OK. Refusing to write $OUT_JSON." >&2
     echo "------ Response (first 200 chars) ------" >&2
@@ -61,6 +61,34 @@ normalize_paging () {
   export PAGE_JSON PERPAGE_JSON
 }
 
+# --- timing spans (same JSONL shape as py/metrics.py), only when METAIS_METRICS is set ---
+# metric_clock               -> microseconds since the epoch
+# metric_since START         -> seconds elapsed since a metric_clock value
+# metric_emit STAGE SECONDS [KEY VALUE]...   (numeric values are stored as numbers)
+metric_clock () {
+  if [[ -n "${EPOCHREALTIME:-}" ]]; then
+    printf '%s\n' "${EPOCHREALTIME/[.,]/}"
+  else
+    date +%s%6N
+  fi
+}
+
+metric_since () {
+  local d=$(( $(metric_clock) - $1 ))
+  printf '%d.%06d\n' $(( d / 1000000 )) $(( d % 1000000 ))
+}
+
+metric_emit () {
+  [[ -n "${METAIS_METRICS:-}" ]] || return 0
+  local stage="$1" dur="$2"; shift 2
+  mkdir -p "$(dirname -- "$METAIS_METRICS")"
+  jq -nc --arg stage "$stage" --argjson dur "$dur" --argjson pid "$$" '
+      {ts: (now * 1000 | round / 1000), stage: $stage, dur: $dur, pid: $pid, src: "sh"}
+      + ([$ARGS.positional | _nwise(2) | {(.[0]): (.[1] | tonumber? // .)}] | add // {})
+    ' --args "$@" >> "$METAIS_METRICS" \
+    || echo "WARN: could not write timing span to $METAIS_METRICS." >&2
+}
+
 print_help () {
   cat <<'EOF'
 Usage: run.sh [options]
@@ -75,11 +103,19 @@ Options:
   -A, --api URL           Override API endpoint (default: metais-test URL).
       --params PATH       Parameters JSON file (default: params/params.json).
       --no-csv            Skip conversion from JSON to CSV.
+      --refresh           Ignore the response cache and call the API (result is cached).
+      --offline           Only use the response cache; fail if the request isn't cached.
+      --metrics FILE      Append timing spans (render, server, transfer, validate, convert) to FILE.
   -k, --insecure          Allow insecure server connections.
   -h, -H, --help          Show this help.
 
 Env:
-  TOKEN                   Bearer token (required).
+  TOKEN                   Bearer token (required, except with --offline).
+  METAIS_CACHE_MODE       Response cache: ''/refresh/offline/off (see py/metais_cache.py).
+  METAIS_CACHE_TTL        Seconds a cached response stays fresh (default 3600).
+  METAIS_CACHE_MAX_MB     Cache size bound, least recently used evicted (default 1024).
+  METAIS_METRICS          Timing spans file (JSONL), same as --metrics; summary with
+                          python3 py/metrics.py summary FILE.
   SCRIPT_CONTENT          Inline Groovy script body. If set, it overrides -s
                           and the script file does not need to exist.
 
@@ -1,5 +1,6 @@
 #!/usr/bin/env bash
 set -euo pipefail
+# Thin wrapper around the in-process client (py/metais_client.py).
+# Accepts the same extra options as run.sh (-k, -A, --params, -p, -P, --outdir, --no-csv).
 TYPE="${1:?usage: $0 <TYPE> [--no-csv] }"; shift || true
-export SCRIPT_CONTENT="$(sed "s|__TYPE__|${TYPE}|g" groovy/templates/extract_raw_template.groovy)"
-run/run.sh -o "${TYPE}_raw" --no-csv --outdir output/nodes "$@"
\ No newline at end of file
+exec python3 py/metais_client.py raw "$TYPE" "$@"
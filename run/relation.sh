@@ -9,6 +9,10 @@ set -euo pipefail
 #
 #   run/relation.sh Projekt Projekt asociuje Projekt_je_asociovany_s_projektom --no-csv
 #     -> type_REL overridden to "Projekt_je_asociovany_s_projektom"
+#
+# Thin wrapper around the in-process client (py/metais_client.py), which renders
+# groovy/templates/extract_relation_template.groovy and writes
+# output/relations/<OUTER>_<REL>_<CENTRAL>.json
 
 if [[ $# -lt 3 ]]; then
   echo "usage: $0 <CENTRAL> <OUTER> <REL> [RELATION_TYPE] [extra run args]"
@@ -17,34 +21,4 @@ if [[ $# -lt 3 ]]; then
   exit 1
 fi
 
-CENTRAL="$1"; OUTER="$2"; REL="$3"; shift 3 || true
-
-# If the next arg exists and does NOT start with '-', treat it as a full relation type override
-RELATION_OVERRIDE=""
-if [[ $# -ge 1 && "${1:0:1}" != "-" ]]; then
-  RELATION_OVERRIDE="$1"
-  shift
-fi
-
-# Report base name: central_rel_outer (lowercase)
-report_base="$(printf '%s_%s_%s' "$OUTER" "$REL" "$CENTRAL")"
-
-TEMPLATE="groovy/templates/extract_relation_template.groovy"
-
-# Default constructed relation type (OUTER_REL_CENTRAL), unless overridden
-TYPE_REL="${RELATION_OVERRIDE:-${OUTER}_${REL}_${CENTRAL}}"
-
-# Prepare inline script content by replacing placeholders
-# Template must contain:
-#   def type_REL = type("__RELATION__")
-#   headers use __CENTRAL__ and __OUTER__
-#   qi/type placeholders __CENTRAL__ / __OUTER__
-SCRIPT_CONTENT="$(
-  sed -e "s|__CENTRAL__|${CENTRAL}|g" \
-      -e "s|__OUTER__|${OUTER}|g" \
-      -e "s|__RELATION__|${TYPE_REL}|g" \
-    "$TEMPLATE"
-)"
-
-export SCRIPT_CONTENT
-run/run.sh -o "$report_base" --no-csv --outdir output/relations "$@"
\ No newline at end of file
+exec python3 py/metais_client.py relation "$@"
@@ -28,13 +28,20 @@ while (( "$#" )); do
     -k|--insecure) RUN_INSECURE=1; shift ;;
     --params)      PARAMS_PATH="${2:-}"; shift 2 ;;
     --no-csv)      RUN_CONVERT=0; shift ;;
+    --refresh)     METAIS_CACHE_MODE="refresh"; shift ;;
+    --offline)     METAIS_CACHE_MODE="offline"; shift ;;
+    --metrics)     METAIS_METRICS="$(expand_tilde "${2:-}")"; shift 2 ;;
     -h|-H|--help)  print_help; exit 0 ;;
     *) echo "Unknown option: $1"; echo "Try --help"; exit 1 ;;
   esac
 done
 
 # --- normalize paths & names ---
-: "${TOKEN:?TOKEN env var is required}"
+METAIS_CACHE_MODE="${METAIS_CACHE_MODE:-}"
+METAIS_METRICS="${METAIS_METRICS:-}"
+if [[ "$METAIS_CACHE_MODE" != "offline" ]]; then
+  : "${TOKEN:?TOKEN env var is required}"
+fi
 
 SCRIPT_PATH="$(expand_tilde "$SCRIPT_PATH")"
 PARAMS_PATH="$(expand_tilde "$PARAMS_PATH")"
@@ -70,26 +77,14 @@ OUT_CSV="${OUTDIR}/$(basename "$OUT_CSV")"
 normalize_paging "$PAGE_SET" "$PAGE_VAL" "$PERPAGE_SET" "$PERPAGE_VAL"
 
 # --- export contract for core.sh ---
-export APIURI SCRIPT_PATH SCRIPT_CONTENT PARAMS_PATH OUT_JSON PAGE_JSON PERPAGE_JSON TOKEN RUN_INSECURE
+export APIURI SCRIPT_PATH SCRIPT_CONTENT PARAMS_PATH OUT_JSON PAGE_JSON PERPAGE_JSON TOKEN RUN_INSECURE METAIS_CACHE_MODE METAIS_METRICS
 
 # --- run core ---
 "${SCRIPT_DIR}/core.sh"
 echo "Wrote: $OUT_JSON"
 
 # --- optional convert ---
+# py/convert.py streams TABLE payloads into CSV and skips RAW ones with a NOTE
 if (( RUN_CONVERT )); then
-  # Only convert if it's a TABLE payload
-  if jq -e '.type? == "TABLE"' "$OUT_JSON" > /dev/null 2>&1; then
-    if [[ -x "${SCRIPT_DIR}/convert.sh" ]]; then
-      "${SCRIPT_DIR}/convert.sh" "$OUT_JSON" "$OUT_CSV"
-      echo "Wrote: $OUT_CSV"
-    elif [[ -x "./convert.sh" ]]; then
-      ./convert.sh "$OUT_JSON" "$OUT_CSV"
-      echo "Wrote: $OUT_CSV"
-    else
-      echo "NOTE: ${SCRIPT_DIR}/convert.sh not found; skipping CSV." >&2
-    fi
-  else
-    echo "NOTE: Output is not TABLE; skipping CSV for $OUT_JSON." >&2
-  fi
+  python3 "$(dirname "$SCRIPT_DIR")/py/convert.py" "$OUT_JSON" "$OUT_CSV"
 fi
\ No newline at end of file
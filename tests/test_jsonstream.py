@@ -0,0 +1,42 @@
+# test_jsonstream.py — regression tests for the fallback scanner in py/jsonstream.py
+#
+# Run from the repo root:  python3 -m pytest -q tests
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "py"))
+
+import jsonstream  # noqa: E402
+
+NUMBER = "-12.5e+3"
+
+
+def _write_dump(tmp_path, cut: int) -> str:
+    # {"result": ["xxx...", -12.5e+3, 7]} padded so that the first CHUNK ends after NUMBER[:cut]
+    head = '{"result": ["'
+    pad = jsonstream.CHUNK - len(head) - len('", ') - cut
+    text = head + "x" * pad + '", ' + NUMBER + ", 7]}"
+    assert text.index(NUMBER) + cut == jsonstream.CHUNK
+    path = tmp_path / "dump.json"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("cut", range(1, len(NUMBER)))  # edge after "-", "-1", ..., "-12.", ..., "-12.5e+"
+def test_number_across_chunk_boundary(tmp_path, monkeypatch, cut):
+    monkeypatch.setattr(jsonstream, "ijson", None)
+    path = _write_dump(tmp_path, cut)
+    items = list(jsonstream.iter_result_items(path))
+    assert items[1:] == [-12500.0, 7]
+    assert [v for _, _, v in jsonstream.iter_result_spans(path)][1:] == [-12500.0, 7]
+
+
+def test_spans_point_at_the_values(tmp_path):
+    path = _write_dump(tmp_path, NUMBER.index(".") + 1)
+    with open(path, "rb") as f:
+        data = f.read()
+    for offset, length, value in jsonstream.iter_result_spans(path):
+        assert json.loads(data[offset:offset + length]) == value
\ No newline at end of file
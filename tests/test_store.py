@@ -0,0 +1,68 @@
+# test_store.py — egov_graph.load_graph reads fresh tables from the store (py/store.py)
+#
+# Run from the repo root:  python3 -m pytest -q tests
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "py"))
+
+import egov_graph  # noqa: E402
+import metrics  # noqa: E402
+import store  # noqa: E402
+
+
+def _dumps(tmp_path):
+    nodes, rels = tmp_path / "nodes", tmp_path / "relations"
+    nodes.mkdir()
+    rels.mkdir()
+    ks = [{"uuid": f"k{i}", "type": "KS", "metaAttributes": {"state": "DRAFT"},
+           "attributes": [{"name": "Gen_Profil_nazov", "value": f"KS {i}"}, {"name": "flag", "value": i % 2 == 0},
+                          {"name": "tag", "value": "a"}, {"name": "tag", "value": "b"}]} for i in range(5)]
+    (nodes / "KS_raw.json").write_text(json.dumps({"result": ks, "totalCount": 5, "type": "RAW"}), encoding="utf-8")
+    headers = [{"name": "central_uuid", "type": "STRING"}, {"name": "outer_uuid", "type": "STRING"}]
+    rows = [{"values": [f"k{i}", f"a{i % 2}"]} for i in range(5)]
+    (rels / "AS_sluzi_KS.json").write_text(json.dumps({"type": "TABLE", "result": {"headers": headers, "rows": rows}}),
+                                           encoding="utf-8")
+    return str(nodes), str(rels)
+
+
+def _snapshot(g):
+    ks = g.nodes["KS"]
+    cols = {k: [ks.column(k)[r] for r in range(len(ks))] for k in sorted(ks.cols)}
+    rel = g.rel("AS_sluzi_KS")
+    pairs = sorted((g.uuids[c], g.uuids[o]) for c, o in zip(rel.central_ids, rel.outer_ids))
+    return [g.uuids[i] for i in ks.ids], cols, pairs
+
+
+def _load(nodes, rels, spans):
+    spans.clear()
+    return _snapshot(egov_graph.load_graph(["KS"], ["AS_sluzi_KS"], dir_nodes=nodes, dir_relations=rels))
+
+
+def test_load_graph_from_store(tmp_path, monkeypatch):
+    nodes, rels = _dumps(tmp_path)
+    monkeypatch.setattr(store, "STORE_PATH", str(tmp_path / "metais.sqlite"))
+    spans = []
+    monkeypatch.setattr(metrics, "PATH", str(tmp_path / "m.jsonl"))
+    monkeypatch.setattr(metrics, "emit", lambda stage, dur, **f: spans.append(f))
+
+    from_json = _load(nodes, rels, spans)
+    assert not any(s.get("store") for s in spans)
+
+    conn = store.connect(store.STORE_PATH)
+    store.ingest_nodes(conn, "KS", os.path.join(nodes, "KS_raw.json"))
+    store.ingest_relation(conn, "AS_sluzi_KS", os.path.join(rels, "AS_sluzi_KS.json"))
+    conn.close()
+    from_store = _load(nodes, rels, spans)
+    assert [s.get("store") for s in spans] == [True, True]
+    assert from_store[0] == from_json[0] and from_store[2] == from_json[2]
+    assert from_store[1]["tag"] == from_json[1]["tag"] and "meta_state" not in from_store[1]
+    assert [bool(v) for v in from_store[1]["flag"]] == from_json[1]["flag"]
+
+    # a dump changed after the ingest is read as JSON again
+    path = os.path.join(nodes, "KS_raw.json")
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 10))
+    _load(nodes, rels, spans)
+    assert [s.get("store") for s in spans] == [None, True]
\ No newline at end of file
@@ -0,0 +1,98 @@
+# test_sync.py — merges of a delta into the dumps (py/sync.py)
+#
+# Run from the repo root:  python3 -m pytest -q tests
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "py"))
+
+import sync  # noqa: E402
+
+
+def _node(uuid: str, name: str) -> dict:
+    return {"uuid": uuid, "type": "KS", "attributes": [{"name": "Gen_Profil_nazov", "value": name}]}
+
+
+def _write_nodes(tmp_path, nodes) -> str:
+    path = tmp_path / "KS_raw.json"
+    path.write_text(json.dumps({"page": None, "perPage": None, "result": nodes, "totalCount": len(nodes), "type": "RAW"}),
+                    encoding="utf-8")
+    return str(path)
+
+
+def _write_relation(tmp_path, pairs) -> str:
+    path = tmp_path / "AS_sluzi_KS.json"
+    headers = [{"name": "central_uuid", "type": "STRING"}, {"name": "outer_uuid", "type": "STRING"}]
+    path.write_text(json.dumps({"type": "TABLE", "result": {"headers": headers, "rows": [{"values": list(p)} for p in pairs]},
+                                "totalCount": len(pairs)}), encoding="utf-8")
+    return str(path)
+
+
+def _pairs(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    assert doc["totalCount"] == len(doc["result"]["rows"])
+    return [tuple(r["values"]) for r in doc["result"]["rows"]]
+
+
+def _delta(c: str, o: str, change: str) -> dict:
+    return {"values": [c, o, change, "2024-01-01T01:00:00.000+01:00"]}
+
+
+def test_merge_nodes_upsert_and_invalidate(tmp_path):
+    path = _write_nodes(tmp_path, [_node("a", "A"), _node("b", "B"), _node("c", "C")])
+    changed = [_node("b", "B2"), _node("d", "D")]
+    assert sync.merge_nodes(path, changed, {"c"}) == (1, 1, 1)
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    assert [(n["uuid"], n["attributes"][0]["value"]) for n in doc["result"]] == [("a", "A"), ("b", "B2"), ("d", "D")]
+    assert doc["totalCount"] == 3 and doc["type"] == "RAW"
+
+
+def test_merge_nodes_plain_list_dump(tmp_path):
+    path = tmp_path / "old.json"
+    path.write_text(json.dumps([_node("a", "A")]), encoding="utf-8")
+    assert sync.merge_nodes(str(path), [_node("a", "A2")], set()) == (1, 0, 0)
+    with open(path, "r", encoding="utf-8") as f:
+        assert json.load(f)["result"] == [_node("a", "A2")]
+
+
+def test_merge_relation_upsert_and_delete(tmp_path):
+    path = _write_relation(tmp_path, [("k1", "a1"), ("k1", "a2"), ("k2", "a1")])
+    delta = [_delta("k1", "a3", "upsert"), _delta("k1", "a2", "delete"), _delta("k3", "a1", "upsert")]
+    assert sync.merge_relation(path, delta, set()) == (2, 1)
+    # template order kept; a new pair after its central's rows, new centrals at the end
+    assert _pairs(path) == [("k1", "a1"), ("k1", "a3"), ("k2", "a1"), ("k3", "a1")]
+
+
+def test_merge_relation_invalidated_node(tmp_path):
+    path = _write_relation(tmp_path, [("k1", "a1"), ("k1", "a2"), ("k2", "a1")])
+    assert sync.merge_relation(path, [], {"a1"}) == (0, 2)
+    assert _pairs(path) == [("k1", "a2")]
+
+
+def test_merge_relation_upsert_wins_over_delete(tmp_path):
+    path = _write_relation(tmp_path, [("k1", "a1"), ("k2", "a1")])
+    delta = [_delta("k1", "a1", "delete"), _delta("k1", "a1", "upsert"),
+             _delta("k2", "a2", "delete"), _delta("k2", "a2", "upsert")]
+    # k1-a1 is dropped and written again, k2-a2 was not there: counted like a set difference + union
+    assert sync.merge_relation(path, delta, set()) == (2, 1)
+    assert sorted(_pairs(path)) == [("k1", "a1"), ("k2", "a1"), ("k2", "a2")]
+
+
+def test_merge_relation_existing_upsert_not_duplicated(tmp_path):
+    path = _write_relation(tmp_path, [("k1", "a1"), ("k2", "a1"), ("k1", "a2")])  # k1 split in two groups
+    delta = [_delta("k1", "a2", "upsert"), _delta("k1", "a3", "upsert")]
+    assert sync.merge_relation(path, delta, set()) == (1, 0)
+    assert sorted(_pairs(path)) == [("k1", "a1"), ("k1", "a2"), ("k1", "a3"), ("k2", "a1")]
+
+
+def test_node_modified_sources():
+    meta = {"metaAttributes": {"lastModifiedAt": "m"}}
+    attr = {"attributes": [{"name": "$cmdb_lastModifiedAt", "value": "a"}]}
+    assert sync.node_modified(meta) == "m"
+    assert sync.node_modified(attr) == "a"
+    assert sync.node_modified({"metaAttributes": [{"name": "lastModifiedAt", "value": "l"}]}) == "l"
+    assert sync.node_modified({"lastModifiedAt": "t"}) == "t"
+    assert sync.node_modified({}) is None
\ No newline at end of file